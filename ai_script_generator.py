@@ -1,10 +1,16 @@
 import base64
+import json
 import logging
 import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
 
-import requests
+from PIL import Image
+
+from http_retry import post_with_retries
 
 logger = logging.getLogger(__name__)
 
@@ -18,13 +24,119 @@ DEFAULT_OPENAI_BASE_URL = "https://api.openai.com/v1"
 DEFAULT_MODEL = "gpt-4o-mini"
 CTA_FALLBACK_AGENT = "your agent"
 
+# Rooms requested at once by generate_room_scripts
+SCRIPT_MAX_CONCURRENCY = int(os.getenv("OPENAI_SCRIPT_CONCURRENCY", "6"))
+# Retry policy for each room request (see http_retry)
+SCRIPT_MAX_RETRIES = int(os.getenv("OPENAI_SCRIPT_MAX_RETRIES", "3"))
+SCRIPT_BACKOFF_SECONDS = float(os.getenv("OPENAI_SCRIPT_BACKOFF_SECONDS", "1.0"))
+SCRIPT_REQUEST_TIMEOUT = 60
+
+# Batched mode: whole-listing narration from one request per chunk of photos
+SCRIPT_BATCH = os.getenv("OPENAI_SCRIPT_BATCH", "false").lower() == "true"
+SCRIPT_BATCH_SIZE = int(os.getenv("OPENAI_SCRIPT_BATCH_SIZE", "10"))
+
+BATCH_SYSTEM_PROMPT = (
+    "You are a creative real estate copywriter narrating a property video tour. You receive the tour's "
+    "photos in order, each labelled with its room. Write one short narration line (1-2 sentences) per photo "
+    "that highlights the room's key selling points and flows naturally from the previous scene. Keep tone "
+    "warm, descriptive, and suited for luxury property tours. Respond with JSON only: "
+    '{"lines": ["line for photo 1", "line for photo 2", ...]}, one string per photo, in order.'
+)
+
+# Lines reused for unchanged photos, keyed by photo content, room, property details and model
+SCRIPT_CACHE_ENABLED = os.getenv("OPENAI_SCRIPT_CACHE", "true").lower() == "true"
+SCRIPT_CACHE_MAX_MB = int(os.getenv("OPENAI_SCRIPT_CACHE_MAX_MB", "64"))
+SCRIPT_CACHE_TTL = float(os.getenv("OPENAI_SCRIPT_CACHE_TTL", str(30 * 24 * 3600)))
+
+# Photos are sent as small JPEG derivatives; 'low' detail is a fixed 85 tokens per image
+VISION_MAX_EDGE = int(os.getenv("OPENAI_VISION_MAX_EDGE", "512"))
+VISION_JPEG_QUALITY = int(os.getenv("OPENAI_VISION_JPEG_QUALITY", "80"))
+VISION_DETAIL = os.getenv("OPENAI_VISION_DETAIL", "low")
+
+
+def get_script_cache():
+    """The room-script DiskCache, or None when disabled"""
+    if not SCRIPT_CACHE_ENABLED:
+        return None
+    from disk_cache import get_cache
+    return get_cache("room_scripts", SCRIPT_CACHE_MAX_MB * 1024 * 1024, ttl=SCRIPT_CACHE_TTL, suffix=".txt")
+
+
+def _script_cache_key(image_digest: str, room_label: str, property_details: Dict[str, Any],
+                      model: str, mode: str, sequence: Tuple[Any, ...] = ()) -> str:
+    """
+    Everything that changes a generated line; the CTA is applied afterwards
+
+    Batched lines flow from scene to scene, so batch mode passes the scene
+    index, tour length and neighbouring photo digests as `sequence`.
+    """
+    from disk_cache import cache_key
+    details = {field: property_details.get(field, '') for field in ('address', 'details1', 'details2', 'agent_name')}
+    prompt = SYSTEM_PROMPT if mode == "room" else BATCH_SYSTEM_PROMPT
+    return cache_key("room_script", image_digest, room_label, details, model, mode, sequence,
+                     prompt, VISION_MAX_EDGE, VISION_DETAIL)
+
+
+def _cached_line(key: str) -> Optional[str]:
+    cache = get_script_cache()
+    data = cache.get_bytes(key) if cache is not None else None
+    return data.decode("utf-8") if data else None
+
+
+def _store_line(key: str, line: str) -> None:
+    cache = get_script_cache()
+    if cache is None:
+        return
+    try:
+        cache.put_bytes(key, line.encode("utf-8"))
+    except OSError as exc:
+        logger.warning("Could not cache room script: %s", exc)
+
+
+def _vision_image(image_path: Path) -> Path:
+    """VISION_MAX_EDGE JPEG of the photo, created once next to it under vision/"""
+    derivative = image_path.parent / 'vision' / f"{image_path.stem}_{VISION_MAX_EDGE}.jpg"
+    if derivative.exists() and derivative.stat().st_mtime >= image_path.stat().st_mtime:
+        return derivative
+
+    derivative.parent.mkdir(exist_ok=True)
+    with Image.open(image_path) as img:
+        img.draft('RGB', (VISION_MAX_EDGE, VISION_MAX_EDGE))
+        img = img.convert('RGB')
+        img.thumbnail((VISION_MAX_EDGE, VISION_MAX_EDGE), Image.Resampling.LANCZOS)
+        # Unique temp name: concurrent requests for the same photo must not share it
+        fd, temp_path = tempfile.mkstemp(dir=derivative.parent, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                img.save(f, 'JPEG', quality=VISION_JPEG_QUALITY, optimize=True)
+            os.replace(temp_path, derivative)
+        except BaseException:
+            try:
+                os.unlink(temp_path)
+            except OSError:
+                pass
+            raise
+    return derivative
+
 
 def _encode_image(image_path: Path) -> str:
     with image_path.open('rb') as f:
         return base64.b64encode(f.read()).decode('utf-8')
 
 
-def _build_prompt(room_label: str, property_details: Dict[str, Any]) -> str:
+def _image_block(image_path: Path) -> Dict[str, Any]:
+    try:
+        source = _vision_image(image_path)
+    except Exception as exc:  # noqa: BLE001
+        logger.warning("Could not downscale %s for vision (%s); sending the original", image_path.name, exc)
+        source = image_path
+    return {
+        "type": "image_url",
+        "image_url": {"url": f"data:image/jpeg;base64,{_encode_image(source)}", "detail": VISION_DETAIL},
+    }
+
+
+def _property_context(property_details: Dict[str, Any]) -> List[str]:
     address = property_details.get('address', '')
     details1 = property_details.get('details1', '')
     details2 = property_details.get('details2', '')
@@ -39,13 +151,168 @@ def _build_prompt(room_label: str, property_details: Dict[str, Any]) -> str:
         extras.append(f"Additional highlight: {details2}.")
     if agent:
         extras.append(f"Listing agent: {agent}.")
+    return extras
 
+
+def _build_prompt(room_label: str, property_details: Dict[str, Any]) -> str:
+    extras = _property_context(property_details)
     extras.append(f"Room focus: {room_label}.")
     extras.append("Keep the narration 1-2 sentences, painting a vivid picture for buyers.")
     return " ".join(extras)
 
 
-def generate_room_scripts(assignments: List[Dict[str, Any]], property_details: Dict[str, Any], job_dir: Path) -> List[str]:
+def _post_chat(endpoint: str, headers: Dict[str, str], payload: Dict[str, Any]) -> Dict[str, Any]:
+    """POST a chat completion, retrying rate limits, server errors and network failures"""
+    response = post_with_retries(endpoint, headers, payload, SCRIPT_REQUEST_TIMEOUT,
+                                 SCRIPT_MAX_RETRIES, SCRIPT_BACKOFF_SECONDS, label="Script request")
+    response.raise_for_status()
+    return response.json()
+
+
+def _room_label(assignment: Dict[str, Any]) -> str:
+    return assignment.get('room_label') or assignment.get('room') or 'Room'
+
+
+def _room_image(assignment: Dict[str, Any], job_dir: Path) -> Optional[Path]:
+    saved_filename = assignment.get('saved_filename')
+    image_path = job_dir / saved_filename if saved_filename else None
+    return image_path if image_path and image_path.exists() else None
+
+
+def _log_usage(what: str, payload: Dict[str, Any], started: float, data: Dict[str, Any]) -> None:
+    usage = data.get("usage") or {}
+    logger.info(
+        "%s: %.1f KB request, %.2fs, %s prompt / %s completion tokens",
+        what, len(json.dumps(payload)) / 1024, time.time() - started,
+        usage.get("prompt_tokens", "?"), usage.get("completion_tokens", "?"),
+    )
+
+
+def _generate_room_line(
+    idx: int,
+    assignment: Dict[str, Any],
+    property_details: Dict[str, Any],
+    job_dir: Path,
+    endpoint: str,
+    headers: Dict[str, str],
+    model: str,
+) -> str:
+    room_label = _room_label(assignment)
+    image_path = _room_image(assignment, job_dir)
+    if not image_path:
+        logger.warning("Image path missing for assignment %s; using fallback", assignment)
+        return _fallback_line(idx, room_label, property_details)
+
+    try:
+        from disk_cache import file_digest
+        key = _script_cache_key(file_digest(str(image_path)), room_label, property_details, model, "room")
+        cached = _cached_line(key)
+        if cached:
+            return cached
+
+        prompt = _build_prompt(room_label, property_details)
+        logger.debug("Requesting AI script for %s", room_label)
+
+        payload = {
+            "model": model,
+            "messages": [
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {
+                    "role": "user",
+                    "content": [
+                        {"type": "text", "text": prompt},
+                        _image_block(image_path),
+                    ],
+                },
+            ],
+            "max_tokens": 180,
+        }
+
+        started = time.time()
+        data = _post_chat(endpoint, headers, payload)
+        _log_usage(f"Room script for {room_label}", payload, started, data)
+        text = _extract_text(data)
+        if not text:
+            logger.warning("Empty AI response for %s; using fallback", room_label)
+            return _fallback_line(idx, room_label, property_details)
+        _store_line(key, text)
+        return text
+    except Exception as exc:  # noqa: BLE001
+        logger.error("AI script generation failed for %s: %s", room_label, exc)
+        return _fallback_line(idx, room_label, property_details)
+
+
+def _generate_batch_lines(
+    rooms: List[Tuple[int, str, Path]],
+    total: int,
+    property_details: Dict[str, Any],
+    endpoint: str,
+    headers: Dict[str, str],
+    model: str,
+) -> Optional[List[str]]:
+    """
+    Lines for a chunk of (scene index, room label, photo) from one request
+
+    Returns None when the request fails or the reply is not a JSON array with
+    one non-empty line per photo, so the caller can fall back to per-room requests.
+    """
+    first, last = rooms[0][0], rooms[-1][0]
+    intro = _property_context(property_details)
+    if total == len(rooms):
+        intro.append(f"This is the complete {total}-scene tour.")
+    elif last - first + 1 == len(rooms):
+        intro.append(f"These are scenes {first}-{last} of a {total}-scene tour.")
+    else:
+        # Cached scenes leave gaps; name the ones in this request
+        scenes = ", ".join(str(idx) for idx, _, _ in rooms)
+        intro.append(f"These are scenes {scenes} of a {total}-scene tour.")
+    intro.append(f"Return exactly {len(rooms)} lines.")
+
+    content: List[Dict[str, Any]] = [{"type": "text", "text": " ".join(intro)}]
+    for idx, room_label, image_path in rooms:
+        content.append({"type": "text", "text": f"Scene {idx}: {room_label}"})
+        content.append(_image_block(image_path))
+
+    payload = {
+        "model": model,
+        "messages": [
+            {"role": "system", "content": BATCH_SYSTEM_PROMPT},
+            {"role": "user", "content": content},
+        ],
+        "response_format": {"type": "json_object"},
+        "max_tokens": 120 * len(rooms) + 60,
+    }
+
+    try:
+        started = time.time()
+        data = _post_chat(endpoint, headers, payload)
+        _log_usage(f"Batched room scripts for scenes {first}-{last}", payload, started, data)
+        lines = json.loads(_extract_text(data)).get("lines")
+    except Exception as exc:  # noqa: BLE001
+        logger.warning("Batched script request for scenes %d-%d failed: %s", first, last, exc)
+        return None
+
+    if (not isinstance(lines, list) or len(lines) != len(rooms)
+            or not all(isinstance(line, str) and line.strip() for line in lines)):
+        logger.warning("Batched script reply for scenes %d-%d did not match the photos; using per-room requests",
+                       first, last)
+        return None
+    return [line.strip() for line in lines]
+
+
+def generate_room_scripts(
+    assignments: List[Dict[str, Any]],
+    property_details: Dict[str, Any],
+    job_dir: Path,
+    batch: Optional[bool] = None,
+) -> List[str]:
+    """
+    One narration line per assignment, in order
+
+    With batch (default OPENAI_SCRIPT_BATCH) the photos are sent in chunks of
+    OPENAI_SCRIPT_BATCH_SIZE per request so the narration reads as one tour;
+    chunks whose reply cannot be parsed fall back to per-room requests.
+    """
     if not assignments:
         return []
 
@@ -63,51 +330,57 @@ def generate_room_scripts(assignments: List[Dict[str, Any]], property_details: D
         "Content-Type": "application/json",
     }
 
-    scripts: List[str] = []
-    for idx, assignment in enumerate(assignments, start=1):
-        room_label = assignment.get('room_label') or assignment.get('room') or 'Room'
-        saved_filename = assignment.get('saved_filename')
-        image_path = job_dir / saved_filename if saved_filename else None
-        if not image_path or not image_path.exists():
-            logger.warning("Image path missing for assignment %s; using fallback", assignment)
-            scripts.append(_fallback_line(idx, room_label, property_details))
-            continue
+    scripts: List[Optional[str]] = [None] * len(assignments)
+    workers = max(1, min(SCRIPT_MAX_CONCURRENCY, len(assignments)))
+    start = time.time()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        if SCRIPT_BATCH if batch is None else batch:
+            from disk_cache import file_digest
+            images = [_room_image(assignment, job_dir) for assignment in assignments]
+            digests = [file_digest(str(path)) if path else None for path in images]
+            rooms = []
+            keys: Dict[int, str] = {}
+            for idx, assignment in enumerate(assignments, start=1):
+                image_path = images[idx - 1]
+                if not image_path:
+                    continue
+                room_label = _room_label(assignment)
+                # A line is only reused in the same place between the same photos
+                sequence = (idx, len(assignments),
+                            digests[idx - 2] if idx > 1 else None,
+                            digests[idx] if idx < len(assignments) else None)
+                keys[idx] = _script_cache_key(digests[idx - 1], room_label, property_details, model, "batch",
+                                              sequence)
+                scripts[idx - 1] = _cached_line(keys[idx])
+                if scripts[idx - 1] is None:
+                    rooms.append((idx, room_label, image_path))
+            size = max(1, SCRIPT_BATCH_SIZE)
+            chunks = [rooms[i:i + size] for i in range(0, len(rooms), size)]
+            batch_futures = [
+                pool.submit(_generate_batch_lines, chunk, len(assignments), property_details, endpoint, headers, model)
+                for chunk in chunks
+            ]
+            for chunk, future in zip(chunks, batch_futures):
+                lines = future.result()
+                if lines is not None:
+                    for (idx, _, _), line in zip(chunk, lines):
+                        scripts[idx - 1] = line
+                        _store_line(keys[idx], line)
 
-        try:
-            image_base64 = _encode_image(image_path)
-            prompt = _build_prompt(room_label, property_details)
-            logger.debug("Requesting AI script for %s", room_label)
-
-            payload = {
-                "model": model,
-                "messages": [
-                    {"role": "system", "content": SYSTEM_PROMPT},
-                    {
-                        "role": "user",
-                        "content": [
-                            {"type": "text", "text": prompt},
-                            {
-                                "type": "image_url",
-                                "image_url": {"url": f"data:image/jpeg;base64,{image_base64}"},
-                            },
-                        ],
-                    },
-                ],
-                "max_tokens": 180,
-            }
-
-            response = requests.post(endpoint, headers=headers, json=payload, timeout=60)
-            response.raise_for_status()
-            data = response.json()
-            text = _extract_text(data)
-            if not text:
-                logger.warning("Empty AI response for %s; using fallback", room_label)
-                text = _fallback_line(idx, room_label, property_details)
-            scripts.append(text)
-        except Exception as exc:  # noqa: BLE001
-            logger.error("AI script generation failed for %s: %s", room_label, exc)
-            scripts.append(_fallback_line(idx, room_label, property_details))
-    return _apply_final_slide_cta(scripts, property_details)
+        # Rooms are independent; each falls back on its own, so order is preserved
+        futures = {
+            idx: pool.submit(_generate_room_line, idx, assignment, property_details, job_dir, endpoint, headers, model)
+            for idx, assignment in enumerate(assignments, start=1)
+            if scripts[idx - 1] is None
+        }
+        for idx, future in futures.items():
+            scripts[idx - 1] = future.result()
+
+    cache = get_script_cache()
+    logger.info("Generated %d room scripts (%d per-room requests) with %d workers in %.1fs (cache: %s)",
+                len(scripts), len(futures), workers, time.time() - start,
+                cache.stats() if cache is not None else "off")
+    return _apply_final_slide_cta(scripts, property_details)  # type: ignore[arg-type]
 
 
 def _extract_text(data: Dict[str, Any]) -> str:
@@ -0,0 +1,158 @@
+"""
+Audio duration from file headers, without spawning ffprobe
+Reads the formats TTS returns: WAV (RIFF fmt/data chunks) and MP3 (Xing/Info
+or VBRI frame counts, otherwise a walk over the frame headers). Anything else
+returns None so the caller can fall back to ffprobe.
+"""
+import os
+import struct
+import logging
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# MP3 frame header tables, indexed by the header's version and layer bits
+_MPEG1, _MPEG2, _MPEG25 = 3, 2, 0
+_LAYER1, _LAYER2, _LAYER3 = 3, 2, 1
+
+_BITRATES = {
+    (_MPEG1, _LAYER1): (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    (_MPEG1, _LAYER2): (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    (_MPEG1, _LAYER3): (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (_MPEG2, _LAYER1): (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    (_MPEG2, _LAYER2): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    (_MPEG2, _LAYER3): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+_SAMPLE_RATES = {
+    _MPEG1: (44100, 48000, 32000),
+    _MPEG2: (22050, 24000, 16000),
+    _MPEG25: (11025, 12000, 8000),
+}
+
+# How far into the file the first MP3 frame may start (after any ID3v2 tag)
+MP3_SYNC_SEARCH_BYTES = 64 * 1024
+
+
+def _mp3_frame(data: bytes, offset: int):
+    """(frame_length, samples, sample_rate, version, channel_mode) of the header at offset, or None"""
+    if offset + 4 > len(data):
+        return None
+    header = struct.unpack_from('>I', data, offset)[0]
+    if header >> 21 != 0x7FF:
+        return None
+    version = (header >> 19) & 3
+    layer = (header >> 17) & 3
+    bitrate_index = (header >> 12) & 0xF
+    rate_index = (header >> 10) & 3
+    if version == 1 or layer == 0 or bitrate_index in (0, 15) or rate_index == 3:
+        return None
+
+    table_version = _MPEG1 if version == _MPEG1 else _MPEG2
+    bitrate = _BITRATES[(table_version, layer)][bitrate_index] * 1000
+    sample_rate = _SAMPLE_RATES[version][rate_index]
+    padding = (header >> 9) & 1
+    channel_mode = (header >> 6) & 3
+
+    if layer == _LAYER1:
+        samples = 384
+        length = (12 * bitrate // sample_rate + padding) * 4
+    else:
+        samples = 1152 if layer == _LAYER2 or version == _MPEG1 else 576
+        length = samples // 8 * bitrate // sample_rate + padding
+    return length, samples, sample_rate, version, channel_mode
+
+
+def _id3v2_size(data: bytes) -> int:
+    if len(data) < 10 or data[:3] != b'ID3':
+        return 0
+    size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+    footer = 10 if data[5] & 0x10 else 0
+    return 10 + size + footer
+
+
+def mp3_duration(data: bytes) -> Optional[float]:
+    start = _id3v2_size(data)
+    limit = min(len(data), start + MP3_SYNC_SEARCH_BYTES)
+    offset = start
+    frame = None
+    while offset < limit:
+        frame = _mp3_frame(data, offset)
+        # Require a second header right after the first to reject false syncs
+        if frame and (offset + frame[0] == len(data) or _mp3_frame(data, offset + frame[0])):
+            break
+        frame = None
+        offset += 1
+    if frame is None:
+        return None
+
+    length, samples, sample_rate, version, channel_mode = frame
+
+    # Xing/Info header (LAME, VBR and CBR) sits after the side information
+    mono = channel_mode == 3
+    side_info = (17 if mono else 32) if version == _MPEG1 else (9 if mono else 17)
+    xing = offset + 4 + side_info
+    if data[xing:xing + 4] in (b'Xing', b'Info') and len(data) >= xing + 12:
+        flags = struct.unpack_from('>I', data, xing + 4)[0]
+        if flags & 1:
+            frames = struct.unpack_from('>I', data, xing + 8)[0]
+            return frames * samples / sample_rate
+
+    # Fraunhofer VBRI header at a fixed 32 bytes after the frame header
+    vbri = offset + 36
+    if data[vbri:vbri + 4] == b'VBRI' and len(data) >= vbri + 18:
+        frames = struct.unpack_from('>I', data, vbri + 14)[0]
+        return frames * samples / sample_rate
+
+    # No header: count the frames (cheap for narration-sized files)
+    total_samples = 0
+    end = len(data) - (128 if data[-128:-125] == b'TAG' else 0)
+    while offset < end:
+        frame = _mp3_frame(data, offset)
+        if frame is None:
+            offset += 1
+            continue
+        total_samples += frame[1]
+        offset += frame[0]
+    return total_samples / sample_rate if total_samples else None
+
+
+def wav_duration(data: bytes) -> Optional[float]:
+    if len(data) < 12 or data[:4] != b'RIFF' or data[8:12] != b'WAVE':
+        return None
+    byte_rate = None
+    offset = 12
+    while offset + 8 <= len(data):
+        chunk_id = data[offset:offset + 4]
+        chunk_size = struct.unpack_from('<I', data, offset + 4)[0]
+        if chunk_id == b'fmt ' and offset + 20 <= len(data):
+            byte_rate = struct.unpack_from('<I', data, offset + 16)[0]
+        elif chunk_id == b'data':
+            if not byte_rate:
+                return None
+            # Streamed WAVs (TTS included) may leave the size as 0 or 0xFFFFFFFF
+            available = len(data) - offset - 8
+            if chunk_size in (0, 0xFFFFFFFF) or chunk_size > available:
+                chunk_size = available
+            return chunk_size / byte_rate
+        offset += 8 + chunk_size + (chunk_size & 1)
+    return None
+
+
+def read_duration(path: str) -> Optional[float]:
+    """Duration in seconds for WAV and MP3 files, None for anything else"""
+    try:
+        with open(path, 'rb') as handle:
+            data = handle.read()
+    except OSError as exc:
+        logger.debug(f"Could not read {path}: {exc}")
+        return None
+
+    if data[:4] == b'RIFF':
+        return wav_duration(data)
+    if data[:3] == b'ID3' or os.path.splitext(path)[1].lower() == '.mp3' or (
+            len(data) > 1 and data[0] == 0xFF and data[1] & 0xE0 == 0xE0):
+        return mp3_duration(data)
+    return None
+
+
+__all__ = ['read_duration', 'mp3_duration', 'wav_duration']
@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+Benchmark the local render engines on synthetic listings
+Every engine renders the same deterministic photos in its own process; the
+suite records wall time, frames per second, peak RSS (the engine and its
+ffmpeg children), output size and SSIM of sampled frames against golden
+frames, and writes the results as JSON tagged with the current commit
+
+Usage:
+    python -m benchmarks.run_engines [--engines optimized,xfade] [--resolutions phone,hd]
+        [--images 6] [--quality medium] [--output results.json] [--baseline old.json]
+        [--update-golden]
+
+Golden frames live in benchmarks/golden/; run with --update-golden on a
+known-good commit to (re)create them.
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+GOLDEN_DIR = os.path.join(BENCH_DIR, 'golden')
+
+# Fractions of the video at which frames are compared against the goldens
+SAMPLE_POINTS = (0.1, 0.35, 0.6, 0.9)
+
+# tour_config.QUALITY_PRESETS names for the professional engine
+PROFESSIONAL_QUALITY = {'deployment': 'low', 'medium': 'medium', 'high': 'high', 'premium': 'high'}
+
+
+def _render_optimized(images, output, quality):
+    from optimized_virtual_tour import create_optimized_tour
+    return create_optimized_tour(images, output, 'benchmark', quality=quality)
+
+
+def _render_professional(images, output, quality):
+    from professional_virtual_tour import ProfessionalVirtualTour
+    return ProfessionalVirtualTour(output, quality=PROFESSIONAL_QUALITY[quality]).create_tour(images)
+
+
+def _render_imageio(images, output, quality):
+    from imageio_video_generator import create_imageio_video
+    return create_imageio_video(images, output)
+
+
+def _render_segments(images, output, quality):
+    from ffmpeg_ken_burns import create_ken_burns_video
+    return create_ken_burns_video(images, output, 'benchmark', quality=quality, engine='segments')
+
+
+def _render_xfade(images, output, quality):
+    from ffmpeg_xfade_tour import create_xfade_tour
+    return create_xfade_tour(images, output, 'benchmark', quality=quality)
+
+
+def _render_preview(images, output, quality):
+    from ffmpeg_ken_burns import create_preview_video
+    return create_preview_video(images, output, 'benchmark')
+
+
+ENGINES = {
+    'optimized': _render_optimized,
+    'professional': _render_professional,
+    'imageio': _render_imageio,
+    'ffmpeg_segments': _render_segments,
+    'xfade': _render_xfade,
+    'preview': _render_preview,
+}
+
+
+def _max_rss_mb(who) -> float:
+    rss = resource.getrusage(who).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return rss / 1024 / 1024 if sys.platform == 'darwin' else rss / 1024
+
+
+def run_worker(engine, images, output, quality):
+    """Child process: render once and report timing and memory as JSON"""
+    start = time.perf_counter()
+    ENGINES[engine](images, output, quality)
+    wall = time.perf_counter() - start
+    print(json.dumps({
+        'wall_seconds': wall,
+        'peak_rss_mb': _max_rss_mb(resource.RUSAGE_SELF),
+        'peak_child_rss_mb': _max_rss_mb(resource.RUSAGE_CHILDREN),
+    }))
+
+
+def read_samples(video_path):
+    """Frame count and the BGR frames at SAMPLE_POINTS"""
+    import cv2
+
+    capture = cv2.VideoCapture(video_path)
+    expected = int(capture.get(cv2.CAP_PROP_FRAME_COUNT))
+    wanted = {min(int(p * expected), max(expected - 1, 0)) for p in SAMPLE_POINTS}
+    samples = {}
+    count = 0
+    while True:
+        ok, frame = capture.read()
+        if not ok:
+            break
+        if count in wanted:
+            samples[count] = frame
+        count += 1
+    capture.release()
+    return count, [samples[i] for i in sorted(samples)]
+
+
+def ssim(a, b) -> float:
+    """Mean structural similarity of two frames' luma (Wang et al. 2004 constants)"""
+    import cv2
+    import numpy as np
+
+    if a.shape != b.shape:
+        b = cv2.resize(b, (a.shape[1], a.shape[0]), interpolation=cv2.INTER_AREA)
+    x = cv2.cvtColor(a, cv2.COLOR_BGR2GRAY).astype(np.float64)
+    y = cv2.cvtColor(b, cv2.COLOR_BGR2GRAY).astype(np.float64)
+    c1, c2 = (0.01 * 255) ** 2, (0.03 * 255) ** 2
+
+    def blur(image):
+        return cv2.GaussianBlur(image, (11, 11), 1.5)
+
+    mu_x, mu_y = blur(x), blur(y)
+    var_x = blur(x * x) - mu_x ** 2
+    var_y = blur(y * y) - mu_y ** 2
+    cov = blur(x * y) - mu_x * mu_y
+    score = ((2 * mu_x * mu_y + c1) * (2 * cov + c2)) / ((mu_x ** 2 + mu_y ** 2 + c1) * (var_x + var_y + c2))
+    return float(score.mean())
+
+
+def compare_golden(engine, scenario, frames, update):
+    """Mean SSIM against the golden frames (None when there are none)"""
+    import cv2
+
+    directory = os.path.join(GOLDEN_DIR, engine, scenario)
+    if update:
+        os.makedirs(directory, exist_ok=True)
+        for i, frame in enumerate(frames):
+            cv2.imwrite(os.path.join(directory, f'frame_{i}.png'), frame)
+        return 1.0
+
+    scores = []
+    for i, frame in enumerate(frames):
+        golden = cv2.imread(os.path.join(directory, f'frame_{i}.png'))
+        if golden is not None:
+            scores.append(ssim(golden, frame))
+    return round(sum(scores) / len(scores), 4) if scores else None
+
+
+def run_engine(engine, images, scenario, quality, temp_dir, update_golden):
+    output = os.path.join(temp_dir, f'{engine}_{scenario}.mp4')
+    env = dict(os.environ, SEGMENT_CACHE='false', PYTHONPATH=REPO_DIR)
+    cmd = [sys.executable, '-m', 'benchmarks.run_engines', '--worker', engine,
+           '--quality', quality, '--output', output, '--', *images]
+    completed = subprocess.run(cmd, cwd=REPO_DIR, env=env, capture_output=True, text=True)
+    result = {'engine': engine, 'scenario': scenario, 'quality': quality}
+    if completed.returncode != 0 or not os.path.exists(output):
+        result['error'] = (completed.stderr or 'no output').strip().splitlines()[-1]
+        return result
+
+    metrics = json.loads(completed.stdout.strip().splitlines()[-1])
+    frames, samples = read_samples(output)
+    result.update({
+        'wall_seconds': round(metrics['wall_seconds'], 2),
+        'frames': frames,
+        'fps': round(frames / metrics['wall_seconds'], 1) if metrics['wall_seconds'] else None,
+        'peak_rss_mb': round(metrics['peak_rss_mb'], 1),
+        'peak_child_rss_mb': round(metrics['peak_child_rss_mb'], 1),
+        'output_bytes': os.path.getsize(output),
+        'ssim': compare_golden(engine, scenario, samples, update_golden),
+    })
+    return result
+
+
+def _commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def add_baseline(results, baseline_path):
+    """Annotate results with the fps and wall-time change versus an earlier run"""
+    with open(baseline_path) as f:
+        baseline = {(r['engine'], r['scenario']): r for r in json.load(f)['results']}
+    for result in results:
+        previous = baseline.get((result['engine'], result['scenario']))
+        if previous and previous.get('fps') and result.get('fps'):
+            result['fps_change'] = round(result['fps'] / previous['fps'] - 1, 3)
+            result['wall_change'] = round(result['wall_seconds'] / previous['wall_seconds'] - 1, 3)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--engines', default=','.join(ENGINES))
+    parser.add_argument('--resolutions', default='phone,hd')
+    parser.add_argument('--images', type=int, default=6)
+    parser.add_argument('--quality', default='medium')
+    parser.add_argument('--output', help='Write the JSON results here as well as to stdout')
+    parser.add_argument('--baseline', help='Earlier results JSON to compare against')
+    parser.add_argument('--update-golden', action='store_true')
+    parser.add_argument('--worker', choices=sorted(ENGINES), help=argparse.SUPPRESS)
+    parser.add_argument('photos', nargs='*', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.worker, args.photos, args.output, args.quality)
+        return
+
+    from synthetic_listing import RESOLUTIONS, generate_listing
+
+    engines = [e for e in args.engines.split(',') if e]
+    unknown = set(engines) - set(ENGINES)
+    if unknown:
+        parser.error(f"Unknown engines: {', '.join(sorted(unknown))}")
+
+    results = []
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for resolution in args.resolutions.split(','):
+            if resolution not in RESOLUTIONS:
+                parser.error(f"Unknown resolution {resolution}; choose from {', '.join(RESOLUTIONS)}")
+            images = generate_listing(os.path.join(temp_dir, 'photos'), resolution, args.images)
+            scenario = f'{resolution}-{args.images}-{args.quality}'
+            for engine in engines:
+                result = run_engine(engine, images, scenario, args.quality, temp_dir, args.update_golden)
+                print(f"{engine} {scenario}: {result.get('fps', result.get('error'))}", file=sys.stderr)
+                results.append(result)
+
+    if args.baseline:
+        add_baseline(results, args.baseline)
+
+    report = {
+        'commit': _commit(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'host': {'platform': platform.platform(), 'python': platform.python_version(), 'cpus': os.cpu_count()},
+        'results': results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text)
+    print(text)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Benchmark planned affine Ken Burns motion against ffmpeg's zoompan
+Reports frame generation speed (no encoding) and camera jitter for each
+segment movement, plus the AffineFrameGenerator against the old
+slice/resize/cvtColor path of the OpenCV engines. Jitter is measured on the
+rendered frames of both renderers; the *_modelled_* figures come from the
+motion plan alone.
+
+Usage: python -m benchmarks.run_motion [--image photo.jpg] [--frames 200] [--size 1920x1080]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+from ffmpeg_ken_burns import FFMPEG_BINARY, SEGMENT_MOVEMENTS
+from ffmpeg_xfade_tour import zoompan_filter
+from frame_generator import AffineFrameGenerator
+from motion_planner import plan_motion, motion_jitter
+from synthetic_listing import synthetic_photo
+
+
+def bench_affine(source, movement, frames, size):
+    plan = plan_motion(movement, frames, (source.shape[1], source.shape[0]), size)
+    frame = np.empty((size[1], size[0], 3), dtype=np.uint8)
+    start = time.perf_counter()
+    for matrix in plan.affine_matrices():
+        cv2.warpAffine(source, matrix, size, dst=frame,
+                       flags=cv2.INTER_LINEAR, borderMode=cv2.BORDER_REPLICATE)
+    elapsed = time.perf_counter() - start
+    return frames / elapsed, plan
+
+
+def bench_legacy(source_rgb, plan, size):
+    """Integer crop, cv2.resize and cvtColor per frame, as the engines used to do"""
+    start = time.perf_counter()
+    for x, y, w, h in plan.rects():
+        x1, y1 = int(x), int(y)
+        frame = source_rgb[y1:y1 + int(h), x1:x1 + int(w)]
+        frame = cv2.resize(frame, size, interpolation=cv2.INTER_LINEAR)
+        frame = cv2.cvtColor(frame, cv2.COLOR_RGB2BGR)
+    return plan.frames / (time.perf_counter() - start)
+
+
+def bench_generator(source_rgb, plan, size):
+    """AffineFrameGenerator: one BGR conversion, then a warp per frame"""
+    start = time.perf_counter()
+    generator = AffineFrameGenerator(*size)
+    generator.load(source_rgb, cv2.COLOR_RGB2BGR)
+    for x, y, w, h in plan.rects():
+        generator.render(x, y, w, h)
+    return plan.frames / (time.perf_counter() - start)
+
+
+def bench_zoompan(image_path, movement, frames, size, fps):
+    cmd = [
+        FFMPEG_BINARY, '-hide_banner', '-loglevel', 'error',
+        '-i', image_path,
+        '-vf', zoompan_filter(movement, frames, size[0], size[1], fps),
+        '-frames:v', str(frames),
+        '-f', 'null', '-'
+    ]
+    start = time.perf_counter()
+    subprocess.run(cmd, check=True, capture_output=True)
+    return frames / (time.perf_counter() - start)
+
+
+def affine_frames(source, plan, size):
+    frame = np.empty((size[1], size[0], 3), dtype=np.uint8)
+    for matrix in plan.affine_matrices():
+        cv2.warpAffine(source, matrix, size, dst=frame,
+                       flags=cv2.INTER_LINEAR, borderMode=cv2.BORDER_REPLICATE)
+        yield frame
+
+
+def zoompan_frames(image_path, movement, frames, size, fps):
+    """The BGR frames ffmpeg's zoompan really produces for the movement"""
+    cmd = [
+        FFMPEG_BINARY, '-hide_banner', '-loglevel', 'error',
+        '-i', image_path,
+        '-vf', zoompan_filter(movement, frames, size[0], size[1], fps),
+        '-frames:v', str(frames),
+        '-f', 'rawvideo', '-pix_fmt', 'bgr24', '-'
+    ]
+    frame_bytes = size[0] * size[1] * 3
+    with subprocess.Popen(cmd, stdout=subprocess.PIPE) as process:
+        while True:
+            data = process.stdout.read(frame_bytes)
+            if len(data) < frame_bytes:
+                break
+            yield np.frombuffer(data, dtype=np.uint8).reshape(size[1], size[0], 3)
+
+
+def measured_jitter(frames):
+    """
+    Camera stepping measured on rendered frames, in output pixels
+
+    Phase correlation gives the shift between consecutive frames; like
+    motion_jitter, the result is the standard deviation of its change.
+    """
+    previous = window = None
+    shifts = []
+    for frame in frames:
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY).astype(np.float32)
+        if window is None:
+            window = cv2.createHanningWindow((gray.shape[1], gray.shape[0]), cv2.CV_32F)
+        if previous is not None:
+            (dx, dy), _ = cv2.phaseCorrelate(previous, gray, window)
+            shifts.append((dx, dy))
+        previous = gray
+    if len(shifts) < 2:
+        return 0.0
+    return float(np.std(np.diff(np.array(shifts), axis=0)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--image', help='Photo to animate (default: synthetic 1.3x frame)')
+    parser.add_argument('--frames', type=int, default=200)
+    parser.add_argument('--size', default='1920x1080')
+    parser.add_argument('--fps', type=int, default=25)
+    args = parser.parse_args()
+
+    width, height = (int(v) for v in args.size.split('x'))
+    size = (width, height)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        image_path = args.image
+        if not image_path:
+            image_path = os.path.join(temp_dir, 'synthetic.png')
+            photo = synthetic_photo((int(width * 1.3), int(height * 1.3)), seed=1234)
+            cv2.imwrite(image_path, cv2.cvtColor(photo, cv2.COLOR_RGB2BGR))
+        source = cv2.imread(image_path, cv2.IMREAD_COLOR)
+        source_rgb = cv2.cvtColor(source, cv2.COLOR_BGR2RGB)
+
+        results = []
+        for index, movement in enumerate(SEGMENT_MOVEMENTS):
+            affine_fps, plan = bench_affine(source, movement, args.frames, size)
+            legacy_fps = bench_legacy(source_rgb, plan, size)
+            generator_fps = bench_generator(source_rgb, plan, size)
+            zoompan_fps = bench_zoompan(image_path, movement, args.frames, size, args.fps) if FFMPEG_BINARY else None
+            zoompan_jitter = (measured_jitter(zoompan_frames(image_path, movement, args.frames, size, args.fps))
+                              if FFMPEG_BINARY else None)
+            results.append({
+                'movement': index,
+                'affine_fps': round(affine_fps, 1),
+                'zoompan_fps': round(zoompan_fps, 1) if zoompan_fps else None,
+                'speedup': round(affine_fps / zoompan_fps, 2) if zoompan_fps else None,
+                'legacy_engine_fps': round(legacy_fps, 1),
+                'frame_generator_fps': round(generator_fps, 1),
+                'affine_jitter_px': round(measured_jitter(affine_frames(source, plan, size)), 4),
+                'zoompan_jitter_px': round(zoompan_jitter, 4) if zoompan_jitter is not None else None,
+                'affine_modelled_jitter_px': round(motion_jitter(plan), 4),
+                'zoompan_modelled_jitter_px': round(motion_jitter(plan, integer_coordinates=True), 4),
+            })
+
+    print(json.dumps({'size': args.size, 'frames': args.frames, 'results': results}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
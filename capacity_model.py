@@ -0,0 +1,525 @@
+"""
+Capacity model for local tour rendering
+Measures how long this host takes to prepare a photo and how many frames per
+second it renders for each engine at each quality, scales that by current CPU
+load and checks memory headroom, then picks the best engine/quality whose
+predicted render time meets a job's deadline
+"""
+import os
+import json
+import time
+import logging
+import tempfile
+import threading
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from render_scheduler import cpu_headroom
+
+logger = logging.getLogger(__name__)
+
+# Pick engine and quality from measured capacity when the caller doesn't
+CAPACITY_PLANNING_ENABLED = os.environ.get('CAPACITY_PLANNING', 'true').lower() == 'true'
+# Seconds a local render may take before a cheaper plan is chosen
+RENDER_DEADLINE_SECONDS = float(os.environ.get('RENDER_DEADLINE_SECONDS', '300'))
+# Frames encoded per engine and quality by the startup benchmark
+CAPACITY_BENCH_FRAMES = int(os.environ.get('CAPACITY_BENCH_FRAMES', '30'))
+# Memory left untouched for the web process and everything else on the host
+CAPACITY_MEMORY_RESERVE_MB = float(os.environ.get('CAPACITY_MEMORY_RESERVE_MB', '256'))
+# Seconds a host's benchmark results stay valid for every worker process
+CAPACITY_BENCH_MAX_AGE = float(os.environ.get('CAPACITY_BENCH_MAX_AGE', str(7 * 24 * 3600)))
+# The benchmarking worker touches its lock file this often; a lock left
+# untouched for CAPACITY_BENCH_LOCK_STALE_SECONDS belonged to a dead worker
+CAPACITY_BENCH_HEARTBEAT_SECONDS = 10
+CAPACITY_BENCH_LOCK_STALE_SECONDS = 60
+# Bumped when what the benchmark measures changes, so saved results are redone
+BENCHMARK_VERSION = 3
+
+# Engine names as create_ken_burns_video takes them
+ENGINE_FRAMES = 'auto'  # OpenCV frame engine (professional -> optimized)
+ENGINE_XFADE = 'xfade'
+ENGINE_SEGMENTS = 'segments'
+
+# Candidate plans, best looking first
+CANDIDATES: List[Tuple[str, str]] = [
+    (ENGINE_FRAMES, 'premium'),
+    (ENGINE_XFADE, 'premium'),
+    (ENGINE_FRAMES, 'high'),
+    (ENGINE_XFADE, 'high'),
+    (ENGINE_SEGMENTS, 'high'),
+    (ENGINE_FRAMES, 'medium'),
+    (ENGINE_XFADE, 'medium'),
+    (ENGINE_FRAMES, 'deployment'),
+    (ENGINE_XFADE, 'deployment'),
+]
+
+# Before the benchmark finishes: output pixels per second an 'ultrafast'
+# encode sustains, and each preset's speed relative to it
+PRIOR_PIXEL_RATE = 40e6
+PRESET_SPEED = {
+    'ultrafast': 1.0, 'superfast': 0.85, 'veryfast': 0.7, 'faster': 0.55,
+    'fast': 0.45, 'medium': 0.35, 'slow': 0.2, 'slower': 0.1, 'veryslow': 0.05,
+}
+# ...and seconds to decode, resize and grade one listing photo
+PRIOR_PREP_SECONDS = 0.5
+
+# Resident bytes per output pixel: source copies and frame buffers plus
+# x264's lookahead, per engine (rough upper bounds); xfade also holds every
+# supersampled photo in the graph
+BYTES_PER_PIXEL = {ENGINE_FRAMES: 95, ENGINE_SEGMENTS: 75, ENGINE_XFADE: 70}
+XFADE_BYTES_PER_PIXEL_PER_IMAGE = 6
+BASE_MEMORY_MB = 120
+
+# Weight of the newest render in the actual/predicted correction
+CORRECTION_SMOOTHING = 0.3
+
+
+@dataclass
+class RenderPlan:
+    """How a job renders locally and how long that should take"""
+    engine: str
+    quality: str
+    width: int
+    height: int
+    fps: int
+    preset: str
+    frames: int
+    predicted_seconds: float
+    deadline_seconds: float
+    memory_mb: float
+    calibrated: bool
+    reason: str
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def _output_settings(engine: str, quality: str) -> Dict[str, Any]:
+    """Resolution, fps, preset and crf the engine uses at this quality"""
+    from video_encoder import VIDEO_ENCODER_PRESET, VIDEO_ENCODER_CRF
+
+    if engine == ENGINE_SEGMENTS:
+        from ffmpeg_ken_burns import SEGMENT_FPS, SEGMENT_WIDTH, SEGMENT_HEIGHT, SEGMENT_PRESET, SEGMENT_CRF
+        settings = {'fps': SEGMENT_FPS, 'resolution': (SEGMENT_WIDTH, SEGMENT_HEIGHT),
+                    'preset': SEGMENT_PRESET, 'crf': SEGMENT_CRF}
+    elif engine == ENGINE_XFADE:
+        from ffmpeg_xfade_tour import XFADE_QUALITY_PRESETS
+        return dict(XFADE_QUALITY_PRESETS[quality])
+    else:
+        from optimized_virtual_tour import OPTIMIZED_QUALITY_PRESETS
+        settings = dict(OPTIMIZED_QUALITY_PRESETS[quality])
+        # OptimizedVirtualTour tags the shared preset with its name
+        settings.pop('name', None)
+
+    # The frame-piping engines honour the encoder overrides
+    settings['preset'] = VIDEO_ENCODER_PRESET or settings['preset']
+    settings['crf'] = int(VIDEO_ENCODER_CRF) if VIDEO_ENCODER_CRF else settings['crf']
+    return settings
+
+
+def _tour_seconds(engine: str, quality: str, image_count: int) -> float:
+    if engine == ENGINE_SEGMENTS:
+        from ffmpeg_ken_burns import SEGMENT_SECONDS_PER_IMAGE
+        return image_count * SEGMENT_SECONDS_PER_IMAGE
+    if engine == ENGINE_XFADE:
+        from ffmpeg_xfade_tour import tour_timeline
+        _, durations, transition = tour_timeline(image_count)
+        return sum(durations) - max(image_count - 1, 0) * transition
+    from optimized_virtual_tour import tour_seconds
+    return tour_seconds(image_count, quality)
+
+
+def _memory_mb(engine: str, width: int, height: int, image_count: int) -> float:
+    pixels = width * height
+    per_pixel = BYTES_PER_PIXEL[engine]
+    if engine == ENGINE_XFADE:
+        per_pixel += XFADE_BYTES_PER_PIXEL_PER_IMAGE * image_count
+    return BASE_MEMORY_MB + pixels * per_pixel / 1024 / 1024
+
+
+def available_memory_mb() -> Optional[float]:
+    """Memory free for a render, or None when it can't be measured"""
+    try:
+        import psutil
+        return psutil.virtual_memory().available / 1024 / 1024 - CAPACITY_MEMORY_RESERVE_MB
+    except ImportError:
+        return None
+
+
+def _bench_frames(quality: str, frames: int, temp_dir: str, image_path: str) -> Tuple[float, float]:
+    """
+    Prep seconds per photo and frames/sec of one OptimizedVirtualTour scene
+
+    The same code a frame-engine render runs: PIL preparation and grading,
+    the eased warp (on the parallel workers when enabled) and the x264 pipe.
+    """
+    from optimized_virtual_tour import OptimizedVirtualTour, SimpleMovement
+
+    tour = OptimizedVirtualTour(os.path.join(temp_dir, f'bench_frames_{quality}.mp4'), quality=quality)
+    try:
+        start = time.perf_counter()
+        tour.prepared_image(image_path)
+        prep_seconds = time.perf_counter() - start
+
+        move = tour.get_simple_movement(0)
+        scene = SimpleMovement(move.zoom_start, move.zoom_end, move.pan_x, move.pan_y, frames / tour.fps)
+        start = time.perf_counter()
+        tour.process_image_streaming(image_path, scene)
+        tour.close_parallel_renderer()
+        tour.writer.close()
+        fps = tour.writer.frames_written / (time.perf_counter() - start)
+    except Exception:
+        tour.writer.abort()
+        raise
+    finally:
+        tour.close_parallel_renderer()
+        tour.image_cache.clear()
+    return prep_seconds, fps
+
+
+def _bench_segments(frames: int, temp_dir: str, image_path: str) -> Tuple[float, float]:
+    """Prep seconds per photo and frames/sec of one segment, as the segment path renders it"""
+    from PIL import Image
+    from image_prep import prepare_source
+    from ffmpeg_ken_burns import SEGMENT_FPS, SEGMENT_WIDTH, SEGMENT_HEIGHT, render_segment
+
+    start = time.perf_counter()
+    prepared, _ = prepare_source(image_path, (SEGMENT_WIDTH, SEGMENT_HEIGHT), 1.3)
+    prepared_path = os.path.join(temp_dir, 'bench_segment.jpg')
+    Image.fromarray(prepared).save(prepared_path, 'JPEG', quality=95)
+    prep_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    segment = render_segment(0, prepared_path, os.path.join(temp_dir, 'bench_segment.mp4'),
+                             frames / SEGMENT_FPS, SEGMENT_FPS, SEGMENT_WIDTH, SEGMENT_HEIGHT,
+                             fade_in=True)
+    if segment is None:
+        raise RuntimeError("Segment render failed")
+    return prep_seconds, frames / (time.perf_counter() - start)
+
+
+def _bench_xfade(settings: Dict[str, Any], frames: int, temp_dir: str, image_path: str) -> Tuple[float, float]:
+    """Prep seconds per photo and frames/sec of one supersampled zoompan chain encoded by x264"""
+    import subprocess
+    from ffmpeg_ken_burns import FFMPEG_BINARY
+    from ffmpeg_xfade_tour import DEFAULT_STYLE, build_filter_graph, prepare_inputs, tour_timeline
+
+    width, height = settings['resolution']
+    fps = settings['fps']
+    start = time.perf_counter()
+    prepared_path, = prepare_inputs([image_path], width, height, DEFAULT_STYLE, temp_dir)
+    prep_seconds = time.perf_counter() - start
+
+    movements, _, _ = tour_timeline(1)
+    graph, _ = build_filter_graph(movements, [frames / fps], 0.0, width, height, fps)
+    cmd = [
+        FFMPEG_BINARY, '-hide_banner', '-loglevel', 'error',
+        '-i', prepared_path,
+        '-filter_complex', graph, '-map', '[vout]',
+        '-frames:v', str(frames),
+        '-c:v', 'libx264', '-preset', settings['preset'], '-crf', str(settings['crf']),
+        '-pix_fmt', 'yuv420p',
+        '-f', 'null', '-'
+    ]
+    start = time.perf_counter()
+    subprocess.run(cmd, check=True, capture_output=True)
+    return prep_seconds, frames / (time.perf_counter() - start)
+
+
+class CapacityModel:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._benchmark_thread: Optional[threading.Thread] = None
+        # (engine, quality) -> measured frames/sec and prep seconds per photo,
+        # and the CPU headroom they were measured at
+        self.measured_fps: Dict[Tuple[str, str], float] = {}
+        self.measured_prep: Dict[Tuple[str, str], float] = {}
+        self.benchmark_headroom: Optional[float] = None
+        # engine -> smoothed actual/predicted render time
+        self.correction: Dict[str, float] = {}
+
+    # ------------------------------------------------------------------
+    # Measurement
+    # ------------------------------------------------------------------
+
+    def start_benchmark(self) -> None:
+        """Load this host's benchmark, or run it once for all workers, in the background"""
+        with self._lock:
+            if self._benchmark_thread is not None:
+                return
+            self._benchmark_thread = threading.Thread(target=self.load_or_run_benchmark, daemon=True)
+        self._benchmark_thread.start()
+
+    @staticmethod
+    def _benchmark_paths() -> Tuple[str, str]:
+        from disk_cache import CACHE_DIR
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        path = os.path.join(CACHE_DIR, 'capacity_benchmark.json')
+        return path, path + '.lock'
+
+    @staticmethod
+    def _benchmark_fingerprint() -> str:
+        """Changes when the host size, frame count, motion renderer or any candidate's output settings change"""
+        from disk_cache import cache_key
+        from ffmpeg_ken_burns import FFMPEG_MOTION
+        settings = [_output_settings(engine, quality) for engine, quality in CANDIDATES]
+        return cache_key('capacity_benchmark', BENCHMARK_VERSION, os.cpu_count(), CAPACITY_BENCH_FRAMES,
+                         CANDIDATES, settings, FFMPEG_MOTION)
+
+    def _load_saved_benchmark(self, path: str, fingerprint: str) -> bool:
+        try:
+            with open(path) as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if saved.get('fingerprint') != fingerprint or time.time() - saved.get('created', 0) > CAPACITY_BENCH_MAX_AGE:
+            return False
+
+        measured = {tuple(name.split('/', 1)): fps for name, fps in saved['measured_fps'].items()}
+        prep = {tuple(name.split('/', 1)): seconds for name, seconds in saved['prep_seconds'].items()}
+        with self._lock:
+            self.measured_fps.update(measured)
+            self.measured_prep.update(prep)
+            self.benchmark_headroom = saved.get('headroom')
+        logger.info(f"Loaded capacity benchmark from {path} ({len(measured)} candidates)")
+        return True
+
+    def load_or_run_benchmark(self) -> None:
+        """
+        Share one benchmark per host between worker processes
+
+        Results are saved under CACHE_DIR; the first worker to take the lock
+        file runs the benchmark, keeping the lock fresh, while the others
+        wait for its results.
+        """
+        path, lock_path = self._benchmark_paths()
+        fingerprint = self._benchmark_fingerprint()
+        while True:
+            if self._load_saved_benchmark(path, fingerprint):
+                return
+            try:
+                fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                try:
+                    stale = time.time() - os.stat(lock_path).st_mtime > CAPACITY_BENCH_LOCK_STALE_SECONDS
+                except OSError:
+                    continue
+                if stale:
+                    logger.warning("Removing stale capacity benchmark lock")
+                    try:
+                        os.remove(lock_path)
+                    except OSError:
+                        pass
+                else:
+                    time.sleep(5)
+                continue
+            break
+
+        os.close(fd)
+        done = threading.Event()
+
+        def heartbeat():
+            while not done.wait(CAPACITY_BENCH_HEARTBEAT_SECONDS):
+                try:
+                    os.utime(lock_path)
+                except OSError:
+                    pass
+
+        threading.Thread(target=heartbeat, daemon=True).start()
+        try:
+            results = self.run_benchmark()
+            if results:
+                with self._lock:
+                    headroom = self.benchmark_headroom
+                    prep = dict(self.measured_prep)
+                payload = {
+                    'fingerprint': fingerprint,
+                    'created': time.time(),
+                    'headroom': headroom,
+                    'measured_fps': {f'{e}/{q}': fps for (e, q), fps in results.items()},
+                    'prep_seconds': {f'{e}/{q}': seconds for (e, q), seconds in prep.items()},
+                }
+                temp_path = f'{path}.{os.getpid()}.tmp'
+                with open(temp_path, 'w') as f:
+                    json.dump(payload, f)
+                os.replace(temp_path, path)
+        finally:
+            done.set()
+            try:
+                os.remove(lock_path)
+            except OSError:
+                pass
+
+    def run_benchmark(self, frames: Optional[int] = None) -> Dict[Tuple[str, str], float]:
+        """
+        Time each candidate's real render path on a synthetic photo
+
+        Records prep seconds per photo and frames/sec; how the segment
+        path's concurrent encoders share the CPU is left to record_render.
+        """
+        from PIL import Image
+        from synthetic_listing import synthetic_photo
+        from ffmpeg_ken_burns import FFMPEG_BINARY
+
+        frames = frames or CAPACITY_BENCH_FRAMES
+        if not FFMPEG_BINARY:
+            logger.warning("Capacity benchmark skipped: FFmpeg not available")
+            return {}
+
+        headroom = cpu_headroom()
+        results: Dict[Tuple[str, str], float] = {}
+        prep: Dict[Tuple[str, str], float] = {}
+        start = time.time()
+        with tempfile.TemporaryDirectory() as temp_dir:
+            # A 12 MP phone photo, the most common upload
+            image_path = os.path.join(temp_dir, 'bench.jpg')
+            Image.fromarray(synthetic_photo((4032, 3024), seed=1234)).save(image_path, 'JPEG', quality=90)
+
+            for engine, quality in CANDIDATES:
+                try:
+                    if engine == ENGINE_XFADE:
+                        settings = _output_settings(engine, quality)
+                        prep_seconds, fps = _bench_xfade(settings, frames, temp_dir, image_path)
+                    elif engine == ENGINE_SEGMENTS:
+                        prep_seconds, fps = _bench_segments(frames, temp_dir, image_path)
+                    else:
+                        prep_seconds, fps = _bench_frames(quality, frames, temp_dir, image_path)
+                except Exception as e:
+                    logger.warning(f"Capacity benchmark failed for {engine}/{quality}: {e}")
+                    continue
+                results[(engine, quality)] = fps
+                prep[(engine, quality)] = prep_seconds
+
+        with self._lock:
+            self.measured_fps.update(results)
+            self.measured_prep.update(prep)
+            self.benchmark_headroom = headroom
+        logger.info(
+            f"Capacity benchmark finished in {time.time() - start:.1f}s: "
+            + ', '.join(f"{e}/{q} {fps:.0f} fps + {prep[(e, q)]:.2f}s/photo" for (e, q), fps in results.items())
+        )
+        return results
+
+    def record_render(self, plan: RenderPlan, seconds: float) -> None:
+        """Feed back how long a planned render really took"""
+        if plan.predicted_seconds <= 0:
+            return
+        ratio = seconds / plan.predicted_seconds
+        with self._lock:
+            previous = self.correction.get(plan.engine)
+            self.correction[plan.engine] = ratio if previous is None else (
+                CORRECTION_SMOOTHING * ratio + (1 - CORRECTION_SMOOTHING) * previous
+            )
+        logger.info(
+            f"{plan.engine}/{plan.quality} render took {seconds:.0f}s "
+            f"(predicted {plan.predicted_seconds:.0f}s)"
+        )
+
+    # ------------------------------------------------------------------
+    # Prediction
+    # ------------------------------------------------------------------
+
+    def frames_per_second(self, engine: str, quality: str, settings: Dict[str, Any],
+                          headroom: float) -> Tuple[float, float, bool]:
+        """
+        Expected render speed now, prep seconds per photo, and whether both
+        come from a measurement
+        """
+        with self._lock:
+            measured = self.measured_fps.get((engine, quality))
+            prep = self.measured_prep.get((engine, quality), PRIOR_PREP_SECONDS)
+            bench_headroom = self.benchmark_headroom
+
+        if measured is not None:
+            # Scale by how much of the CPU is free now versus during the benchmark
+            scale = max(headroom, 0.1) / max(bench_headroom or 1.0, 0.1)
+            return measured * scale, prep / scale, True
+
+        width, height = settings['resolution']
+        speed = PRESET_SPEED.get(settings['preset'], PRESET_SPEED['medium'])
+        scale = max(headroom, 0.1)
+        return PRIOR_PIXEL_RATE * speed * scale / (width * height), PRIOR_PREP_SECONDS / scale, False
+
+    def plan(self, image_count: int, deadline: Optional[float] = None,
+             engines: Optional[Iterable[str]] = None) -> RenderPlan:
+        """
+        Best-looking plan predicted to finish within the deadline
+
+        Falls back to the fastest plan that fits in memory (or the fastest
+        overall) when nothing meets the deadline.
+        """
+        deadline = float(deadline or RENDER_DEADLINE_SECONDS)
+        engines = set(engines) if engines else None
+        headroom = cpu_headroom()
+        memory = available_memory_mb()
+
+        options = []
+        for engine, quality in CANDIDATES:
+            if engines is not None and engine not in engines:
+                continue
+            settings = _output_settings(engine, quality)
+            width, height = settings['resolution']
+            frames = int(_tour_seconds(engine, quality, image_count) * settings['fps'])
+            fps, prep, calibrated = self.frames_per_second(engine, quality, settings, headroom)
+            predicted = (frames / fps + image_count * prep) * self.correction.get(engine, 1.0)
+            options.append(RenderPlan(
+                engine=engine, quality=quality,
+                width=width, height=height, fps=settings['fps'], preset=settings['preset'],
+                frames=frames,
+                predicted_seconds=round(predicted, 1),
+                deadline_seconds=deadline,
+                memory_mb=round(_memory_mb(engine, width, height, image_count)),
+                calibrated=calibrated,
+                reason=''
+            ))
+
+        if not options:
+            raise ValueError(f"No render candidates for engines {sorted(engines or [])}")
+
+        fits = [o for o in options if memory is None or o.memory_mb <= memory]
+        for option in fits:
+            if option.predicted_seconds <= deadline:
+                option.reason = f'meets {deadline:.0f}s deadline at {headroom:.0%} CPU headroom'
+                break
+        else:
+            option = min(fits or options, key=lambda o: o.predicted_seconds)
+            option.reason = (
+                f'fastest plan; no plan meets the {deadline:.0f}s deadline'
+                if fits else 'fastest plan; memory headroom below every estimate'
+            )
+
+        logger.info(
+            f"Render plan for {image_count} images: {option.engine}/{option.quality} "
+            f"{option.width}x{option.height}@{option.fps} {option.preset}, "
+            f"~{option.predicted_seconds:.0f}s ({option.reason})"
+        )
+        return option
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Model state for health checks"""
+        with self._lock:
+            return {
+                'planning_enabled': CAPACITY_PLANNING_ENABLED,
+                'deadline_seconds': RENDER_DEADLINE_SECONDS,
+                'calibrated': bool(self.measured_fps),
+                'measured_fps': {f'{e}/{q}': round(fps, 1) for (e, q), fps in self.measured_fps.items()},
+                'prep_seconds': {f'{e}/{q}': round(p, 2) for (e, q), p in self.measured_prep.items()},
+                'benchmark_headroom': self.benchmark_headroom,
+                'correction': {e: round(c, 2) for e, c in self.correction.items()},
+            }
+
+
+_model = None
+_model_lock = threading.Lock()
+
+
+def get_capacity_model() -> CapacityModel:
+    """Get or create the process-wide capacity model"""
+    global _model
+    with _model_lock:
+        if _model is None:
+            _model = CapacityModel()
+        return _model
+
+
+__all__ = ['RenderPlan', 'CapacityModel', 'get_capacity_model', 'CAPACITY_PLANNING_ENABLED']
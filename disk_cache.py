@@ -0,0 +1,208 @@
+"""
+Size-bounded on-disk cache shared by the render and AI pipelines
+Entries are files named by a content key under CACHE_DIR/<namespace>. Writes
+are atomic (temp file + os.replace), reads refresh the entry's mtime, and
+the least recently used entries are evicted once the namespace is over its
+size budget or older than its TTL.
+"""
+import os
+import json
+import time
+import hashlib
+import logging
+import tempfile
+import threading
+from typing import Any, Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = os.environ.get('CACHE_DIR') or os.path.join(tempfile.gettempdir(), 'listinghelper-cache')
+
+_HASH_CHUNK = 1024 * 1024
+
+
+def cache_key(*parts: Any) -> str:
+    """Stable key for any JSON-serializable parts"""
+    payload = json.dumps(parts, sort_keys=True, default=str, separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def file_digest(path: str) -> str:
+    """sha256 of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class DiskCache:
+    def __init__(self, namespace: str, max_bytes: int, ttl: Optional[float] = None,
+                 suffix: str = '', root: Optional[str] = None):
+        self.namespace = namespace
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.suffix = suffix
+        self.directory = os.path.join(root or CACHE_DIR, namespace)
+        os.makedirs(self.directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def path_for(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}{self.suffix}")
+
+    def _expired(self, mtime: float, now: float) -> bool:
+        return self.ttl is not None and now - mtime > self.ttl
+
+    def get_path(self, key: str) -> Optional[str]:
+        """Path of a live entry (marking it recently used), or None"""
+        path = self.path_for(key)
+        try:
+            mtime = os.stat(path).st_mtime
+            now = time.time()
+            if self._expired(mtime, now):
+                os.remove(path)
+                raise FileNotFoundError(path)
+            os.utime(path, (now, now))
+        except OSError:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+        return path
+
+    def get_bytes(self, key: str) -> Optional[bytes]:
+        path = self.get_path(key)
+        if path is None:
+            return None
+        try:
+            with open(path, 'rb') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def put_bytes(self, key: str, data: bytes) -> str:
+        """Store bytes atomically and return the entry path"""
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            return self._commit(key, temp_path)
+        except BaseException:
+            self._discard(temp_path)
+            raise
+
+    def put_file(self, key: str, source_path: str) -> str:
+        """Copy a file into the cache atomically and return the entry path"""
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as dst, open(source_path, 'rb') as src:
+                for chunk in iter(lambda: src.read(_HASH_CHUNK), b''):
+                    dst.write(chunk)
+            return self._commit(key, temp_path)
+        except BaseException:
+            self._discard(temp_path)
+            raise
+
+    def put_stream(self, key: str, chunks: Iterable[bytes]) -> str:
+        """Write byte chunks (e.g. a streamed download) atomically and return the entry path"""
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in chunks:
+                    if chunk:
+                        f.write(chunk)
+            return self._commit(key, temp_path)
+        except BaseException:
+            self._discard(temp_path)
+            raise
+
+    def _commit(self, key: str, temp_path: str) -> str:
+        path = self.path_for(key)
+        os.replace(temp_path, path)
+        self.evict()
+        return path
+
+    @staticmethod
+    def _discard(path: str) -> None:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def evict(self) -> None:
+        """Drop expired entries, then the least recently used until under budget"""
+        now = time.time()
+        entries = []
+        total = 0
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return
+
+        for name in names:
+            if name.endswith('.tmp'):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            if self._expired(stat.st_mtime, now):
+                self._discard(path)
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+
+        if total <= self.max_bytes:
+            return
+
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            self._discard(path)
+            total -= size
+            logger.debug(f"Evicted {os.path.basename(path)} from {self.namespace} cache")
+
+    def stats(self) -> Dict[str, Any]:
+        entries = 0
+        size = 0
+        try:
+            for entry in os.scandir(self.directory):
+                if entry.is_file() and not entry.name.endswith('.tmp'):
+                    entries += 1
+                    size += entry.stat().st_size
+        except OSError:
+            pass
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'namespace': self.namespace,
+                'entries': entries,
+                'bytes': size,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else None,
+            }
+
+
+_caches: Dict[str, DiskCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_cache(namespace: str, max_bytes: int, ttl: Optional[float] = None, suffix: str = '') -> DiskCache:
+    """The process-wide DiskCache for a namespace, created on first use"""
+    with _caches_lock:
+        cache = _caches.get(namespace)
+        if cache is None:
+            cache = _caches[namespace] = DiskCache(namespace, max_bytes, ttl=ttl, suffix=suffix)
+        return cache
+
+
+__all__ = ['DiskCache', 'get_cache', 'cache_key', 'file_digest', 'CACHE_DIR']
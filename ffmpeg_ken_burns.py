@@ -8,6 +8,8 @@ import subprocess
 import logging
 import tempfile
 import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
 from PIL import Image
 
 logger = logging.getLogger(__name__)
@@ -61,7 +63,320 @@ def get_ffmpeg_binary():
 
 FFMPEG_BINARY = get_ffmpeg_binary()
 
-def create_ken_burns_video(image_paths, output_path, job_id, quality=None):
+# Segments rendered at once on the FFmpeg path (0 = one per CPU core)
+FFMPEG_SEGMENT_WORKERS = int(os.environ.get('FFMPEG_SEGMENT_WORKERS', '0'))
+
+# Engine tried first: 'auto' (frame-based engines), 'xfade' (single filter graph)
+# or 'segments' (cached per-image FFmpeg segments)
+KEN_BURNS_ENGINE = os.environ.get('KEN_BURNS_ENGINE', 'auto').lower()
+
+# Seconds of fade baked into the first and last segments
+FADE_DURATION = 0.5
+
+# Segment motion: 'affine' (planned subpixel crops rendered with OpenCV) or 'zoompan'
+FFMPEG_MOTION = os.environ.get('FFMPEG_MOTION', 'affine').lower()
+
+SEGMENT_PRESET = 'fast'
+SEGMENT_CRF = 20
+
+# Output of the segment path
+SEGMENT_FPS = 25
+SEGMENT_SECONDS_PER_IMAGE = 8
+SEGMENT_WIDTH = 1920
+SEGMENT_HEIGHT = 1080
+
+# Ken Burns moves cycled across segments, in tour_config.MOVEMENT_PATTERNS format
+SEGMENT_MOVEMENTS = [
+    # Zoom in from center
+    {'start_pos': (0.5, 0.5), 'end_pos': (0.5, 0.5), 'start_zoom': 1.0, 'end_zoom': 1.3, 'easing': 'linear'},
+    # Zoom out to center
+    {'start_pos': (0.5, 0.5), 'end_pos': (0.5, 0.5), 'start_zoom': 1.5, 'end_zoom': 1.2, 'easing': 'linear'},
+    # Pan left to right with slight zoom
+    {'start_pos': (0.4, 0.5), 'end_pos': (0.6, 0.5), 'start_zoom': 1.3, 'end_zoom': 1.3, 'easing': 'linear'},
+    # Pan right to left with zoom in
+    {'start_pos': (0.6, 0.5), 'end_pos': (0.4, 0.5), 'start_zoom': 1.0, 'end_zoom': 1.3, 'easing': 'linear'},
+]
+
+def _gop_args(fps, threads=0):
+    """Fixed GOP with no scene-cut keyframes, identical for every segment"""
+    return [
+        '-r', str(fps),
+        '-g', str(fps * 2),
+        '-keyint_min', str(fps * 2),
+        '-sc_threshold', '0',
+        '-video_track_timescale', '90000',
+        '-threads', str(threads)
+    ]
+
+def segment_encode_args(fps, threads=0):
+    """
+    Encoder settings shared by every segment
+    
+    Identical settings and a fixed GOP mean the segments can be joined with
+    the concat demuxer and '-c copy'.
+    """
+    return [
+        '-c:v', 'libx264',
+        '-preset', SEGMENT_PRESET,
+        '-crf', str(SEGMENT_CRF),
+        '-pix_fmt', 'yuv420p',
+        *_gop_args(fps, threads),
+        '-an'
+    ]
+
+def _fade_gain(i, frames, fade_frames, fade_in, fade_out):
+    """Brightness multiplier for frame i of a segment"""
+    gain = 1.0
+    if fade_in and i < fade_frames:
+        gain = i / fade_frames
+    if fade_out and frames - 1 - i < fade_frames:
+        gain = min(gain, (frames - 1 - i) / fade_frames)
+    return gain
+
+def _render_segment_affine(movement, img_path, segment_path, frames, fps, width, height,
+                           fade_in, fade_out, threads):
+    """Render planned subpixel crops with cv2.warpAffine and pipe them to x264"""
+    import cv2
+    import numpy as np
+    from frame_effects import apply_frame_effects
+    from motion_planner import plan_motion
+    from video_encoder import FFmpegFrameSink
+    
+    source = cv2.imread(img_path, cv2.IMREAD_COLOR)
+    if source is None:
+        raise ValueError(f"Could not read {img_path}")
+    
+    plan = plan_motion(movement, frames, (source.shape[1], source.shape[0]), (width, height))
+    fade_frames = int(FADE_DURATION * fps)
+    frame = np.empty((height, width, 3), dtype=np.uint8)
+    
+    with FFmpegFrameSink(segment_path, width, height, fps,
+                         preset=SEGMENT_PRESET, crf=SEGMENT_CRF,
+                         extra_args=_gop_args(fps, threads)) as sink:
+        for i, matrix in enumerate(plan.affine_matrices()):
+            cv2.warpAffine(source, matrix, (width, height), dst=frame,
+                           flags=cv2.INTER_LINEAR, borderMode=cv2.BORDER_REPLICATE)
+            gain = _fade_gain(i, frames, fade_frames, fade_in, fade_out)
+            if gain < 1.0:
+                apply_frame_effects(frame, gain=gain)
+            if not sink.write(frame):
+                break
+
+def _render_segment_zoompan(movement, img_path, segment_path, frames, fps, width, height,
+                            fade_in, fade_out, threads):
+    """Render the segment with ffmpeg's zoompan filter"""
+    from ffmpeg_xfade_tour import zoompan_filter
+    
+    duration = frames / fps
+    filters = [zoompan_filter(movement, frames, width, height, fps)]
+    if fade_in:
+        filters.append(f"fade=t=in:st=0:d={FADE_DURATION}")
+    if fade_out:
+        filters.append(f"fade=t=out:st={duration - FADE_DURATION}:d={FADE_DURATION}")
+    
+    cmd = [
+        FFMPEG_BINARY,
+        '-i', img_path,
+        '-vf', ','.join(filters),
+        '-frames:v', str(frames),
+        *segment_encode_args(fps, threads),
+        '-y',
+        segment_path
+    ]
+    logger.debug(f"FFmpeg command: {' '.join(cmd)}")
+    
+    result = subprocess.run(cmd, capture_output=True, text=True, shell=(os.name == 'nt'))
+    if result.returncode != 0:
+        raise Exception(result.stderr)
+
+def segment_movement(index):
+    """Movement for the segment at index; neighbouring photos always alternate"""
+    return SEGMENT_MOVEMENTS[index % len(SEGMENT_MOVEMENTS)]
+
+def render_segment(index, img_path, segment_path, duration, fps, width, height,
+                   fade_in=False, fade_out=False, threads=0, movement=None):
+    """Render one image's Ken Burns segment; returns the path or None on failure"""
+    frames = int(duration * fps)
+    if movement is None:
+        movement = segment_movement(index)
+    renderer = _render_segment_zoompan if FFMPEG_MOTION == 'zoompan' else _render_segment_affine
+    
+    logger.info(f"Creating segment {index} with Ken Burns effect ({FFMPEG_MOTION})...")
+    
+    try:
+        renderer(movement, img_path, segment_path, frames, fps, width, height,
+                 fade_in, fade_out, threads)
+        
+        # Verify segment was created and has size
+        if os.path.exists(segment_path) and os.path.getsize(segment_path) > 0:
+            logger.info(f"Segment {index} created successfully: {os.path.getsize(segment_path) / 1024:.2f} KB")
+            return segment_path
+        
+        logger.error(f"Segment {index} was not created or is empty")
+    except Exception as e:
+        logger.error(f"Error creating segment {index}: {e}")
+    return None
+
+# Encoded segments reused across renders of the same photos
+SEGMENT_CACHE_ENABLED = os.environ.get('SEGMENT_CACHE', 'true').lower() == 'true'
+SEGMENT_CACHE_MAX_MB = int(os.environ.get('SEGMENT_CACHE_MAX_MB', '2048'))
+SEGMENT_CACHE_TTL = float(os.environ.get('SEGMENT_CACHE_TTL', str(7 * 24 * 3600)))
+
+def get_segment_cache():
+    """The segment DiskCache, or None when disabled"""
+    if not SEGMENT_CACHE_ENABLED:
+        return None
+    from disk_cache import get_cache
+    return get_cache('segments', SEGMENT_CACHE_MAX_MB * 1024 * 1024, ttl=SEGMENT_CACHE_TTL, suffix='.mp4')
+
+def segment_cache_key(image_digest, movement, duration, fps, width, height, fade_in, fade_out):
+    """Everything that changes a segment's encoded bytes"""
+    from disk_cache import cache_key
+    from video_encoder import VIDEO_ENCODER_PRESET, VIDEO_ENCODER_CRF
+    
+    return cache_key(
+        'segment', image_digest, movement, FFMPEG_MOTION,
+        duration, fps, width, height,
+        fade_in, fade_out, FADE_DURATION,
+        SEGMENT_PRESET, SEGMENT_CRF, _gop_args(fps),
+        VIDEO_ENCODER_PRESET, VIDEO_ENCODER_CRF
+    )
+
+def _cached_segment(index, img_path, segment_path, duration, fps, width, height,
+                    fade_in, fade_out, threads):
+    """Reuse the cached segment for this scene, or render and cache it"""
+    # Same rule with or without the cache, so SEGMENT_CACHE never changes the video
+    movement = segment_movement(index)
+    cache = get_segment_cache()
+    if cache is None:
+        return render_segment(index, img_path, segment_path, duration, fps, width, height,
+                              fade_in, fade_out, threads, movement), False
+    
+    from disk_cache import file_digest
+    digest = file_digest(img_path)
+    key = segment_cache_key(digest, movement, duration, fps, width, height, fade_in, fade_out)
+    cached = cache.get_path(key)
+    if cached:
+        try:
+            try:
+                os.link(cached, segment_path)
+            except OSError:
+                shutil.copy(cached, segment_path)
+            logger.info(f"Segment {index} reused from cache")
+            return segment_path, True
+        except OSError as e:
+            logger.warning(f"Could not reuse cached segment {index}: {e}")
+    
+    result = render_segment(index, img_path, segment_path, duration, fps, width, height,
+                            fade_in, fade_out, threads, movement)
+    if result:
+        try:
+            cache.put_file(key, result)
+        except OSError as e:
+            logger.warning(f"Could not cache segment {index}: {e}")
+    return result, False
+
+def render_segments(image_paths, temp_dir, duration, fps, width, height):
+    """
+    Render all segments on a bounded pool of ffmpeg processes
+    
+    Returns the segments that rendered, in image order. The fade in is baked
+    into the first segment and the fade out into the last. Segments whose
+    photo, motion and encoder settings are unchanged come from the segment
+    cache, so editing one photo only re-renders that scene.
+    """
+    cores = os.cpu_count() or 1
+    workers = max(1, min(FFMPEG_SEGMENT_WORKERS or cores, len(image_paths)))
+    # Split the cores between the concurrent encoders
+    threads = max(1, cores // workers)
+    last = len(image_paths) - 1
+    
+    logger.info(f"Rendering {len(image_paths)} segments with {workers} workers ({threads} threads each)")
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(
+                _cached_segment, i, img_path,
+                os.path.join(temp_dir, f'segment_{i:04d}.mp4'),
+                duration, fps, width, height,
+                i == 0, i == last, threads
+            )
+            for i, img_path in enumerate(image_paths)
+        ]
+        results = [future.result() for future in futures]
+    
+    reused = sum(1 for segment, hit in results if segment and hit)
+    logger.info(f"Segments ready: {reused} from cache, {len(results) - reused} rendered")
+    return [segment for segment, _ in results if segment]
+
+# Proxy preview: enough to check photo order and framing within seconds
+PREVIEW_WIDTH = 854
+PREVIEW_HEIGHT = 480
+PREVIEW_FPS = int(os.environ.get('PREVIEW_FPS', '12'))
+PREVIEW_SECONDS_PER_IMAGE = float(os.environ.get('PREVIEW_SECONDS_PER_IMAGE', '3'))
+PREVIEW_PRESET = 'ultrafast'
+PREVIEW_CRF = 30
+# One gentle push-in per photo, hard cuts between photos
+PREVIEW_MOVEMENT = {'start_pos': (0.5, 0.5), 'end_pos': (0.5, 0.5), 'start_zoom': 1.0, 'end_zoom': 1.1, 'easing': 'linear'}
+
+def _preview_read_flag(img_path, width, height):
+    """Largest JPEG decode reduction that still covers the preview frame"""
+    import cv2
+    
+    with Image.open(img_path) as img:
+        src_w, src_h = img.size
+    for factor, flag in ((8, cv2.IMREAD_REDUCED_COLOR_8),
+                         (4, cv2.IMREAD_REDUCED_COLOR_4),
+                         (2, cv2.IMREAD_REDUCED_COLOR_2)):
+        if src_w // factor >= width and src_h // factor >= height:
+            return flag
+    return cv2.IMREAD_COLOR
+
+def create_preview_video(image_paths, output_path, job_id):
+    """
+    Render a low-resolution proxy of the tour in a single encode
+    
+    Photos are decoded at reduced size, given one linear push-in each and
+    piped to an ultrafast x264 encode at 480p, with no fades, transitions
+    or segment cache.
+    """
+    import cv2
+    import numpy as np
+    from motion_planner import plan_motion
+    from video_encoder import FFmpegFrameSink
+    
+    width, height, fps = PREVIEW_WIDTH, PREVIEW_HEIGHT, PREVIEW_FPS
+    frames = max(1, int(PREVIEW_SECONDS_PER_IMAGE * fps))
+    frame = np.empty((height, width, 3), dtype=np.uint8)
+    start = time.time()
+    
+    rendered = 0
+    with FFmpegFrameSink(output_path, width, height, fps,
+                         preset=PREVIEW_PRESET, crf=PREVIEW_CRF) as sink:
+        for i, img_path in enumerate(image_paths):
+            try:
+                source = cv2.imread(img_path, _preview_read_flag(img_path, width, height))
+            except Exception as e:
+                logger.warning(f"Preview skipping image {i}: {e}")
+                continue
+            if source is None:
+                logger.warning(f"Preview skipping unreadable image {i}: {img_path}")
+                continue
+            
+            plan = plan_motion(PREVIEW_MOVEMENT, frames, (source.shape[1], source.shape[0]), (width, height))
+            for matrix in plan.affine_matrices():
+                cv2.warpAffine(source, matrix, (width, height), dst=frame,
+                               flags=cv2.INTER_LINEAR, borderMode=cv2.BORDER_REPLICATE)
+                if not sink.write(frame):
+                    raise Exception("Preview encoder stopped accepting frames")
+            rendered += 1
+        
+        if not rendered:
+            raise Exception("No images could be processed for the preview")
+    
+    logger.info(f"Preview for job {job_id}: {rendered} images in {time.time() - start:.1f}s")
+    return output_path
+
+def create_ken_burns_video(image_paths, output_path, job_id, quality=None, engine=None):
     """
     Create a Ken Burns effect video using FFmpeg
     Returns the path to the generated MP4 file
@@ -70,56 +385,81 @@ def create_ken_burns_video(image_paths, output_path, job_id, quality=None):
         image_paths: List of image file paths
         output_path: Output video file path
         job_id: Job ID for tracking
-        quality: Quality preset ('deployment', 'medium', 'high', 'premium') or None for auto-detection
+        quality: Quality preset ('deployment', 'medium', 'high', 'premium') or None for auto-detection;
+                 'preview' renders a fast 480p proxy instead
+        engine: 'xfade' to try the single-graph renderer first, 'segments' for the
+                cached FFmpeg segment path; defaults to KEN_BURNS_ENGINE
+    
+    With neither quality nor engine given, both come from the capacity model's plan.
     """
     
-    # Try professional virtual tour first
-    try:
-        logger.info("Creating professional virtual tour...")
-        
-        # Set environment variable for Railway
-        if os.environ.get('RAILWAY_STATIC_URL') or os.environ.get('RAILWAY_GIT_COMMIT_SHA'):
-            logger.info("Detected Railway environment, using optimized tour")
-            os.environ['RAILWAY_ENVIRONMENT'] = '1'
-        
-        # Try to log memory usage if psutil is available
+    if quality == 'preview':
+        return create_preview_video(image_paths, output_path, job_id)
+    
+    # Let the capacity model pick both when the caller and config leave them open
+    if quality is None and engine is None and KEN_BURNS_ENGINE == 'auto':
+        from capacity_model import CAPACITY_PLANNING_ENABLED, get_capacity_model
+        if CAPACITY_PLANNING_ENABLED:
+            plan = get_capacity_model().plan(len(image_paths))
+            quality, engine = plan.quality, plan.engine
+    
+    engine = engine or KEN_BURNS_ENGINE
+    if engine == 'xfade':
         try:
-            import psutil
-            process = psutil.Process(os.getpid())
-            memory_info = process.memory_info()
-            logger.info(f"Current memory usage: {memory_info.rss / 1024 / 1024:.2f} MB")
-        except ImportError:
-            logger.info("psutil not available, continuing without memory monitoring")
-        
-        from professional_virtual_tour import create_professional_tour
-        return create_professional_tour(image_paths, output_path, job_id, quality=quality)
-    except Exception as e:
-        logger.warning(f"Professional tour failed, trying imageio: {e}")
-        
-        # Try premium imageio as second option
+            from ffmpeg_xfade_tour import create_xfade_tour
+            return create_xfade_tour(image_paths, output_path, job_id, quality=quality)
+        except Exception as e:
+            logger.warning(f"Xfade tour failed, falling back to frame-based engines: {e}")
+    
+    # 'segments' goes straight to the cached FFmpeg segment path below
+    if engine != 'segments':
+        # Try professional virtual tour first
         try:
-            from imageio_video_generator import create_imageio_video
+            logger.info("Creating professional virtual tour...")
             
-            # Use quality settings if specified
-            if quality == 'premium':
-                logger.info("Using premium imageio settings")
-                return create_imageio_video(image_paths, output_path, fps=60, duration_per_image=8.0)
-            elif quality in ['deployment', 'medium']:
-                logger.info(f"Using {quality} imageio settings")
-                return create_imageio_video(image_paths, output_path, fps=24, duration_per_image=8.0)
-            elif not os.environ.get('RAILWAY_ENVIRONMENT'):
-                logger.info("Using premium imageio settings for best quality")
-                return create_imageio_video(image_paths, output_path, fps=60, duration_per_image=8.0)
-            else:
-                return create_imageio_video(image_paths, output_path, fps=24, duration_per_image=8.0)
-        except Exception as imageio_error:
-            logger.warning(f"Imageio failed, trying FFmpeg: {imageio_error}")
+            # Set environment variable for Railway
+            if os.environ.get('RAILWAY_STATIC_URL') or os.environ.get('RAILWAY_GIT_COMMIT_SHA'):
+                logger.info("Detected Railway environment, using optimized tour")
+                os.environ['RAILWAY_ENVIRONMENT'] = '1'
+            
+            # Try to log memory usage if psutil is available
+            try:
+                import psutil
+                process = psutil.Process(os.getpid())
+                memory_info = process.memory_info()
+                logger.info(f"Current memory usage: {memory_info.rss / 1024 / 1024:.2f} MB")
+            except ImportError:
+                logger.info("psutil not available, continuing without memory monitoring")
+            
+            from professional_virtual_tour import create_professional_tour
+            return create_professional_tour(image_paths, output_path, job_id, quality=quality)
+        except Exception as e:
+            logger.warning(f"Professional tour failed, trying imageio: {e}")
+            
+            # Try premium imageio as second option
+            try:
+                from imageio_video_generator import create_imageio_video
+                
+                # Use quality settings if specified
+                if quality == 'premium':
+                    logger.info("Using premium imageio settings")
+                    return create_imageio_video(image_paths, output_path, fps=60, duration_per_image=8.0)
+                elif quality in ['deployment', 'medium']:
+                    logger.info(f"Using {quality} imageio settings")
+                    return create_imageio_video(image_paths, output_path, fps=24, duration_per_image=8.0)
+                elif not os.environ.get('RAILWAY_ENVIRONMENT'):
+                    logger.info("Using premium imageio settings for best quality")
+                    return create_imageio_video(image_paths, output_path, fps=60, duration_per_image=8.0)
+                else:
+                    return create_imageio_video(image_paths, output_path, fps=24, duration_per_image=8.0)
+            except Exception as imageio_error:
+                logger.warning(f"Imageio failed, trying FFmpeg: {imageio_error}")
     
     # Video parameters
-    fps = 25
-    duration_per_image = 8  # seconds
-    video_width = 1920
-    video_height = 1080
+    fps = SEGMENT_FPS
+    duration_per_image = SEGMENT_SECONDS_PER_IMAGE
+    video_width = SEGMENT_WIDTH
+    video_height = SEGMENT_HEIGHT
     
     # Create a temporary directory for processed images
     temp_dir = tempfile.mkdtemp()
@@ -137,40 +477,17 @@ def create_ken_burns_video(image_paths, output_path, job_id, quality=None):
         processed_images = []
         for i, img_path in enumerate(image_paths):
             try:
-                # Open and process image
-                with Image.open(img_path) as img:
-                    # Convert to RGB if needed
-                    if img.mode in ('RGBA', 'P'):
-                        img = img.convert('RGB')
-                    
-                    # Calculate aspect ratios
-                    img_aspect = img.width / img.height
-                    video_aspect = video_width / video_height
-                    
-                    # Resize image to cover the video frame completely
-                    if img_aspect > video_aspect:
-                        # Image is wider - fit to height
-                        new_height = video_height
-                        new_width = int(video_height * img_aspect)
-                    else:
-                        # Image is taller - fit to width
-                        new_width = video_width
-                        new_height = int(video_width / img_aspect)
-                    
-                    # Add padding to ensure we have room for Ken Burns movement
-                    padding = 1.3  # 30% extra for zoom/pan
-                    new_width = int(new_width * padding)
-                    new_height = int(new_height * padding)
-                    
-                    # Resize with high quality
-                    resized = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
-                    
-                    # Save processed image
-                    processed_path = os.path.join(temp_dir, f'img_{i:04d}.jpg')
-                    resized.save(processed_path, 'JPEG', quality=95)
-                    processed_images.append(processed_path)
-                    
-                    logger.info(f"Processed image {i}: {new_width}x{new_height}")
+                # Cover the frame with 30% extra for zoom/pan, using the shared preparation
+                from image_prep import prepare_source
+                resized, timings = prepare_source(img_path, (video_width, video_height), 1.3)
+                new_height, new_width = resized.shape[:2]
+                
+                # Save processed image
+                processed_path = os.path.join(temp_dir, f'img_{i:04d}.jpg')
+                Image.fromarray(resized).save(processed_path, 'JPEG', quality=95)
+                processed_images.append(processed_path)
+                
+                logger.info(f"Processed image {i}: {new_width}x{new_height} in {timings['total'] * 1000:.0f}ms")
                     
             except Exception as e:
                 logger.error(f"Error processing image {i}: {e}")
@@ -179,72 +496,10 @@ def create_ken_burns_video(image_paths, output_path, job_id, quality=None):
         if not processed_images:
             raise Exception("No images could be processed")
         
-        # Create input file for FFmpeg concat
-        concat_file = os.path.join(temp_dir, 'input.txt')
-        with open(concat_file, 'w') as f:
-            for img_path in processed_images:
-                # Each image needs to be specified with duration
-                f.write(f"file '{img_path}'\n")
-                f.write(f"duration {duration_per_image}\n")
-            # Last image needs to be specified again without duration
-            f.write(f"file '{processed_images[-1]}'\n")
-        
-        # Build FFmpeg command with Ken Burns effects
-        # We'll create individual segments with different Ken Burns effects, then concatenate
-        segments = []
-        
-        for i, img_path in enumerate(processed_images):
-            segment_path = os.path.join(temp_dir, f'segment_{i:04d}.mp4')
-            
-            # Choose Ken Burns effect based on image index
-            if i % 4 == 0:
-                # Zoom in from center
-                zoompan = f"zoompan=z='min(zoom+0.0015,1.5)':x='iw/2-(iw/zoom/2)':y='ih/2-(ih/zoom/2)':d={duration_per_image*fps}:s={video_width}x{video_height}:fps={fps}"
-            elif i % 4 == 1:
-                # Zoom out to center
-                zoompan = f"zoompan=z='if(lte(zoom,1.0),1.5,max(1.001,zoom-0.0015))':x='iw/2-(iw/zoom/2)':y='ih/2-(ih/zoom/2)':d={duration_per_image*fps}:s={video_width}x{video_height}:fps={fps}"
-            elif i % 4 == 2:
-                # Pan left to right with slight zoom
-                zoompan = f"zoompan=z='1.3':x='if(lte(on,1),(iw-iw/zoom)/2,x-1)':y='ih/2-(ih/zoom/2)':d={duration_per_image*fps}:s={video_width}x{video_height}:fps={fps}"
-            else:
-                # Pan right to left with zoom in
-                zoompan = f"zoompan=z='min(zoom+0.0015,1.5)':x='if(lte(on,1),(iw-iw/zoom)/2,x+1)':y='ih/2-(ih/zoom/2)':d={duration_per_image*fps}:s={video_width}x{video_height}:fps={fps}"
-            
-            # Create segment with Ken Burns effect
-            cmd = [
-                FFMPEG_BINARY,
-                '-loop', '1',
-                '-i', img_path,
-                '-vf', zoompan,
-                '-c:v', 'libx264',
-                '-t', str(duration_per_image),
-                '-pix_fmt', 'yuv420p',
-                '-preset', 'fast',
-                '-crf', '20',
-                '-y',
-                segment_path
-            ]
-            
-            logger.info(f"Creating segment {i} with Ken Burns effect...")
-            logger.debug(f"FFmpeg command: {' '.join(cmd)}")
-            
-            try:
-                result = subprocess.run(cmd, capture_output=True, text=True, shell=(os.name == 'nt'))
-                
-                if result.returncode != 0:
-                    logger.error(f"FFmpeg error for segment {i}: {result.stderr}")
-                    logger.error(f"FFmpeg stdout: {result.stdout}")
-                    continue
-                
-                # Verify segment was created and has size
-                if os.path.exists(segment_path) and os.path.getsize(segment_path) > 0:
-                    segments.append(segment_path)
-                    logger.info(f"Segment {i} created successfully: {os.path.getsize(segment_path) / 1024:.2f} KB")
-                else:
-                    logger.error(f"Segment {i} was not created or is empty")
-            except Exception as e:
-                logger.error(f"Error creating segment {i}: {e}")
-                continue
+        # Render one Ken Burns segment per image, in parallel
+        segments = render_segments(
+            processed_images, temp_dir, duration_per_image, fps, video_width, video_height
+        )
         
         if not segments:
             raise Exception("No video segments could be created")
@@ -255,19 +510,18 @@ def create_ken_burns_video(image_paths, output_path, job_id, quality=None):
             for segment in segments:
                 f.write(f"file '{segment}'\n")
         
-        # Concatenate all segments with crossfade transitions
-        logger.info("Concatenating segments with transitions...")
-        
-        # First, concatenate without transitions
-        temp_output = os.path.join(temp_dir, 'temp_concat.mp4')
+        # Segments share encoder settings and start on a keyframe, so joining
+        # them is a stream copy; the fades are already baked in
+        logger.info(f"Concatenating {len(segments)} segments...")
         concat_cmd = [
             FFMPEG_BINARY,
             '-f', 'concat',
             '-safe', '0',
             '-i', segments_file,
             '-c', 'copy',
+            '-movflags', '+faststart',
             '-y',
-            temp_output
+            output_path
         ]
         
         try:
@@ -275,44 +529,9 @@ def create_ken_burns_video(image_paths, output_path, job_id, quality=None):
             
             if result.returncode != 0:
                 logger.error(f"Concatenation error: {result.stderr}")
-                # Fallback to simple concat without transitions
-                if segments:
-                    shutil.copy(segments[0], output_path)
-                    logger.warning("Used first segment as fallback output")
-                else:
-                    raise Exception("No segments available for concatenation")
-            else:
-                # Add fade transitions between segments
-                final_cmd = [
-                    FFMPEG_BINARY,
-                    '-i', temp_output,
-                    '-vf', 'fade=t=in:st=0:d=0.5,fade=t=out:st=3.5:d=0.5',
-                    '-c:v', 'libx264',
-                    '-preset', 'fast',
-                    '-crf', '20',
-                    '-pix_fmt', 'yuv420p',
-                    '-movflags', '+faststart',
-                    '-y',
-                    output_path
-                ]
-            
-                try:
-                    result = subprocess.run(final_cmd, capture_output=True, text=True, shell=(os.name == 'nt'))
-                    
-                    if result.returncode != 0:
-                        logger.error(f"Final processing error: {result.stderr}")
-                        # Use temp output as fallback
-                        if os.path.exists(temp_output):
-                            shutil.copy(temp_output, output_path)
-                            logger.warning("Used concatenated output without fade effects")
-                        else:
-                            raise Exception("No temporary output available")
-                except Exception as e:
-                    logger.error(f"Error in final processing: {e}")
-                    if os.path.exists(temp_output):
-                        shutil.copy(temp_output, output_path)
-                    else:
-                        raise
+                # Fallback to the first segment
+                shutil.copy(segments[0], output_path)
+                logger.warning("Used first segment as fallback output")
         except Exception as e:
             logger.error(f"Error in FFmpeg processing: {e}")
             raise
@@ -322,16 +541,6 @@ def create_ken_burns_video(image_paths, output_path, job_id, quality=None):
             file_size = os.path.getsize(output_path)
             if file_size > 0:
                 logger.info(f"Ken Burns video created: {output_path} (size: {file_size / 1024 / 1024:.2f} MB)")
-                
-                # Ensure video is playable
-                try:
-                    from ensure_playable_video import ensure_video_is_playable
-                    final_path = ensure_video_is_playable(output_path)
-                    if final_path:
-                        return final_path
-                except Exception as e:
-                    logger.warning(f"Could not verify video compatibility: {e}")
-                
                 return output_path
             else:
                 logger.error(f"Output file is empty: {output_path}")
@@ -0,0 +1,197 @@
+"""
+Single-graph FFmpeg tour renderer
+Photos get the shared image_prep treatment for the tour style, then one
+filter_complex - a Ken Burns move per photo chained together with xfade
+crossfades - encodes the whole tour in a single ffmpeg process, with no
+intermediate segments
+"""
+
+import os
+import subprocess
+import logging
+import tempfile
+from typing import List, Optional, Tuple
+
+from tour_config import TOUR_STYLES, MOVEMENT_PATTERNS, DEFAULT_STYLE
+
+logger = logging.getLogger(__name__)
+
+# xfade transition name (fade, dissolve, smoothleft, ...)
+XFADE_TRANSITION = os.environ.get('XFADE_TRANSITION', 'fade')
+# Photos are scaled to this multiple of the output size before zoompan so its
+# whole-pixel crop offsets stay smooth at output resolution
+XFADE_SUPERSAMPLE = float(os.environ.get('XFADE_SUPERSAMPLE', '2.0'))
+
+# Seconds of fade from and to black at the ends of the tour
+FADE_DURATION = 0.5
+
+# Output settings per quality, matching the optimized engine's presets
+XFADE_QUALITY_PRESETS = {
+    'deployment': {'fps': 24, 'resolution': (854, 480), 'preset': 'veryfast', 'crf': 26},
+    'medium': {'fps': 30, 'resolution': (1280, 720), 'preset': 'medium', 'crf': 23},
+    'high': {'fps': 30, 'resolution': (1920, 1080), 'preset': 'medium', 'crf': 20},
+    'premium': {'fps': 60, 'resolution': (1920, 1080), 'preset': 'slow', 'crf': 18},
+}
+
+# Easing curves as ffmpeg expressions of progress P (0-1)
+EASING_EXPRESSIONS = {
+    'linear': 'P',
+    'ease_in': 'P*P',
+    'ease_out': 'P*(2-P)',
+    'ease_in_out': 'P*P*(3-2*P)',
+}
+
+
+def _even(value: float) -> int:
+    return int(value) // 2 * 2
+
+
+def zoompan_filter(movement: dict, frames: int, width: int, height: int, fps: int) -> str:
+    """zoompan expressions interpolating a MOVEMENT_PATTERNS entry over `frames`"""
+    progress = f"on/{max(frames - 1, 1)}"
+    eased = EASING_EXPRESSIONS.get(movement.get('easing'), EASING_EXPRESSIONS['ease_in_out'])
+    eased = f"({eased.replace('P', f'({progress})')})"
+
+    # zoompan can't zoom out past the full frame
+    start_zoom = max(movement['start_zoom'], 1.0)
+    end_zoom = max(movement['end_zoom'], 1.0)
+    (start_x, start_y), (end_x, end_y) = movement['start_pos'], movement['end_pos']
+
+    zoom = f"{start_zoom:g}+({end_zoom - start_zoom:.4f})*{eased}"
+    center_x = f"({start_x:g}+({end_x - start_x:.4f})*{eased})"
+    center_y = f"({start_y:g}+({end_y - start_y:.4f})*{eased})"
+    x = f"clip(iw*{center_x}-iw/zoom/2,0,iw-iw/zoom)"
+    y = f"clip(ih*{center_y}-ih/zoom/2,0,ih-ih/zoom)"
+
+    return f"zoompan=z='{zoom}':x='{x}':y='{y}':d={frames}:s={width}x{height}:fps={fps}"
+
+
+def build_filter_graph(movements: List[dict], durations: List[float], transition: float,
+                       width: int, height: int, fps: int) -> Tuple[str, float]:
+    """
+    Build the filter_complex for the tour
+
+    Returns the graph (final output labelled [vout]) and the tour length in seconds.
+    """
+    canvas_w = _even(width * XFADE_SUPERSAMPLE)
+    canvas_h = _even(height * XFADE_SUPERSAMPLE)
+
+    # Work in whole frames so the crossfade offsets line up with real frames
+    frame_counts = [max(int(round(d * fps)), 1) for d in durations]
+    durations = [frames / fps for frames in frame_counts]
+
+    chains = []
+    for i, (movement, frames) in enumerate(zip(movements, frame_counts)):
+        chains.append(
+            f"[{i}:v]scale={canvas_w}:{canvas_h}:force_original_aspect_ratio=increase,"
+            f"crop={canvas_w}:{canvas_h},setsar=1,format=yuv420p,"
+            f"{zoompan_filter(movement, frames, width, height, fps)},"
+            f"setpts=PTS-STARTPTS[v{i}]"
+        )
+
+    # Each crossfade starts `transition` seconds before the running tour ends
+    current = 'v0'
+    total = durations[0]
+    for i in range(1, len(durations)):
+        offset = total - transition
+        label = f"x{i}"
+        chains.append(
+            f"[{current}][v{i}]xfade=transition={XFADE_TRANSITION}:"
+            f"duration={transition:.3f}:offset={offset:.3f}[{label}]"
+        )
+        current = label
+        total = offset + durations[i]
+
+    chains.append(
+        f"[{current}]fade=t=in:st=0:d={FADE_DURATION},"
+        f"fade=t=out:st={total - FADE_DURATION:.3f}:d={FADE_DURATION}[vout]"
+    )
+    return ';'.join(chains), total
+
+
+def tour_timeline(image_count: int, style: str = DEFAULT_STYLE) -> Tuple[List[dict], List[float], float]:
+    """Movement and seconds on screen for each photo, and the crossfade length"""
+    tour_style = TOUR_STYLES.get(style, TOUR_STYLES[DEFAULT_STYLE])
+    pool = [MOVEMENT_PATTERNS[m] for m in tour_style['preferred_movements'] if m in MOVEMENT_PATTERNS]
+    movements = [pool[i % len(pool)] for i in range(image_count)]
+    durations = [tour_style['base_duration'] * m.get('duration_multiplier', 1.0) for m in movements]
+    # A crossfade can't be longer than the shortest slide
+    transition = min(tour_style['transition_duration'], min(durations) / 2) if durations else 0.0
+    return movements, durations, transition
+
+
+def prepare_inputs(image_paths: List[str], width: int, height: int, style: str,
+                   temp_dir: str) -> List[str]:
+    """Style-graded JPEGs covering the supersampled canvas, one per photo"""
+    from PIL import Image
+    from image_prep import adjustments_for_style, prepare_source
+
+    adjustments = adjustments_for_style(style)
+    prepared = []
+    for i, img_path in enumerate(image_paths):
+        image, timings = prepare_source(img_path, (width, height), XFADE_SUPERSAMPLE, adjustments)
+        path = os.path.join(temp_dir, f'xfade_{i:04d}.jpg')
+        Image.fromarray(image).save(path, 'JPEG', quality=95)
+        prepared.append(path)
+        logger.debug(f"Prepared xfade input {i} in {timings['total'] * 1000:.0f}ms")
+    return prepared
+
+
+def create_xfade_tour(image_paths: List[str], output_path: str, job_id: str,
+                      quality: Optional[str] = None, style: str = DEFAULT_STYLE) -> str:
+    """Render the tour as one ffmpeg filter graph and return the output path"""
+    from ffmpeg_ken_burns import FFMPEG_BINARY
+
+    if not FFMPEG_BINARY:
+        raise Exception("FFmpeg not available")
+    if not image_paths:
+        raise ValueError("No images to render")
+
+    if quality is None:
+        from capacity_model import CAPACITY_PLANNING_ENABLED, get_capacity_model
+        if CAPACITY_PLANNING_ENABLED:
+            quality = get_capacity_model().plan(len(image_paths), engines=['xfade']).quality
+        else:
+            quality = 'deployment' if os.environ.get('RAILWAY_ENVIRONMENT') else 'high'
+    settings = XFADE_QUALITY_PRESETS.get(quality, XFADE_QUALITY_PRESETS['high'])
+    fps = settings['fps']
+    width, height = settings['resolution']
+
+    movements, durations, transition = tour_timeline(len(image_paths), style)
+    graph, total = build_filter_graph(movements, durations, transition, width, height, fps)
+
+    logger.info(
+        f"Rendering xfade tour for job {job_id}: {len(image_paths)} images, "
+        f"{total:.1f}s at {width}x{height}@{fps} ({quality})"
+    )
+    logger.debug(f"FFmpeg filter graph: {graph}")
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        cmd = [FFMPEG_BINARY, '-hide_banner', '-loglevel', 'error']
+        for img_path in prepare_inputs(image_paths, width, height, style, temp_dir):
+            cmd.extend(['-i', img_path])
+        cmd.extend([
+            '-filter_complex', graph,
+            '-map', '[vout]',
+            '-c:v', 'libx264',
+            '-preset', settings['preset'],
+            '-crf', str(settings['crf']),
+            '-pix_fmt', 'yuv420p',
+            '-r', str(fps),
+            '-an',
+            '-movflags', '+faststart',
+            '-y',
+            output_path
+        ])
+        result = subprocess.run(cmd, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise Exception(f"FFmpeg xfade render failed: {result.stderr.strip()}")
+
+    if not os.path.exists(output_path) or os.path.getsize(output_path) == 0:
+        raise ValueError("Generated video file is empty")
+
+    logger.info(f"Xfade tour created: {output_path} (size: {os.path.getsize(output_path) / 1024 / 1024:.2f} MB)")
+    return output_path
+
+
+__all__ = ['create_xfade_tour', 'build_filter_graph', 'zoompan_filter', 'tour_timeline', 'prepare_inputs']
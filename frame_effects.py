@@ -0,0 +1,74 @@
+"""
+Per-frame effects shared by the OpenCV tour engines
+Vignette masks are built once per (resolution, strength) and cached as 8-bit
+fixed-point arrays; vignette, fade and brightness are then applied together
+as a single in-place saturating multiply per frame
+"""
+import logging
+from functools import lru_cache
+from typing import Optional
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Mask values are stored as 0-255 for 0.0-1.0
+MASK_SCALE = 255.0
+
+
+@lru_cache(maxsize=8)
+def get_vignette_mask(width: int, height: int, strength: float) -> np.ndarray:
+    """
+    Get the cached vignette mask for a frame size
+
+    Returns a read-only (height, width, 3) uint8 array where 255 means the
+    pixel is left untouched.
+    """
+    Y, X = np.ogrid[:height, :width]
+    center_y, center_x = height / 2, width / 2
+
+    dist_from_center = np.sqrt((X - center_x) ** 2 + (Y - center_y) ** 2, dtype=np.float32)
+    max_dist = np.sqrt(center_x ** 2 + center_y ** 2)
+
+    vignette = 1 - (dist_from_center / max_dist) * strength
+    np.clip(vignette, 0, 1, out=vignette)
+
+    mask = np.rint(vignette * MASK_SCALE).astype(np.uint8)
+    mask = np.ascontiguousarray(np.repeat(mask[..., np.newaxis], 3, axis=2))
+    mask.setflags(write=False)
+
+    logger.debug(f"Built vignette mask {width}x{height} (strength {strength})")
+    return mask
+
+
+def apply_frame_effects(frame: np.ndarray,
+                        vignette_mask: Optional[np.ndarray] = None,
+                        gain: float = 1.0,
+                        out: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Apply vignette, fade and brightness in one pass
+
+    Args:
+        frame: uint8 BGR/RGB frame
+        vignette_mask: Mask from get_vignette_mask, or None for no vignette
+        gain: Combined fade/brightness multiplier (1.0 = unchanged)
+        out: Destination buffer; defaults to modifying `frame` in place
+
+    Returns:
+        The destination array
+    """
+    if out is None:
+        out = frame
+
+    if vignette_mask is not None:
+        cv2.multiply(frame, vignette_mask, dst=out, scale=gain / MASK_SCALE)
+    elif gain != 1.0:
+        cv2.convertScaleAbs(frame, dst=out, alpha=gain)
+    elif out is not frame:
+        np.copyto(out, frame)
+
+    return out
+
+
+__all__ = ['get_vignette_mask', 'apply_frame_effects']
@@ -0,0 +1,121 @@
+"""
+Affine-warp frame generator for the OpenCV tour engines
+Each source image is converted to BGR once; every frame is then a single
+subpixel cv2.warpAffine into a small ring of preallocated buffers, and
+crossfades are blended into those same buffers, so rendering a tour does
+no per-frame allocation
+"""
+import logging
+from typing import Iterator, Optional, Tuple
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class AffineFrameGenerator:
+    """
+    Render Ken Burns frames at a fixed output size
+
+    Frames returned by render*/blend live in a ring of `buffer_count`
+    buffers and are overwritten that many calls later; copy any frame that
+    has to outlive that (e.g. a scene's last frame kept for a transition).
+    """
+
+    def __init__(self, width: int, height: int,
+                 interpolation: int = cv2.INTER_LINEAR, buffer_count: int = 2):
+        self.width = width
+        self.height = height
+        self.interpolation = interpolation
+        self.source: Optional[np.ndarray] = None
+
+        self._buffers = [np.empty((height, width, 3), dtype=np.uint8) for _ in range(max(1, buffer_count))]
+        self._next = 0
+        self._matrix = np.zeros((2, 3), dtype=np.float64)
+
+    def load(self, image: np.ndarray, conversion: Optional[int] = None) -> np.ndarray:
+        """Set the source image, converting its colors once (e.g. cv2.COLOR_RGB2BGR)"""
+        if conversion is not None:
+            self.source = cv2.cvtColor(image, conversion)
+        else:
+            self.source = np.ascontiguousarray(image)
+        return self.source
+
+    def _buffer(self) -> np.ndarray:
+        buffer = self._buffers[self._next]
+        self._next = (self._next + 1) % len(self._buffers)
+        return buffer
+
+    def render_matrix(self, matrix: np.ndarray, source: Optional[np.ndarray] = None) -> np.ndarray:
+        """Warp the source with a source-to-output affine matrix"""
+        source = self.source if source is None else source
+        return cv2.warpAffine(
+            source, matrix, (self.width, self.height),
+            dst=self._buffer(),
+            flags=self.interpolation,
+            borderMode=cv2.BORDER_REPLICATE
+        )
+
+    def crop_matrix(self, x: float, y: float, crop_w: float, crop_h: float,
+                    out: Optional[np.ndarray] = None) -> np.ndarray:
+        """Source-to-output matrix for the crop with top-left (x, y), in source pixels"""
+        matrix = np.zeros((2, 3), dtype=np.float64) if out is None else out
+        sx = self.width / crop_w
+        sy = self.height / crop_h
+        # Pixel-center alignment keeps the crop edges on the frame edges
+        matrix[0, 0] = sx
+        matrix[0, 2] = sx * (0.5 - x) - 0.5
+        matrix[1, 1] = sy
+        matrix[1, 2] = sy * (0.5 - y) - 0.5
+        return matrix
+
+    def centered_matrix(self, center_x: float, center_y: float, crop_w: float, crop_h: float,
+                        source_size: Tuple[int, int], out: Optional[np.ndarray] = None) -> np.ndarray:
+        """Matrix for a crop around a center point, kept inside a source of (width, height)"""
+        w, h = source_size
+
+        # Shrink oversized crops, keeping the aspect ratio
+        shrink = min(1.0, w / crop_w, h / crop_h)
+        crop_w *= shrink
+        crop_h *= shrink
+
+        x = min(max(center_x - crop_w / 2, 0.0), w - crop_w)
+        y = min(max(center_y - crop_h / 2, 0.0), h - crop_h)
+        return self.crop_matrix(x, y, crop_w, crop_h, out)
+
+    def render(self, x: float, y: float, crop_w: float, crop_h: float,
+               source: Optional[np.ndarray] = None) -> np.ndarray:
+        """Render the crop with top-left (x, y) and size crop_w x crop_h, in source pixels"""
+        return self.render_matrix(self.crop_matrix(x, y, crop_w, crop_h, self._matrix), source)
+
+    def render_centered(self, center_x: float, center_y: float, crop_w: float, crop_h: float,
+                        source: Optional[np.ndarray] = None) -> np.ndarray:
+        """Render a crop around a center point, kept inside the source"""
+        source = self.source if source is None else source
+        h, w = source.shape[:2]
+        matrix = self.centered_matrix(center_x, center_y, crop_w, crop_h, (w, h), self._matrix)
+        return self.render_matrix(matrix, source)
+
+    def render_cover(self, source: Optional[np.ndarray] = None) -> np.ndarray:
+        """Render the largest centered crop of the frame's aspect ratio"""
+        source = self.source if source is None else source
+        h, w = source.shape[:2]
+        fit = min(w / self.width, h / self.height)
+        return self.render_centered(w / 2, h / 2, self.width * fit, self.height * fit, source)
+
+    def render_plan(self, plan, source: Optional[np.ndarray] = None) -> Iterator[np.ndarray]:
+        """Yield one frame per step of a motion_planner.MotionPlan"""
+        for matrix in plan.affine_matrices():
+            yield self.render_matrix(matrix, source)
+
+    def blend(self, frame1: np.ndarray, frame2: np.ndarray, alpha: float) -> np.ndarray:
+        """
+        Crossfade from frame1 to frame2 into the next buffer
+
+        The inputs must not be this generator's own buffers; copy them first.
+        """
+        return cv2.addWeighted(frame1, 1 - alpha, frame2, alpha, 0, dst=self._buffer())
+
+
+__all__ = ['AffineFrameGenerator']
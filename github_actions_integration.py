@@ -256,6 +256,33 @@ class GitHubActionsIntegration:
             logger.error(f"Error checking workflow status: {e}")
             return 'unknown', str(e)
     
+    def cancel_workflow_run(self, job_id: str) -> bool:
+        """
+        Cancel the workflow run started for a job (used when the job is re-routed)
+        
+        Args:
+            job_id: The job identifier used when triggering the workflow
+            
+        Returns:
+            True if GitHub accepted the cancellation, False otherwise
+        """
+        run_id = self.job_to_run_mapping.get(job_id)
+        if not run_id:
+            logger.info(f"No workflow run mapped for job {job_id}; nothing to cancel")
+            return False
+        
+        try:
+            cancel_url = f"{self.base_url}/actions/runs/{run_id}/cancel"
+            response = requests.post(cancel_url, headers=self.headers, timeout=10)
+            if response.status_code == 202:
+                logger.info(f"Cancelled workflow run {run_id} for job {job_id}")
+                return True
+            logger.warning(f"Could not cancel workflow run {run_id}: {response.status_code}")
+            return False
+        except Exception as e:
+            logger.warning(f"Error cancelling workflow run for job {job_id}: {e}")
+            return False
+    
     def get_workflow_artifact(self, job_id: str) -> Optional[Dict[str, Any]]:
         """
         Get the artifact data from a completed workflow
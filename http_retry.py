@@ -0,0 +1,64 @@
+"""
+JSON POSTs with retries for the OpenAI endpoints
+Rate limits (429), server errors (5xx) and network failures are retried with
+exponential backoff and jitter: the first retry waits about `backoff` seconds,
+each later one twice as long, capped at MAX_BACKOFF_SECONDS. A Retry-After
+header from the server takes precedence.
+"""
+import time
+import random
+import logging
+from typing import Any, Dict, Optional
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+MAX_BACKOFF_SECONDS = 30.0
+
+
+def backoff_delay(attempt: int, backoff: float, response: Optional[requests.Response] = None) -> float:
+    """Seconds to wait before retry number `attempt` (1-based)"""
+    if response is not None:
+        retry_after = response.headers.get('Retry-After')
+        if retry_after:
+            try:
+                return min(float(retry_after), MAX_BACKOFF_SECONDS)
+            except ValueError:
+                pass
+    delay = backoff * (2 ** (attempt - 1))
+    return min(delay, MAX_BACKOFF_SECONDS) * random.uniform(0.5, 1.0)
+
+
+def post_with_retries(url: str, headers: Dict[str, str], payload: Dict[str, Any], timeout: float,
+                      max_retries: int, backoff: float, label: str = 'Request') -> requests.Response:
+    """
+    POST `payload` as JSON, retrying up to max_retries times
+
+    Returns the last response, which may still be an error status once the
+    retries are used up; the final network error is re-raised.
+    """
+    attempt = 0
+    while True:
+        attempt += 1
+        try:
+            response = requests.post(url, headers=headers, json=payload, timeout=timeout)
+        except (requests.ConnectionError, requests.Timeout) as exc:
+            if attempt > max_retries:
+                logger.error(f"{label} failed after {attempt} attempts: {exc}")
+                raise
+            delay = backoff_delay(attempt, backoff)
+            logger.warning(f"{label} error ({exc}); retrying in {delay:.1f}s")
+            time.sleep(delay)
+            continue
+
+        if response.status_code in RETRYABLE_STATUS and attempt <= max_retries:
+            delay = backoff_delay(attempt, backoff, response)
+            logger.warning(f"{label} returned {response.status_code}; retrying in {delay:.1f}s")
+            time.sleep(delay)
+            continue
+        return response
+
+
+__all__ = ['RETRYABLE_STATUS', 'backoff_delay', 'post_with_retries']
@@ -0,0 +1,188 @@
+"""
+Shared photo preparation for the tour engines
+Decodes at reduced size where the format allows, resizes to the engine's
+working resolution and applies the style's contrast, color and brightness as
+one fused 3x4 color matrix (channel order folded in), followed by an optional
+unsharp mask. Adjustments run at the working resolution, or at the source
+resolution before upscaling, never on the full-size original.
+"""
+import time
+import logging
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple, Union
+
+import numpy as np
+from PIL import Image, ImageFilter
+
+from tour_config import TOUR_STYLES, DEFAULT_STYLE
+
+try:
+    import cv2
+except ImportError:
+    cv2 = None
+
+logger = logging.getLogger(__name__)
+
+# ITU-R 601 luma weights PIL uses for its grayscale ('L') conversion
+LUMA_WEIGHTS = np.array([0.299, 0.587, 0.114])
+
+# Photo treatment every tour style gets unless its TOUR_STYLES entry overrides it
+STYLE_DEFAULTS = {
+    'contrast': 1.1,
+    'brightness': 1.02,
+    'sharpen': 0.5,  # Unsharp mask amount (radius 1)
+    'sharpen_radius': 1.0,
+    'sharpen_threshold': 3,
+}
+
+
+@dataclass(frozen=True)
+class ColorAdjustments:
+    """ImageEnhance-style factors (1.0 = unchanged) and an unsharp mask"""
+    contrast: float = 1.0
+    color: float = 1.0
+    brightness: float = 1.0
+    sharpen: float = 0.0  # Unsharp amount (PIL UnsharpMask percent / 100)
+    sharpen_radius: float = 1.0
+    sharpen_threshold: int = 0
+
+    @property
+    def changes_color(self) -> bool:
+        return (self.contrast, self.color, self.brightness) != (1.0, 1.0, 1.0)
+
+
+def adjustments_for_style(style: Union[str, Dict]) -> ColorAdjustments:
+    """Compile a TOUR_STYLES entry (or its name) over STYLE_DEFAULTS into ColorAdjustments"""
+    if isinstance(style, str):
+        style = TOUR_STYLES.get(style, TOUR_STYLES[DEFAULT_STYLE])
+    style = {**STYLE_DEFAULTS, **style}
+    return ColorAdjustments(
+        contrast=style['contrast'],
+        color=style.get('color_enhancement', 1.0),
+        brightness=style['brightness'],
+        sharpen=style['sharpen'],
+        sharpen_radius=style['sharpen_radius'],
+        sharpen_threshold=style['sharpen_threshold'],
+    )
+
+
+def color_matrix(adjustments: ColorAdjustments, mean_luma: float, channel_order: str = 'RGB') -> np.ndarray:
+    """
+    3x4 matrix equal to ImageEnhance Contrast, then Color, then Brightness
+
+    Takes RGB in and produces `channel_order` out. Contrast blends towards the
+    image's mean luma, Color towards each pixel's luma and Brightness towards
+    black; all three are affine, so they compose into a single matrix.
+    """
+    c, s, b = adjustments.contrast, adjustments.color, adjustments.brightness
+    saturation = s * np.eye(3) + (1.0 - s) * np.outer(np.ones(3), LUMA_WEIGHTS)
+
+    matrix = np.empty((3, 4), dtype=np.float32)
+    matrix[:, :3] = b * c * saturation
+    # Luma weights sum to 1, so the contrast offset passes through Color unchanged
+    matrix[:, 3] = b * (1.0 - c) * mean_luma
+    if channel_order == 'BGR':
+        matrix = matrix[::-1].copy()
+    return matrix
+
+
+def apply_adjustments(image: np.ndarray, adjustments: ColorAdjustments,
+                      channel_order: str = 'RGB') -> np.ndarray:
+    """Adjust an RGB uint8 image, returning it in channel_order"""
+    if adjustments.changes_color or channel_order != 'RGB':
+        mean_luma = 0.0
+        if adjustments.contrast != 1.0:
+            # Mean of the luma is the luma of the per-channel means
+            means = cv2.mean(image)[:3] if cv2 is not None else image.reshape(-1, 3).mean(axis=0)
+            mean_luma = float(np.dot(means, LUMA_WEIGHTS))
+        matrix = color_matrix(adjustments, mean_luma, channel_order)
+
+        if cv2 is not None:
+            image = cv2.transform(image, matrix)
+        else:
+            adjusted = image.reshape(-1, 3) @ matrix[:, :3].T.astype(np.float32) + matrix[:, 3]
+            image = np.clip(adjusted + 0.5, 0, 255).astype(np.uint8).reshape(image.shape)
+
+    if adjustments.sharpen > 0:
+        image = unsharp_mask(image, adjustments.sharpen, adjustments.sharpen_radius,
+                             adjustments.sharpen_threshold)
+    return image
+
+
+def unsharp_mask(image: np.ndarray, amount: float, radius: float = 1.0, threshold: int = 0) -> np.ndarray:
+    """PIL UnsharpMask equivalent on a uint8 array"""
+    if cv2 is None:
+        pil_filter = ImageFilter.UnsharpMask(radius=radius, percent=int(amount * 100), threshold=threshold)
+        return np.asarray(Image.fromarray(image).filter(pil_filter))
+
+    blurred = cv2.GaussianBlur(image, (0, 0), radius)
+    sharpened = cv2.addWeighted(image, 1.0 + amount, blurred, -amount, 0)
+    if threshold > 0:
+        # Leave low-contrast detail (noise) alone, as PIL does
+        np.copyto(sharpened, image, where=cv2.absdiff(image, blurred) < threshold)
+    return sharpened
+
+
+def cover_size(source_size: Tuple[int, int], frame_size: Tuple[int, int], scale: float) -> Tuple[int, int]:
+    """Size that covers `scale` x the frame while keeping the source's aspect ratio"""
+    src_w, src_h = source_size
+    width, height = frame_size
+    img_aspect = src_w / src_h
+    if img_aspect > width / height:
+        new_height = int(height * scale)
+        return int(new_height * img_aspect), new_height
+    new_width = int(width * scale)
+    return new_width, int(new_width / img_aspect)
+
+
+def prepare_source(image_path: str, frame_size: Tuple[int, int], scale: float,
+                   adjustments: Optional[ColorAdjustments] = None,
+                   channel_order: str = 'RGB',
+                   resample: int = Image.Resampling.LANCZOS) -> Tuple[np.ndarray, Dict[str, float]]:
+    """
+    Load a photo at `scale` x the frame size, adjusted and in channel_order
+
+    Returns the uint8 array and per-stage timings in seconds.
+    """
+    adjustments = adjustments or ColorAdjustments()
+    timings: Dict[str, float] = {}
+    start = time.perf_counter()
+
+    with Image.open(image_path) as img:
+        target = cover_size(img.size, frame_size, scale)
+        # JPEGs decode straight at the smallest DCT scale still covering the target
+        img.draft('RGB', target)
+        if img.mode != 'RGB':
+            img = img.convert('RGB')
+        source = img
+        timings['decode'] = time.perf_counter() - start
+
+        downscale = source.width >= target[0] and source.height >= target[1]
+        if downscale:
+            mark = time.perf_counter()
+            source = source.resize(target, resample)
+            timings['resize'] = time.perf_counter() - mark
+        image = np.asarray(source)
+
+    mark = time.perf_counter()
+    image = apply_adjustments(image, adjustments, channel_order)
+    timings['adjust'] = time.perf_counter() - mark
+
+    if not downscale:
+        # Small photo: adjust at its own size, then upscale
+        mark = time.perf_counter()
+        image = np.asarray(Image.fromarray(image).resize(target, resample))
+        timings['resize'] = time.perf_counter() - mark
+
+    timings['total'] = time.perf_counter() - start
+    logger.debug(
+        f"Prepared {image_path} at {target[0]}x{target[1]}: "
+        + ', '.join(f"{stage} {seconds * 1000:.0f}ms" for stage, seconds in timings.items())
+    )
+    return np.ascontiguousarray(image), timings
+
+
+__all__ = [
+    'ColorAdjustments', 'STYLE_DEFAULTS', 'adjustments_for_style', 'color_matrix', 'apply_adjustments',
+    'unsharp_mask', 'cover_size', 'prepare_source',
+]
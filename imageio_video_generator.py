@@ -1,80 +1,38 @@
 """
-Video generator using imageio - more reliable than OpenCV for video writing
+Video generator with PIL-rendered Ken Burns frames
+Frames go straight into the shared ffmpeg encoder sink
 """
 import os
 import logging
 import numpy as np
-from PIL import Image, ImageEnhance
+from PIL import Image
 import gc
+from video_encoder import FFmpegFrameSink
+from image_prep import ColorAdjustments, prepare_source
 
 logger = logging.getLogger(__name__)
 
-try:
-    import imageio
-    import imageio_ffmpeg
-    IMAGEIO_AVAILABLE = True
-except ImportError:
-    IMAGEIO_AVAILABLE = False
-    logger.error("imageio not available")
-
 def create_imageio_video(image_paths, output_path, fps=24, duration_per_image=8.0):
-    """Create video using imageio with Ken Burns effects"""
-    
-    if not IMAGEIO_AVAILABLE:
-        raise ImportError("imageio not available")
+    """Create video with PIL-rendered Ken Burns effects"""
     
     # Video parameters
     width, height = 854, 480
     
-    # Get ffmpeg executable
-    ffmpeg_exe = imageio_ffmpeg.get_ffmpeg_exe()
-    logger.info(f"Using FFmpeg: {ffmpeg_exe}")
-    
-    # Create writer with explicit codec settings for maximum compatibility
-    writer = imageio.get_writer(
-        output_path,
-        fps=fps,
-        codec='libx264',
-        quality=8,
-        ffmpeg_params=[
-            '-pix_fmt', 'yuv420p',  # Standard pixel format
-            '-profile:v', 'baseline',  # Most compatible H.264 profile
-            '-level', '3.0',  # Compatible with most devices
-            '-crf', '23',
-            '-preset', 'medium',
-            '-movflags', '+faststart',
-            '-vf', 'format=yuv420p'  # Force pixel format conversion
-        ]
+    # Baseline profile keeps the output playable on older devices
+    writer = FFmpegFrameSink(
+        output_path, width, height, fps,
+        preset='medium', crf=23, pixel_format='rgb24',
+        extra_args=['-profile:v', 'baseline', '-level', '3.0']
     )
     
     try:
         for i, img_path in enumerate(image_paths):
             logger.info(f"Processing image {i+1}/{len(image_paths)}: {os.path.basename(img_path)}")
             
-            # Load and prepare image
-            with Image.open(img_path) as img:
-                if img.mode != 'RGB':
-                    img = img.convert('RGB')
-                
-                # Enhance slightly
-                enhancer = ImageEnhance.Color(img)
-                img = enhancer.enhance(1.1)
-                
-                # Calculate dimensions for Ken Burns effect
-                img_aspect = img.width / img.height
-                frame_aspect = width / height
-                
-                # Make image 30% larger for zoom effect
-                scale = 1.3
-                if img_aspect > frame_aspect:
-                    new_height = int(height * scale)
-                    new_width = int(new_height * img_aspect)
-                else:
-                    new_width = int(width * scale)
-                    new_height = int(new_width / img_aspect)
-                
-                img = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
-                img_array = np.array(img)
+            # Load at 1.3x the frame for the zoom, with a slight color boost
+            img_array, timings = prepare_source(img_path, (width, height), 1.3, ColorAdjustments(color=1.1))
+            new_height, new_width = img_array.shape[:2]
+            logger.info(f"Prepared in {timings['total'] * 1000:.0f}ms")
             
             # Generate frames with Ken Burns effect
             num_frames = int(duration_per_image * fps)
@@ -106,27 +64,22 @@ def create_imageio_video(image_paths, output_path, fps=24, duration_per_image=8.
                 frame_array = np.array(frame)
                 
                 # Write frame
-                writer.append_data(frame_array)
+                writer.write(frame_array)
             
             # Free memory
             del img_array
             gc.collect()
         
-        # Close writer
+        # Finish the encode; raises if ffmpeg failed
         writer.close()
         
-        # Verify output
-        if os.path.exists(output_path):
-            file_size = os.path.getsize(output_path)
-            logger.info(f"Video created: {output_path} ({file_size / 1024 / 1024:.2f} MB)")
-            return output_path
-        else:
-            raise ValueError("Failed to create video file")
+        file_size = os.path.getsize(output_path)
+        logger.info(f"Video created: {output_path} ({file_size / 1024 / 1024:.2f} MB)")
+        return output_path
             
     except Exception as e:
         logger.error(f"Error creating video: {e}")
-        if 'writer' in locals():
-            writer.close()
+        writer.abort()
         raise
 
 # Export
@@ -0,0 +1,141 @@
+"""
+Motion planner for the Ken Burns engines
+Compiles movement definitions (tour_config.MOVEMENT_PATTERNS format) into
+per-frame subpixel crop rectangles, and from those into the affine matrices
+cv2.warpAffine needs, so engines never evaluate per-frame expressions or
+round crop boxes to whole pixels
+"""
+import logging
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple, Union
+
+import numpy as np
+
+from tour_config import MOVEMENT_PATTERNS
+
+logger = logging.getLogger(__name__)
+
+
+def ease(t: np.ndarray, easing: str) -> np.ndarray:
+    """Vectorized easing curves matching the OpenCV engines"""
+    if easing == 'linear':
+        return t
+    if easing == 'ease_in':
+        return t * t
+    if easing == 'ease_out':
+        return t * (2.0 - t)
+    return t * t * (3.0 - 2.0 * t)
+
+
+@dataclass(frozen=True)
+class MotionPlan:
+    """Crop rectangle for every frame, in source pixels (float64 arrays)"""
+    x: np.ndarray
+    y: np.ndarray
+    width: np.ndarray
+    height: np.ndarray
+    output_size: Tuple[int, int]
+
+    @property
+    def frames(self) -> int:
+        return len(self.x)
+
+    def rects(self) -> np.ndarray:
+        """(frames, 4) array of x, y, width, height"""
+        return np.stack([self.x, self.y, self.width, self.height], axis=1)
+
+    def centers(self) -> np.ndarray:
+        """(frames, 2) array of crop centers"""
+        return np.stack([self.x + self.width / 2, self.y + self.height / 2], axis=1)
+
+    def affine_matrices(self) -> np.ndarray:
+        """
+        (frames, 2, 3) source-to-output matrices for cv2.warpAffine
+
+        Uses pixel-center alignment, so the crop edges land exactly on the
+        output edges at any fractional offset or scale.
+        """
+        out_w, out_h = self.output_size
+        sx = out_w / self.width
+        sy = out_h / self.height
+
+        matrices = np.zeros((self.frames, 2, 3), dtype=np.float64)
+        matrices[:, 0, 0] = sx
+        matrices[:, 0, 2] = sx * (0.5 - self.x) - 0.5
+        matrices[:, 1, 1] = sy
+        matrices[:, 1, 2] = sy * (0.5 - self.y) - 0.5
+        return matrices
+
+
+def plan_motion(movement: Union[str, Dict], frames: int,
+                source_size: Tuple[int, int], output_size: Tuple[int, int],
+                base_size: Optional[Tuple[float, float]] = None) -> MotionPlan:
+    """
+    Compile one movement into a MotionPlan
+
+    Args:
+        movement: MOVEMENT_PATTERNS name, or a dict with start_pos, end_pos,
+            start_zoom, end_zoom and easing
+        frames: Number of frames to plan
+        source_size: (width, height) of the image being cropped
+        output_size: (width, height) of the rendered frames
+        base_size: Crop size at zoom 1.0; defaults to the largest rectangle
+            of the output's aspect ratio that fits in the source
+
+    Positions are crop centers as fractions of the source. Crops are shrunk to
+    fit the source and kept fully inside it.
+    """
+    if isinstance(movement, str):
+        movement = MOVEMENT_PATTERNS[movement]
+
+    src_w, src_h = source_size
+    out_w, out_h = output_size
+    if base_size is None:
+        fit = min(src_w / out_w, src_h / out_h)
+        base_size = (out_w * fit, out_h * fit)
+    base_w, base_h = base_size
+
+    t = np.linspace(0.0, 1.0, frames) if frames > 1 else np.zeros(max(frames, 0))
+    p = ease(t, movement.get('easing', 'ease_in_out'))
+
+    (start_x, start_y), (end_x, end_y) = movement['start_pos'], movement['end_pos']
+    zoom = movement['start_zoom'] + (movement['end_zoom'] - movement['start_zoom']) * p
+
+    width = base_w / zoom
+    height = base_h / zoom
+    # Never crop outside the source; shrink both sides to keep the aspect
+    shrink = np.minimum(1.0, np.minimum(src_w / width, src_h / height))
+    width = width * shrink
+    height = height * shrink
+
+    center_x = (start_x + (end_x - start_x) * p) * src_w
+    center_y = (start_y + (end_y - start_y) * p) * src_h
+    x = np.clip(center_x - width / 2, 0.0, src_w - width)
+    y = np.clip(center_y - height / 2, 0.0, src_h - height)
+
+    return MotionPlan(x=x, y=y, width=width, height=height, output_size=(out_w, out_h))
+
+
+def motion_jitter(plan: MotionPlan, integer_coordinates: bool = False) -> float:
+    """
+    Modelled frame-to-frame stepping of the camera, in output pixels
+
+    Standard deviation of the second difference of the planned crop center;
+    smooth motion is close to 0. With integer_coordinates the crop origin and
+    size are truncated to whole source pixels, a model of zoompan's rounding.
+    Computed from the plan alone; benchmarks/run_motion.py measures rendered frames.
+    """
+    if plan.frames < 3:
+        return 0.0
+
+    x, y, width, height = plan.x, plan.y, plan.width, plan.height
+    if integer_coordinates:
+        x, y = np.floor(x), np.floor(y)
+        width, height = np.floor(width), np.floor(height)
+
+    scale = plan.output_size[0] / plan.width
+    centers = np.stack([(x + width / 2) * scale, (y + height / 2) * scale], axis=1)
+    return float(np.std(np.diff(centers, n=2, axis=0)))
+
+
+__all__ = ['MotionPlan', 'plan_motion', 'motion_jitter', 'ease']
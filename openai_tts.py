@@ -1,20 +1,42 @@
 import logging
 import os
-from typing import Optional
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, List, Optional, Sequence
 
 import requests
 
+from http_retry import post_with_retries
+
 logger = logging.getLogger(__name__)
 
 DEFAULT_TTS_MODEL = "gpt-4o-mini-tts"
 DEFAULT_TTS_VOICE = "verse"
 DEFAULT_TTS_FORMAT = "mp3"
 
+# Scenes synthesized at once by synthesize_many
+TTS_MAX_CONCURRENCY = int(os.getenv("TTS_MAX_CONCURRENCY", "4"))
+# Retry policy for each request (see http_retry)
+TTS_MAX_RETRIES = int(os.getenv("TTS_MAX_RETRIES", "3"))
+TTS_BACKOFF_SECONDS = float(os.getenv("TTS_BACKOFF_SECONDS", "1.0"))
+
+# Synthesized audio reused for unchanged lines (edited scripts, repeated CTAs)
+TTS_CACHE_ENABLED = os.getenv("TTS_CACHE", "true").lower() == "true"
+TTS_CACHE_MAX_MB = int(os.getenv("TTS_CACHE_MAX_MB", "512"))
+TTS_CACHE_TTL = float(os.getenv("TTS_CACHE_TTL", str(30 * 24 * 3600)))
 
 class OpenAITTSError(RuntimeError):
     """Raised when OpenAI TTS synthesis fails."""
 
 
+def get_tts_cache():
+    """The TTS audio DiskCache, or None when disabled"""
+    if not TTS_CACHE_ENABLED:
+        return None
+    from disk_cache import get_cache
+    return get_cache("tts", TTS_CACHE_MAX_MB * 1024 * 1024, ttl=TTS_CACHE_TTL)
+
+
 def synthesize_speech(
     text: str,
     *,
@@ -22,15 +44,35 @@ def synthesize_speech(
     voice: Optional[str] = None,
     audio_format: str = DEFAULT_TTS_FORMAT,
     timeout: int = 120,
+    max_retries: Optional[int] = None,
+    use_cache: bool = True,
 ) -> bytes:
-    """Generate speech audio from text using OpenAI's audio endpoint."""
+    """Generate speech audio from text using OpenAI's audio endpoint.
+
+    Audio is cached on disk by (text, model, voice, format), so unchanged
+    lines are never synthesized twice. Rate limits (429), server errors (5xx)
+    and network failures are retried with exponential backoff, honouring
+    Retry-After when the API sends it.
+    """
+    model_name = model or os.getenv("OPENAI_TTS_MODEL", DEFAULT_TTS_MODEL)
+    voice_name = voice or os.getenv("OPENAI_TTS_VOICE", DEFAULT_TTS_VOICE)
+
+    cache = get_tts_cache() if use_cache else None
+    cache_key = None
+    if cache is not None:
+        from disk_cache import cache_key as make_cache_key
+        cache_key = make_cache_key("tts", text, model_name, voice_name, audio_format)
+        cached = cache.get_bytes(cache_key)
+        if cached:
+            logger.debug("TTS cache hit for %d characters", len(text))
+            return cached
+
     api_key = os.getenv("OPENAI_API_KEY")
     if not api_key:
         raise OpenAITTSError("OPENAI_API_KEY not configured")
 
     base_url = os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1").rstrip("/")
-    model_name = model or os.getenv("OPENAI_TTS_MODEL", DEFAULT_TTS_MODEL)
-    voice_name = voice or os.getenv("OPENAI_TTS_VOICE", DEFAULT_TTS_VOICE)
+    retries = TTS_MAX_RETRIES if max_retries is None else max_retries
 
     endpoint = f"{base_url}/audio/speech"
     headers = {
@@ -46,16 +88,66 @@ def synthesize_speech(
 
     logger.debug("Requesting TTS audio", extra={"model": model_name, "voice": voice_name})
 
-    response = requests.post(endpoint, headers=headers, json=payload, timeout=timeout)
     try:
+        response = post_with_retries(endpoint, headers, payload, timeout, retries, TTS_BACKOFF_SECONDS,
+                                     label="OpenAI TTS request")
         response.raise_for_status()
-    except requests.HTTPError as exc:  # noqa: BLE001
+    except requests.RequestException as exc:
         logger.error("OpenAI TTS request failed: %s", exc)
-        if response.content:
-            logger.debug("TTS error payload: %s", response.content[:500])
+        if exc.response is not None and exc.response.content:
+            logger.debug("TTS error payload: %s", exc.response.content[:500])
         raise OpenAITTSError(str(exc)) from exc
 
+    if cache is not None and response.content:
+        try:
+            cache.put_bytes(cache_key, response.content)
+        except OSError as exc:
+            logger.warning("Could not cache TTS audio: %s", exc)
     return response.content
 
 
-__all__ = ["synthesize_speech", "OpenAITTSError"]
+def synthesize_many(
+    texts: Sequence[str],
+    *,
+    max_concurrency: Optional[int] = None,
+    on_complete: Optional[Callable[[int, bytes], None]] = None,
+    **kwargs,
+) -> List[bytes]:
+    """Synthesize several texts concurrently and return the audio in input order.
+
+    on_complete(index, audio) is called on the calling thread as each text
+    finishes, in completion order, so callers can process audio and report
+    progress while the remaining requests are in flight. The first failure
+    cancels the requests that have not started and is re-raised at once,
+    without waiting for the ones still running.
+    """
+    if not texts:
+        return []
+
+    workers = max(1, min(max_concurrency or TTS_MAX_CONCURRENCY, len(texts)))
+    results: List[Optional[bytes]] = [None] * len(texts)
+    start = time.time()
+
+    pool = ThreadPoolExecutor(max_workers=workers)
+    try:
+        futures = {pool.submit(synthesize_speech, text, **kwargs): index for index, text in enumerate(texts)}
+        for future in as_completed(futures):
+            index = futures[future]
+            results[index] = future.result()
+            if on_complete is not None:
+                on_complete(index, results[index])
+    except BaseException:
+        # Fail now; requests already in flight finish in the background
+        pool.shutdown(wait=False, cancel_futures=True)
+        raise
+    pool.shutdown()
+
+    cache = get_tts_cache()
+    logger.info(
+        "Synthesized %d TTS segments with %d workers in %.1fs (cache: %s)",
+        len(texts), workers, time.time() - start, cache.stats() if cache is not None else "off",
+    )
+    return results  # type: ignore[return-value]
+
+
+__all__ = ["synthesize_speech", "synthesize_many", "get_tts_cache", "OpenAITTSError"]
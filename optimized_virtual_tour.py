@@ -6,11 +6,16 @@ Uses streaming approach to minimize memory usage
 import os
 import numpy as np
 import logging
-from PIL import Image, ImageFilter, ImageEnhance
-import cv2
+from PIL import Image
 from dataclasses import dataclass
 from typing import List, Tuple, Optional
 import gc  # For garbage collection
+from frame_effects import get_vignette_mask, apply_frame_effects
+from video_encoder import FFmpegFrameSink
+from frame_generator import AffineFrameGenerator
+from parallel_render import ParallelFrameRenderer, get_parallel_workers
+from image_cache import PreparedImageCache
+from image_prep import ColorAdjustments, prepare_source
 
 logger = logging.getLogger(__name__)
 
@@ -50,6 +55,34 @@ OPTIMIZED_QUALITY_PRESETS = {
     }
 }
 
+# Seconds each photo is on screen, per quality
+SCENE_DURATIONS = {
+    'deployment': 3.0,
+    'medium': 4.5,
+    'high': 6.0,
+    'premium': 8.0  # 8 seconds per image for premium quality
+}
+
+# Crossfade between photos, and the fades/black padding at each end, in seconds
+TRANSITION_DURATION = 0.6
+FADE_DURATION = 0.5
+BLACK_DURATION = 0.5
+
+# Color boost per quality, plus light sharpening from 'high' up
+QUALITY_COLOR_ENHANCEMENT = {
+    'deployment': 1.05,
+    'medium': 1.08,
+    'high': 1.10,
+    'premium': 1.12
+}
+
+def quality_adjustments(quality: str) -> ColorAdjustments:
+    """Enhancements for a quality, matching ImageEnhance Color and Sharpness(1.1)"""
+    return ColorAdjustments(
+        color=QUALITY_COLOR_ENHANCEMENT.get(quality, 1.10),
+        sharpen=0.1 if quality in ('high', 'premium') else 0.0
+    )
+
 @dataclass
 class SimpleMovement:
     """Simplified movement pattern for memory efficiency"""
@@ -67,33 +100,30 @@ class OptimizedVirtualTour:
         
         self.fps = self.quality['fps']
         self.width, self.height = self.quality['resolution']
+        self.adjustments = quality_adjustments(quality)
         
-        # Video writer setup with robust codec detection
-        from video_codec_fix import get_working_video_writer
-        
-        self.writer, self.actual_output_path = get_working_video_writer(
-            output_path, self.fps, self.width, self.height
+        # Frames are piped straight into a single libx264 encode
+        self.writer = FFmpegFrameSink(
+            output_path, self.width, self.height, self.fps,
+            preset=self.quality['preset'], crf=self.quality['crf']
         )
-        
-        if not self.writer:
-            # Fallback to simple approach
-            fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-            self.writer = cv2.VideoWriter(output_path, fourcc, self.fps, (self.width, self.height), True)
-            self.actual_output_path = output_path
-            
-            if not self.writer.isOpened():
-                raise ValueError("Could not open video writer with any available codec")
-            logger.warning("Using fallback mp4v codec")
+        self.frame_generator = AffineFrameGenerator(self.width, self.height)
+        # Each photo is prepared once and reused by its scene, fades and transitions
+        self.image_cache = PreparedImageCache()
+        
+        # Optionally split each scene's frames across worker processes
+        self.parallel_renderer = None
+        workers = get_parallel_workers()
+        if workers:
+            try:
+                self.parallel_renderer = ParallelFrameRenderer(self.width, self.height, workers)
+            except Exception as e:
+                logger.warning(f"Parallel rendering unavailable, using a single thread: {e}")
     
     def get_simple_movement(self, index: int) -> SimpleMovement:
         """Get movement patterns with configurable duration based on quality"""
         # Longer durations for higher quality
-        base_duration = {
-            'deployment': 3.0,
-            'medium': 4.5,
-            'high': 6.0,
-            'premium': 8.0  # 8 seconds per image for premium quality
-        }.get(self.quality.get('name', 'high'), 5.0)
+        base_duration = SCENE_DURATIONS.get(self.quality.get('name', 'high'), 5.0)
         
         movements = [
             SimpleMovement(1.0, 1.2, 0.05, 0.0, base_duration),    # Slower, smoother zoom in
@@ -104,52 +134,26 @@ class OptimizedVirtualTour:
         return movements[index % len(movements)]
     
     def prepare_image_lightweight(self, image_path: str) -> np.ndarray:
-        """Prepare image with minimal memory usage"""
-        with Image.open(image_path) as img:
-            # Convert to RGB
-            if img.mode != 'RGB':
-                img = img.convert('RGB')
-            
-            # Better color enhancement for premium quality
-            quality_enhancement = {
-                'deployment': 1.05,
-                'medium': 1.08,
-                'high': 1.10,
-                'premium': 1.12
-            }.get(self.quality.get('name', 'high'), 1.10)
-            
-            enhancer = ImageEnhance.Color(img)
-            img = enhancer.enhance(quality_enhancement)
-            
-            # Add subtle sharpness for premium
-            if self.quality.get('name') in ['high', 'premium']:
-                enhancer = ImageEnhance.Sharpness(img)
-                img = enhancer.enhance(1.1)
-            
-            # Calculate scaling - use smaller buffer for movement
-            img_aspect = img.width / img.height
-            frame_aspect = self.width / self.height
-            scale_factor = 1.3  # Less buffer = less memory
-            
-            if img_aspect > frame_aspect:
-                new_height = int(self.height * scale_factor)
-                new_width = int(new_height * img_aspect)
-            else:
-                new_width = int(self.width * scale_factor)
-                new_height = int(new_width / img_aspect)
-            
-            # Resize with fast method
-            img = img.resize((new_width, new_height), Image.Resampling.BILINEAR)
-            
-            # Convert to numpy and immediately close PIL image
-            result = np.array(img)
-            
-        return result
+        """Prepare a BGR image 1.3x the frame, enhanced at that size"""
+        image, timings = prepare_source(
+            image_path, (self.width, self.height), 1.3,  # Less buffer = less memory
+            self.adjustments, channel_order='BGR',
+            resample=Image.Resampling.BILINEAR
+        )
+        logger.info(f"Prepared {os.path.basename(image_path)} in {timings['total'] * 1000:.0f}ms "
+                    f"(color {timings['adjust'] * 1000:.0f}ms)")
+        return image
     
-    def write_frame_with_movement(self, image: np.ndarray, t: float, movement: SimpleMovement):
-        """Extract and write a single frame with movement applied"""
-        h, w = image.shape[:2]
-        
+    def prepared_image(self, image_path: str) -> np.ndarray:
+        """Prepared BGR image from the render's cache (shared and read-only)"""
+        return self.image_cache.get_or_prepare(
+            image_path,
+            self.prepare_image_lightweight,
+            self.quality.get('name'), self.width, self.height
+        )
+    
+    def movement_crop(self, t: float, movement: SimpleMovement, w: int, h: int) -> Tuple[float, float, float, float]:
+        """Crop center and size at eased time t, for a w x h source"""
         # Calculate current zoom and position
         zoom = movement.zoom_start + (movement.zoom_end - movement.zoom_start) * t
         
@@ -161,78 +165,74 @@ class OptimizedVirtualTour:
         center_x = w / 2 + (movement.pan_x * w * t)
         center_y = h / 2 + (movement.pan_y * h * t)
         
-        # Calculate crop boundaries
-        x1 = max(0, int(center_x - viewport_w / 2))
-        y1 = max(0, int(center_y - viewport_h / 2))
-        x2 = min(w, int(x1 + viewport_w))
-        y2 = min(h, int(y1 + viewport_h))
-        
-        # Extract and resize frame
-        frame = image[y1:y2, x1:x2]
-        frame = cv2.resize(frame, (self.width, self.height), interpolation=cv2.INTER_LINEAR)
-        
-        # Convert RGB to BGR for OpenCV
-        frame_bgr = cv2.cvtColor(frame, cv2.COLOR_RGB2BGR)
+        return center_x, center_y, viewport_w, viewport_h
+    
+    def write_frame_with_movement(self, t: float, movement: SimpleMovement,
+                                  vignette_mask: Optional[np.ndarray] = None):
+        """Render and write a single frame of the loaded image with movement applied"""
+        h, w = self.frame_generator.source.shape[:2]
         
-        # Validate frame before writing
-        if frame_bgr.shape[:2] != (self.height, self.width):
-            logger.error(f"Frame size mismatch: expected {(self.height, self.width)}, got {frame_bgr.shape[:2]}")
-            frame_bgr = cv2.resize(frame_bgr, (self.width, self.height), interpolation=cv2.INTER_LINEAR)
+        # One subpixel warp into a reused buffer
+        frame = self.frame_generator.render_centered(*self.movement_crop(t, movement, w, h))
         
-        # Ensure frame is uint8
-        if frame_bgr.dtype != np.uint8:
-            frame_bgr = frame_bgr.astype(np.uint8)
+        if vignette_mask is not None:
+            apply_frame_effects(frame, vignette_mask)
         
         # Write frame with error handling
         try:
-            success = self.writer.write(frame_bgr)
+            success = self.writer.write(frame)
             if not success:
                 logger.error("Failed to write frame to video")
         except Exception as e:
             logger.error(f"Error writing frame: {e}")
     
     def add_simple_vignette(self, frame: np.ndarray) -> np.ndarray:
-        """Add simple vignette effect with minimal computation"""
+        """Add simple vignette effect in place using the cached mask"""
         h, w = frame.shape[:2]
-        
-        # Create simple radial gradient
-        center_x, center_y = w // 2, h // 2
-        max_dist = np.sqrt(center_x**2 + center_y**2)
-        
-        # Simple vignette calculation
-        Y, X = np.ogrid[:h, :w]
-        dist = np.sqrt((X - center_x)**2 + (Y - center_y)**2)
-        vignette = 1 - (dist / max_dist) * 0.3
-        vignette = np.clip(vignette, 0.7, 1.0)
-        
-        # Apply vignette
-        for c in range(3):
-            frame[:,:,c] = (frame[:,:,c] * vignette).astype(np.uint8)
-        
-        return frame
+        return apply_frame_effects(frame, get_vignette_mask(w, h, 0.3))
     
     def process_image_streaming(self, image_path: str, movement: SimpleMovement, apply_vignette: bool = False):
         """Process a single image and stream frames directly to video"""
         logger.info(f"Processing image: {os.path.basename(image_path)}")
         
-        # Load and prepare image
-        image = self.prepare_image_lightweight(image_path)
+        # Prepared and converted to BGR once per render
+        self.frame_generator.load(self.prepared_image(image_path))
         
         # Calculate number of frames
         num_frames = int(movement.duration * self.fps)
         
-        # Generate and write frames one at a time
-        for i in range(num_frames):
-            t = i / (num_frames - 1) if num_frames > 1 else 0
-            t = self.ease_in_out(t)  # Simple easing
+        if self.parallel_renderer is not None:
+            self.write_frames_parallel(movement, num_frames, apply_vignette)
+        else:
+            vignette_mask = get_vignette_mask(self.width, self.height, 0.3) if apply_vignette else None
             
-            # Write frame with movement
-            self.write_frame_with_movement(image, t, movement)
+            # Generate and write frames one at a time
+            for i in range(num_frames):
+                t = i / (num_frames - 1) if num_frames > 1 else 0
+                t = self.ease_in_out(t)  # Simple easing
+                
+                # Write frame with movement
+                self.write_frame_with_movement(t, movement, vignette_mask)
         
         # Free memory
-        del image
+        self.frame_generator.source = None
         gc.collect()
     
+    def write_frames_parallel(self, movement: SimpleMovement, num_frames: int, apply_vignette: bool):
+        """Render the loaded image's frames across worker processes, in order"""
+        source = self.frame_generator.source
+        h, w = source.shape[:2]
+        
+        matrices = np.zeros((num_frames, 2, 3), dtype=np.float64)
+        for i in range(num_frames):
+            t = i / (num_frames - 1) if num_frames > 1 else 0
+            t = self.ease_in_out(t)
+            self.frame_generator.centered_matrix(*self.movement_crop(t, movement, w, h), (w, h), out=matrices[i])
+        
+        for frame in self.parallel_renderer.render_scene(source, matrices, 0.3 if apply_vignette else None):
+            if not self.writer.write(frame):
+                logger.error("Failed to write frame to video")
+    
     def ease_in_out(self, t: float) -> float:
         """Smooth cubic ease in-out for professional movement"""
         if t < 0.5:
@@ -252,43 +252,24 @@ class OptimizedVirtualTour:
     
     def write_fade_in(self, image_path: str, duration: float = 0.5):
         """Write fade in from black"""
-        image = self.prepare_image_lightweight(image_path)
-        frame_rgb = self.extract_static_frame(image)
-        frame_bgr = cv2.cvtColor(frame_rgb, cv2.COLOR_RGB2BGR)
+        frame_bgr = self.extract_static_frame(self.prepared_image(image_path))
         
         num_frames = int(duration * self.fps)
+        faded_frame = np.empty_like(frame_bgr)
         for i in range(num_frames):
             alpha = i / num_frames
-            faded_frame = (frame_bgr * alpha).astype(np.uint8)
+            apply_frame_effects(frame_bgr, gain=alpha, out=faded_frame)
             try:
                 self.writer.write(faded_frame)
             except Exception as e:
                 logger.error(f"Error writing faded frame: {e}")
         
-        del image, frame_rgb, frame_bgr
-        gc.collect()
+        del frame_bgr
     
     def extract_static_frame(self, image: np.ndarray) -> np.ndarray:
-        """Extract a static frame from image center"""
-        h, w = image.shape[:2]
-        
-        # Calculate crop for frame aspect ratio
-        img_aspect = w / h
-        frame_aspect = self.width / self.height
-        
-        if img_aspect > frame_aspect:
-            # Image is wider - crop width
-            new_width = int(h * frame_aspect)
-            x1 = (w - new_width) // 2
-            cropped = image[:, x1:x1+new_width]
-        else:
-            # Image is taller - crop height
-            new_height = int(w / frame_aspect)
-            y1 = (h - new_height) // 2
-            cropped = image[y1:y1+new_height, :]
-        
-        # Resize to output size
-        return cv2.resize(cropped, (self.width, self.height), interpolation=cv2.INTER_LINEAR)
+        """Extract a static frame from the center of a prepared BGR image"""
+        # Copy out of the generator's ring so the frame can be held
+        return self.frame_generator.render_cover(image).copy()
     
     def write_simple_transition(self, image1_path: str, image2_path: str, duration: float = None):
         """Write a smooth crossfade transition between two images"""
@@ -301,17 +282,9 @@ class OptimizedVirtualTour:
                 'premium': 1.2
             }.get(self.quality.get('name', 'high'), 0.8)
         """Write a simple crossfade transition between two images"""
-        # Load both images
-        img1 = self.prepare_image_lightweight(image1_path)
-        img2 = self.prepare_image_lightweight(image2_path)
-        
-        # Extract static frames
-        frame1_rgb = self.extract_static_frame(img1)
-        frame2_rgb = self.extract_static_frame(img2)
-        
-        # Convert to BGR
-        frame1_bgr = cv2.cvtColor(frame1_rgb, cv2.COLOR_RGB2BGR)
-        frame2_bgr = cv2.cvtColor(frame2_rgb, cv2.COLOR_RGB2BGR)
+        # Both images were already prepared for their scenes
+        frame1_bgr = self.extract_static_frame(self.prepared_image(image1_path))
+        frame2_bgr = self.extract_static_frame(self.prepared_image(image2_path))
         
         # Write transition frames
         num_frames = int(duration * self.fps)
@@ -319,23 +292,29 @@ class OptimizedVirtualTour:
             alpha = i / (num_frames - 1)
             alpha = self.ease_in_out(alpha)
             
-            # Crossfade
-            frame = cv2.addWeighted(frame1_bgr, 1 - alpha, frame2_bgr, alpha, 0)
+            # Crossfade in place into a reused buffer
+            frame = self.frame_generator.blend(frame1_bgr, frame2_bgr, alpha)
             try:
                 self.writer.write(frame)
             except Exception as e:
                 logger.error(f"Error writing transition frame: {e}")
         
         # Free memory
-        del img1, img2, frame1_rgb, frame2_rgb, frame1_bgr, frame2_bgr
+        del frame1_bgr, frame2_bgr
         gc.collect()
     
+    def close_parallel_renderer(self):
+        """Stop the worker pool and free its shared memory"""
+        if self.parallel_renderer is not None:
+            self.parallel_renderer.close()
+            self.parallel_renderer = None
+    
     def create_optimized_tour(self, image_paths: List[str]):
         """Create virtual tour with streaming approach"""
         logger.info(f"Creating optimized virtual tour with {len(image_paths)} images")
         
         # Add 0.5 second black at start
-        self.write_black_frames(int(0.5 * self.fps))
+        self.write_black_frames(int(BLACK_DURATION * self.fps))
         
         # Process each image
         for i, image_path in enumerate(image_paths):
@@ -343,65 +322,53 @@ class OptimizedVirtualTour:
             
             if i == 0:
                 # Fade in first image
-                self.write_fade_in(image_path, duration=0.5)
+                self.write_fade_in(image_path, duration=FADE_DURATION)
             
             # Process image with movement
             self.process_image_streaming(image_path, movement)
             
             # Add transition to next image (except for last)
             if i < len(image_paths) - 1:
-                self.write_simple_transition(image_path, image_paths[i + 1], duration=0.6)
+                self.write_simple_transition(image_path, image_paths[i + 1], duration=TRANSITION_DURATION)
         
         # Add fade out
         if image_paths:
-            last_image = self.prepare_image_lightweight(image_paths[-1])
-            frame_rgb = self.extract_static_frame(last_image)
-            frame_bgr = cv2.cvtColor(frame_rgb, cv2.COLOR_RGB2BGR)
+            frame_bgr = self.extract_static_frame(self.prepared_image(image_paths[-1]))
             
-            fade_frames = int(0.5 * self.fps)
+            fade_frames = int(FADE_DURATION * self.fps)
+            frame = np.empty_like(frame_bgr)
             for j in range(fade_frames):
                 alpha = 1 - (j / fade_frames)
-                frame = (frame_bgr * alpha).astype(np.uint8)
+                apply_frame_effects(frame_bgr, gain=alpha, out=frame)
                 try:
                     self.writer.write(frame)
                 except Exception as e:
                     logger.error(f"Error writing fade out frame: {e}")
             
-            del last_image, frame_rgb, frame_bgr
-            gc.collect()
+            del frame_bgr
         
         # Add 0.5 second black at end
-        self.write_black_frames(int(0.5 * self.fps))
+        self.write_black_frames(int(BLACK_DURATION * self.fps))
         
-        # Clean up
-        try:
-            self.writer.release()
-            cv2.destroyAllWindows()
-        except Exception as e:
-            logger.error(f"Error releasing video writer: {e}")
+        self.close_parallel_renderer()
+        logger.info(f"Prepared image cache: {self.image_cache.stats()}")
+        self.image_cache.clear()
         
-        # Verify output file (check actual output path which might be different)
-        output_to_check = getattr(self, 'actual_output_path', self.output_path)
-        if os.path.exists(output_to_check):
-            file_size = os.path.getsize(output_to_check)
-            if file_size > 0:
-                logger.info(f"Optimized virtual tour created: {output_to_check} (size: {file_size / 1024 / 1024:.2f} MB)")
-                # If output path changed (e.g., to AVI), rename to requested MP4
-                if output_to_check != self.output_path and output_to_check.endswith('.avi'):
-                    try:
-                        os.rename(output_to_check, self.output_path)
-                        logger.info(f"Renamed {output_to_check} to {self.output_path}")
-                        return self.output_path
-                    except:
-                        logger.warning(f"Could not rename to MP4, returning {output_to_check}")
-                        return output_to_check
-                return output_to_check
-            else:
-                logger.error(f"Output file is empty: {output_to_check}")
-                raise ValueError("Generated video file is empty")
-        else:
-            logger.error(f"Output file not found: {output_to_check}")
-            raise ValueError("Failed to create video file")
+        # Finish the encode; raises if ffmpeg failed
+        self.writer.close()
+        
+        file_size = os.path.getsize(self.output_path)
+        logger.info(f"Optimized virtual tour created: {self.output_path} (size: {file_size / 1024 / 1024:.2f} MB)")
+        return self.output_path
+
+
+def tour_seconds(image_count: int, quality: str) -> float:
+    """Length of a tour of image_count photos at the given quality"""
+    if image_count <= 0:
+        return 0.0
+    scene = SCENE_DURATIONS.get(quality, 5.0)
+    return (image_count * scene + (image_count - 1) * TRANSITION_DURATION
+            + 2 * FADE_DURATION + 2 * BLACK_DURATION)
 
 
 def create_optimized_tour(image_paths: List[str], output_path: str, job_id: str, quality: str = None) -> str:
@@ -409,10 +376,14 @@ def create_optimized_tour(image_paths: List[str], output_path: str, job_id: str,
     try:
         # Auto-detect quality based on environment
         if quality is None:
+            from capacity_model import CAPACITY_PLANNING_ENABLED, get_capacity_model
             # Check for forced premium quality first
             if os.environ.get('FORCE_PREMIUM_QUALITY', '').lower() in ['true', '1', 'yes']:
                 quality = 'premium'
                 logger.info("FORCE_PREMIUM_QUALITY enabled - using premium quality")
+            elif CAPACITY_PLANNING_ENABLED:
+                # Best quality this host can render within the deadline
+                quality = get_capacity_model().plan(len(image_paths), engines=['auto']).quality
             elif os.environ.get('RAILWAY_ENVIRONMENT') or os.environ.get('RAILWAY_STATIC_URL'):
                 quality = 'deployment'  # Use optimized for Railway
                 logger.info("Detected Railway environment, using deployment quality")
@@ -433,7 +404,12 @@ def create_optimized_tour(image_paths: List[str], output_path: str, job_id: str,
         logger.info(f"Expected processing time: {expected_times.get(quality, '60 seconds')}")
         
         tour = OptimizedVirtualTour(output_path, quality=quality)
-        return tour.create_optimized_tour(image_paths)
+        try:
+            return tour.create_optimized_tour(image_paths)
+        except Exception:
+            tour.close_parallel_renderer()
+            tour.writer.abort()
+            raise
     except Exception as e:
         logger.error(f"Error creating optimized tour: {e}")
         import traceback
@@ -0,0 +1,210 @@
+"""
+Multi-process frame rendering for the OpenCV tour engines
+The prepared source image is placed in shared memory once per scene and
+worker processes warp its frames straight into a shared ring of output
+slots. The parent reads the slots back in frame order and feeds them to the
+encoder sink, so the only per-frame copy is the pipe write to ffmpeg.
+"""
+import os
+import logging
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import resource_tracker, shared_memory
+from typing import Dict, Iterator, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Worker processes for frame rendering (0 or 1 renders on the calling thread)
+PARALLEL_RENDER_WORKERS = int(os.environ.get('PARALLEL_RENDER_WORKERS', '0'))
+# Frames rendered but not yet encoded; bounds the shared output ring (0 = 3 per worker)
+PARALLEL_RENDER_MAX_INFLIGHT = int(os.environ.get('PARALLEL_RENDER_MAX_INFLIGHT', '0'))
+# Frames per task sent to a worker
+PARALLEL_RENDER_CHUNK = int(os.environ.get('PARALLEL_RENDER_CHUNK', '1'))
+# 'spawn' is safe to use from the threaded web server; 'fork' starts faster
+PARALLEL_RENDER_START_METHOD = os.environ.get('PARALLEL_RENDER_START_METHOD', 'spawn')
+
+# Shared memory attached in each worker, by name
+_worker_segments: Dict[str, shared_memory.SharedMemory] = {}
+
+
+def _init_worker():
+    import cv2
+    # One OpenCV thread per process; the pool provides the parallelism
+    cv2.setNumThreads(1)
+
+
+def _open_untracked(name: str) -> shared_memory.SharedMemory:
+    """
+    Attach to the parent's segment without registering it with the resource tracker
+
+    Only the parent owns cleanup (bpo-38119). Unregistering after attaching
+    would also drop the parent's entry in the tracker the workers share, and
+    the parent's unlink() would then fail inside the tracker.
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)  # Python 3.13+
+    except TypeError:
+        pass
+    # Workers run one task at a time, so swapping the hook out is safe here
+    register = resource_tracker.register
+    resource_tracker.register = lambda *args, **kwargs: None
+    try:
+        return shared_memory.SharedMemory(name=name)
+    finally:
+        resource_tracker.register = register
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    segment = _worker_segments.get(name)
+    if segment is None:
+        segment = _open_untracked(name)
+        _worker_segments[name] = segment
+    return segment
+
+
+def _detach_except(keep) -> None:
+    for name in list(_worker_segments):
+        if name not in keep:
+            _worker_segments.pop(name).close()
+
+
+def _render_chunk(source_name: str, source_shape: Tuple[int, ...],
+                  ring_name: str, ring_slots: int,
+                  frame_size: Tuple[int, int], interpolation: int,
+                  vignette_strength: Optional[float],
+                  first_index: int, matrices: np.ndarray) -> int:
+    """Worker: warp frames first_index.. into their ring slots"""
+    import cv2
+    from frame_effects import get_vignette_mask, apply_frame_effects
+
+    # Scenes come one after another; drop attachments to finished scenes
+    _detach_except((source_name, ring_name))
+    source = np.ndarray(source_shape, dtype=np.uint8, buffer=_attach(source_name).buf)
+    width, height = frame_size
+    ring = np.ndarray((ring_slots, height, width, 3), dtype=np.uint8, buffer=_attach(ring_name).buf)
+
+    mask = get_vignette_mask(width, height, vignette_strength) if vignette_strength else None
+    for offset, matrix in enumerate(matrices):
+        frame = ring[(first_index + offset) % ring_slots]
+        cv2.warpAffine(source, matrix, frame_size, dst=frame,
+                       flags=interpolation, borderMode=cv2.BORDER_REPLICATE)
+        if mask is not None:
+            apply_frame_effects(frame, mask)
+    return len(matrices)
+
+
+class ParallelFrameRenderer:
+    """
+    Render scenes across a pool of worker processes
+
+    Frames yielded by render_scene are views into the shared ring and are
+    reused `max_inflight` frames later, so write each one before advancing.
+    """
+
+    def __init__(self, width: int, height: int, workers: Optional[int] = None,
+                 max_inflight: Optional[int] = None, chunk_size: Optional[int] = None,
+                 interpolation: Optional[int] = None):
+        import cv2
+
+        self.width = width
+        self.height = height
+        self.workers = max(1, workers or PARALLEL_RENDER_WORKERS or (os.cpu_count() or 1))
+        self.chunk_size = max(1, chunk_size or PARALLEL_RENDER_CHUNK)
+        inflight = max_inflight or PARALLEL_RENDER_MAX_INFLIGHT or self.workers * 3
+        # Every worker needs at least one full chunk of room
+        self.max_inflight = max(inflight, self.workers * self.chunk_size)
+        self.interpolation = cv2.INTER_LINEAR if interpolation is None else interpolation
+
+        frame_bytes = width * height * 3
+        self._ring_shm = shared_memory.SharedMemory(create=True, size=self.max_inflight * frame_bytes)
+        self._ring = np.ndarray((self.max_inflight, height, width, 3), dtype=np.uint8, buffer=self._ring_shm.buf)
+
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context(PARALLEL_RENDER_START_METHOD),
+            initializer=_init_worker
+        )
+        logger.info(
+            f"Parallel renderer: {self.workers} workers, {self.max_inflight} frames in flight "
+            f"({self.max_inflight * frame_bytes / 1024 / 1024:.0f} MB ring)"
+        )
+
+    def render_scene(self, source: np.ndarray, matrices: np.ndarray,
+                     vignette_strength: Optional[float] = None) -> Iterator[np.ndarray]:
+        """
+        Yield the scene's frames in order
+
+        Args:
+            source: uint8 BGR source image (copied once into shared memory)
+            matrices: (frames, 2, 3) source-to-output affine matrices
+            vignette_strength: Vignette applied by the workers, or None
+        """
+        source = np.ascontiguousarray(source, dtype=np.uint8)
+        source_shm = shared_memory.SharedMemory(create=True, size=source.nbytes)
+        pending = deque()
+        try:
+            np.ndarray(source.shape, dtype=np.uint8, buffer=source_shm.buf)[:] = source
+
+            total = len(matrices)
+            submitted = 0
+            consumed = 0
+            while consumed < total:
+                # Keep the pool busy without overrunning the ring
+                while submitted < total:
+                    count = min(self.chunk_size, total - submitted)
+                    if submitted + count - consumed > self.max_inflight:
+                        break
+                    future = self._pool.submit(
+                        _render_chunk,
+                        source_shm.name, source.shape,
+                        self._ring_shm.name, self.max_inflight,
+                        (self.width, self.height), self.interpolation,
+                        vignette_strength,
+                        submitted, np.ascontiguousarray(matrices[submitted:submitted + count])
+                    )
+                    pending.append((submitted, count, future))
+                    submitted += count
+
+                # Reassemble in order: wait for the oldest chunk, then hand out its frames
+                first, count, future = pending.popleft()
+                future.result()
+                for index in range(first, first + count):
+                    yield self._ring[index % self.max_inflight]
+                    consumed += 1
+        finally:
+            # Workers may still be writing into the ring or reading the source
+            for _, _, future in pending:
+                future.cancel()
+            for _, _, future in pending:
+                if not future.cancelled():
+                    try:
+                        future.result()
+                    except Exception:
+                        pass
+            source_shm.close()
+            source_shm.unlink()
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=True)
+        # Drop our view before releasing the buffer it points into
+        self._ring = None
+        self._ring_shm.close()
+        self._ring_shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+def get_parallel_workers() -> int:
+    """Configured worker count; 0 when parallel rendering is off"""
+    return PARALLEL_RENDER_WORKERS if PARALLEL_RENDER_WORKERS > 1 else 0
+
+
+__all__ = ['ParallelFrameRenderer', 'get_parallel_workers']
@@ -7,13 +7,16 @@ that simulate walking through a property
 import os
 import numpy as np
 import logging
-from PIL import Image, ImageFilter, ImageEnhance
 import cv2
 from dataclasses import dataclass
-from typing import List, Tuple, Dict, Optional
+from typing import List, Tuple, Dict, Optional, Iterator
 import math
 import random
 from tour_config import TOUR_STYLES, MOVEMENT_PATTERNS, QUALITY_PRESETS, DEFAULT_STYLE
+from frame_effects import get_vignette_mask, apply_frame_effects
+from video_encoder import FFmpegFrameSink
+from frame_generator import AffineFrameGenerator
+from image_prep import adjustments_for_style, prepare_source
 
 logger = logging.getLogger(__name__)
 
@@ -33,6 +36,7 @@ class ProfessionalVirtualTour:
     def __init__(self, output_path: str, style: str = DEFAULT_STYLE, quality: str = 'high'):
         self.output_path = output_path
         self.style = TOUR_STYLES.get(style, TOUR_STYLES[DEFAULT_STYLE])
+        self.adjustments = adjustments_for_style(self.style)
         self.quality = QUALITY_PRESETS.get(quality, QUALITY_PRESETS['high'])
         
         # Get settings from quality preset
@@ -43,43 +47,12 @@ class ProfessionalVirtualTour:
         # Get style-specific movement patterns
         self.movement_pool = [MOVEMENT_PATTERNS[m] for m in self.style['preferred_movements'] if m in MOVEMENT_PATTERNS]
         
-        # Video writer setup with robust codec detection
-        self.writer = None
-        codecs_to_try = [
-            ('H264', 'avc1'),  # H.264 - most compatible
-            ('H264', 'h264'),
-            ('H264', 'H264'),
-            ('MPEG-4', 'mp4v'),
-            ('MPEG-4', 'MP4V'),
-            ('MJPEG', 'mjpeg')
-        ]
-        
-        for codec_name, fourcc_code in codecs_to_try:
-            try:
-                fourcc = cv2.VideoWriter_fourcc(*fourcc_code)
-                self.writer = cv2.VideoWriter(
-                    output_path, 
-                    fourcc, 
-                    self.fps, 
-                    (self.width, self.height),
-                    isColor=True
-                )
-                
-                if self.writer.isOpened():
-                    logger.info(f"Successfully opened video writer with codec: {codec_name} ({fourcc_code})")
-                    break
-                else:
-                    logger.warning(f"Failed to open writer with codec: {codec_name} ({fourcc_code})")
-                    self.writer.release()
-                    self.writer = None
-            except Exception as e:
-                logger.warning(f"Error trying codec {codec_name}: {e}")
-                if self.writer:
-                    self.writer.release()
-                self.writer = None
-        
-        if not self.writer or not self.writer.isOpened():
-            raise ValueError("Could not open video writer with any available codec")
+        # Frames are piped straight into a single libx264 encode
+        self.writer = FFmpegFrameSink(
+            output_path, self.width, self.height, self.fps,
+            preset=self.quality['preset'], crf=self.quality['crf']
+        )
+        self.frame_generator = AffineFrameGenerator(self.width, self.height, interpolation=cv2.INTER_LANCZOS4)
         
     def ease_in_out(self, t: float) -> float:
         """Smooth easing function for natural motion"""
@@ -133,115 +106,81 @@ class ProfessionalVirtualTour:
         )
     
     def prepare_image(self, image_path: str) -> np.ndarray:
-        """Prepare image with professional enhancements"""
-        with Image.open(image_path) as img:
-            # Convert to RGB
-            if img.mode != 'RGB':
-                img = img.convert('RGB')
-            
-            # Enhance image quality based on style
-            enhancer = ImageEnhance.Contrast(img)
-            img = enhancer.enhance(1.1)  # Slight contrast boost
-            
-            enhancer = ImageEnhance.Color(img)
-            img = enhancer.enhance(self.style['color_enhancement'])  # Style-specific color enhancement
-            
-            # Add subtle brightness adjustment for consistency
-            enhancer = ImageEnhance.Brightness(img)
-            img = enhancer.enhance(1.02)
-            
-            # Calculate scaling to cover frame with room for movement
-            img_aspect = img.width / img.height
-            frame_aspect = self.width / self.height
-            
-            # Scale up by 1.5x to allow for zoom and pan
-            scale_factor = 1.5
-            
-            if img_aspect > frame_aspect:
-                # Image is wider
-                new_height = int(self.height * scale_factor)
-                new_width = int(new_height * img_aspect)
-            else:
-                # Image is taller
-                new_width = int(self.width * scale_factor)
-                new_height = int(new_width / img_aspect)
-            
-            # High-quality resize
-            img = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
-            
-            # Apply subtle sharpening
-            img = img.filter(ImageFilter.UnsharpMask(radius=1, percent=50, threshold=3))
-            
-            return np.array(img)
+        """Prepare a BGR image with the style's enhancements, 1.5x the frame for zoom and pan"""
+        image, timings = prepare_source(
+            image_path, (self.width, self.height), 1.5,
+            self.adjustments, channel_order='BGR'
+        )
+        logger.info(f"Prepared {os.path.basename(image_path)} in {timings['total'] * 1000:.0f}ms "
+                    f"(color {timings['adjust'] * 1000:.0f}ms)")
+        return image
     
     def extract_frame(self, image: np.ndarray, x: float, y: float, zoom: float) -> np.ndarray:
-        """Extract a frame from the image with given position and zoom"""
-        h, w = image.shape[:2]
-        
-        # Calculate viewport size based on zoom
-        viewport_w = self.width / zoom
-        viewport_h = self.height / zoom
-        
-        # Calculate position in pixels
-        center_x = x * w
-        center_y = y * h
+        """
+        Extract a frame from the image with given position and zoom
         
-        # Calculate crop boundaries
-        x1 = int(center_x - viewport_w / 2)
-        y1 = int(center_y - viewport_h / 2)
-        x2 = int(x1 + viewport_w)
-        y2 = int(y1 + viewport_h)
-        
-        # Ensure boundaries are within image
-        x1 = max(0, x1)
-        y1 = max(0, y1)
-        x2 = min(w, x2)
-        y2 = min(h, y2)
-        
-        # Extract and resize frame
-        frame = image[y1:y2, x1:x2]
-        frame = cv2.resize(frame, (self.width, self.height), interpolation=cv2.INTER_LANCZOS4)
+        Returns one of the frame generator's reused buffers.
+        """
+        h, w = image.shape[:2]
         
-        return frame
+        # Viewport size based on zoom, centered on the position
+        return self.frame_generator.render_centered(
+            x * w, y * h, self.width / zoom, self.height / zoom, image
+        )
     
-    def create_transition(self, img1: np.ndarray, img2: np.ndarray, duration: Optional[float] = None) -> List[np.ndarray]:
-        """Create smooth crossfade transition between images"""
+    def iter_transition(self, img1: np.ndarray, img2: np.ndarray, duration: Optional[float] = None,
+                        include_end: bool = True) -> Iterator[np.ndarray]:
+        """
+        Yield smooth crossfade transition frames between images
+        
+        Frames are blended into the frame generator's reused buffers, so
+        img1 and img2 must be copies rather than generator buffers.
+        """
         if duration is None:
             duration = self.style['transition_duration']
         
-        frames = []
         num_frames = int(duration * self.fps)
         
-        for i in range(num_frames):
-            alpha = i / (num_frames - 1)
+        for i in range(num_frames if include_end else num_frames - 1):
+            alpha = i / (num_frames - 1) if num_frames > 1 else 1.0
             alpha = self.ease_in_out(alpha)
             
-            # Crossfade
-            frame = cv2.addWeighted(img1, 1 - alpha, img2, alpha, 0)
+            # Crossfade in place
+            frame = self.frame_generator.blend(img1, img2, alpha)
             
             # Add subtle fade to black at midpoint
             if 0.4 < alpha < 0.6:
                 darkness = 1 - abs(alpha - 0.5) * 4
-                frame = (frame * (1 - darkness * 0.3)).astype(np.uint8)
+                apply_frame_effects(frame, gain=1 - darkness * 0.3)
             
-            frames.append(frame)
-        
-        return frames
+            yield frame
     
-    def add_image_sequence(self, image_path: str, movement: CameraMovement, index: int):
+    def create_transition(self, img1: np.ndarray, img2: np.ndarray, duration: Optional[float] = None) -> List[np.ndarray]:
+        """Create smooth crossfade transition between images"""
+        return [frame.copy() for frame in self.iter_transition(img1, img2, duration)]
+    
+    def add_image_sequence(self, image_path: str, movement: CameraMovement, index: int) -> List[np.ndarray]:
         """Add an image with professional camera movement"""
+        return [frame.copy() for frame in self.iter_image_sequence(image_path, movement, index)]
+    
+    def iter_image_sequence(self, image_path: str, movement: CameraMovement, index: int) -> Iterator[np.ndarray]:
+        """Yield the frames of one image's camera movement, one at a time"""
         logger.info(f"Processing image {index}: {os.path.basename(image_path)}")
         
-        # Prepare image
-        image = self.prepare_image(image_path)
-        image_bgr = cv2.cvtColor(image, cv2.COLOR_RGB2BGR)
+        # Prepare image, already in BGR
+        image_bgr = self.prepare_image(image_path)
         
         # Generate frames for this image
         num_frames = int(movement.duration * self.fps)
-        frames = []
+        
+        # Vignette based on style, stronger on the first image
+        vignette_strength = self.style['vignette_strength']
+        if index == 0:
+            vignette_strength *= 1.5
+        vignette_mask = get_vignette_mask(self.width, self.height, vignette_strength)
         
         for i in range(num_frames):
-            t = i / (num_frames - 1)
+            t = i / (num_frames - 1) if num_frames > 1 else 0
             t_eased = self.apply_easing(t, movement.easing)
             
             # Interpolate position and zoom
@@ -249,48 +188,32 @@ class ProfessionalVirtualTour:
             y = movement.start_y + (movement.end_y - movement.start_y) * t_eased
             zoom = movement.start_zoom + (movement.end_zoom - movement.start_zoom) * t_eased
             
-            # Extract frame
+            # Extract frame and apply the vignette in place
             frame = self.extract_frame(image_bgr, x, y, zoom)
+            apply_frame_effects(frame, vignette_mask)
             
-            # Add vignette based on style
-            vignette_strength = self.style['vignette_strength']
-            if index == 0:  # Stronger vignette on first image
-                frame = self.add_vignette(frame, strength=vignette_strength * 1.5)
-            else:
-                frame = self.add_vignette(frame, strength=vignette_strength)
-            
-            frames.append(frame)
-        
-        return frames
+            yield frame
     
     def add_vignette(self, image: np.ndarray, strength: float = 0.2) -> np.ndarray:
-        """Add subtle vignette effect"""
+        """Add subtle vignette effect using the cached mask for this frame size"""
         h, w = image.shape[:2]
-        
-        # Create radial gradient
-        Y, X = np.ogrid[:h, :w]
-        center_y, center_x = h / 2, w / 2
-        
-        # Calculate distance from center
-        dist_from_center = np.sqrt((X - center_x)**2 + (Y - center_y)**2)
-        max_dist = np.sqrt(center_x**2 + center_y**2)
-        
-        # Create vignette mask
-        vignette = 1 - (dist_from_center / max_dist) * strength
-        vignette = np.clip(vignette, 0, 1)
-        vignette = vignette[..., np.newaxis]
-        
-        # Apply vignette
-        return (image * vignette).astype(np.uint8)
+        return apply_frame_effects(image.copy(), get_vignette_mask(w, h, strength))
     
-    def create_tour(self, image_paths: List[str]):
-        """Create the complete virtual tour"""
-        all_frames = []
-        
+    def iter_tour_frames(self, image_paths: List[str]) -> Iterator[np.ndarray]:
+        """
+        Yield every frame of the tour in order
+        
+        Each image is rendered exactly once; only copies of the boundary
+        frames of adjacent scenes are kept around for transitions and fades.
+        Frames live in reused buffers, so consume each one before advancing.
+        """
         # Add 1 second black at start
         black_frame = np.zeros((self.height, self.width, 3), dtype=np.uint8)
+        fade_buffer = np.empty_like(black_frame)
         for _ in range(self.fps):
-            all_frames.append(black_frame)
+            yield black_frame
+        
+        last_frame = None
         
         # Process each image
         for i, image_path in enumerate(image_paths):
@@ -298,46 +221,52 @@ class ProfessionalVirtualTour:
             img_aspect = 1.5  # Approximate, will be calculated per image
             movement = self.get_movement_pattern(i, img_aspect)
             
-            # Generate frames for this image
-            frames = self.add_image_sequence(image_path, movement, i)
+            scene = self.iter_image_sequence(image_path, movement, i)
+            first_frame = next(scene, None)
+            if first_frame is None:
+                continue
             
-            # Add frames to video
-            if i == 0:
+            if last_frame is None:
                 # First image - fade in from black
                 fade_frames = int(0.5 * self.fps)
                 for j in range(fade_frames):
                     alpha = j / fade_frames
-                    frame = (frames[0] * alpha).astype(np.uint8)
-                    all_frames.append(frame)
-            
-            # Add main frames
-            all_frames.extend(frames)
+                    yield apply_frame_effects(first_frame, gain=alpha, out=fade_buffer)
+            else:
+                # Transition from the previous scene's last frame, dropping the
+                # final transition frame to avoid a duplicate
+                first_frame = first_frame.copy()
+                yield from self.iter_transition(last_frame, first_frame, include_end=False)
             
-            # Add transition to next image (except for last)
-            if i < len(image_paths) - 1:
-                next_movement = self.get_movement_pattern(i + 1, img_aspect)
-                next_frames = self.add_image_sequence(image_paths[i + 1], next_movement, i + 1)
-                
-                # Create transition
-                transition_frames = self.create_transition(frames[-1], next_frames[0])
-                all_frames.extend(transition_frames[:-1])  # Avoid duplicate frame
+            # Stream this scene's frames, keeping a copy of the last one
+            last_frame = first_frame
+            yield first_frame
+            for frame in scene:
+                last_frame = frame
+                yield frame
+            last_frame = last_frame.copy()
+        
+        if last_frame is None:
+            last_frame = black_frame
         
         # Add fade out at end
         fade_frames = int(1.0 * self.fps)
-        last_frame = all_frames[-1]
         for j in range(fade_frames):
             alpha = 1 - (j / fade_frames)
-            frame = (last_frame * alpha).astype(np.uint8)
-            all_frames.append(frame)
+            yield apply_frame_effects(last_frame, gain=alpha, out=fade_buffer)
         
         # Add 0.5 second black at end
         for _ in range(int(0.5 * self.fps)):
-            all_frames.append(black_frame)
-        
-        # Write all frames with validation
-        logger.info(f"Writing {len(all_frames)} frames to video...")
+            yield black_frame
+    
+    def create_tour(self, image_paths: List[str]):
+        """Create the complete virtual tour, streaming frames to the encoder"""
+        logger.info(f"Streaming virtual tour frames for {len(image_paths)} images...")
         frames_written = 0
-        for i, frame in enumerate(all_frames):
+        frame_total = 0
+        for i, frame in enumerate(self.iter_tour_frames(image_paths)):
+            frame_total += 1
+            
             # Validate frame
             if frame.shape[:2] != (self.height, self.width):
                 logger.warning(f"Frame {i} size mismatch: expected {(self.height, self.width)}, got {frame.shape[:2]}")
@@ -357,27 +286,14 @@ class ProfessionalVirtualTour:
             except Exception as e:
                 logger.error(f"Error writing frame {i}: {e}")
         
-        logger.info(f"Successfully wrote {frames_written}/{len(all_frames)} frames")
+        logger.info(f"Successfully wrote {frames_written}/{frame_total} frames")
         
-        # Clean up
-        try:
-            self.writer.release()
-            cv2.destroyAllWindows()
-        except Exception as e:
-            logger.error(f"Error releasing video writer: {e}")
+        # Finish the encode; raises if ffmpeg failed
+        self.writer.close()
         
-        # Verify output file
-        if os.path.exists(self.output_path):
-            file_size = os.path.getsize(self.output_path)
-            if file_size > 0:
-                logger.info(f"Professional virtual tour created: {self.output_path} (size: {file_size / 1024 / 1024:.2f} MB)")
-                return self.output_path
-            else:
-                logger.error(f"Output file is empty: {self.output_path}")
-                raise ValueError("Generated video file is empty")
-        else:
-            logger.error(f"Output file not found: {self.output_path}")
-            raise ValueError("Failed to create video file")
+        file_size = os.path.getsize(self.output_path)
+        logger.info(f"Professional virtual tour created: {self.output_path} (size: {file_size / 1024 / 1024:.2f} MB)")
+        return self.output_path
 
 
 def create_professional_tour(image_paths: List[str], output_path: str, job_id: str, style: str = 'luxury', quality: str = None) -> str:
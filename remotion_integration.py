@@ -1,6 +1,12 @@
 """
 Remotion Integration for Real Estate Virtual Tours
 Provides an alternative to Creatomate with full control over Ken Burns effects
+
+Renders run locally against a pre-built Remotion bundle: the `remotion-tours`
+project is bundled once, and every render reuses that serve URL instead of
+re-bundling. Props are passed via a JSON file and each render runs in its own
+working directory under a bounded pool, so renders are safe to run from
+request threads.
 """
 import os
 import json
@@ -8,16 +14,236 @@ import subprocess
 import logging
 import tempfile
 import shutil
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
 from typing import List, Dict, Optional
 
 logger = logging.getLogger(__name__)
 
+REMOTION_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'remotion-tours')
+REMOTION_ENTRY_POINT = os.path.join('src', 'index.tsx')
+REMOTION_COMPOSITION = 'RealEstateTour'
+
+# Where the pre-built bundle lives; reused across renders and restarts
+REMOTION_BUNDLE_DIR = os.environ.get('REMOTION_BUNDLE_DIR', os.path.join(REMOTION_DIR, 'build'))
+# Number of renders allowed to run at the same time on this host
+REMOTION_MAX_PARALLEL_RENDERS = max(1, int(os.environ.get('REMOTION_MAX_PARALLEL_RENDERS', '1')))
+# Browser tabs used by a single render (Remotion --concurrency)
+REMOTION_CONCURRENCY = max(
+    1,
+    int(os.environ.get('REMOTION_CONCURRENCY', '0') or 0)
+    or (os.cpu_count() or 2) // REMOTION_MAX_PARALLEL_RENDERS
+)
+REMOTION_RENDER_TIMEOUT = int(os.environ.get('REMOTION_RENDER_TIMEOUT', '1800'))
+
+
+class RemotionRenderError(RuntimeError):
+    """Raised when bundling or rendering with the Remotion CLI fails."""
+
+
+def _remotion_cli() -> List[str]:
+    """Resolve the project-local Remotion CLI so renders never depend on the cwd"""
+    bin_dir = os.path.join(REMOTION_DIR, 'node_modules', '.bin')
+    for name in ('remotion.cmd', 'remotion') if os.name == 'nt' else ('remotion',):
+        candidate = os.path.join(bin_dir, name)
+        if os.path.exists(candidate):
+            return [candidate]
+    raise RemotionRenderError(
+        f"Remotion CLI not found in {bin_dir}. Run 'npm ci' in remotion-tours first."
+    )
+
+
+class RemotionLocalRenderer:
+    """Render tours on this host with a reusable Remotion bundle"""
+
+    def __init__(self,
+                 bundle_dir: str = REMOTION_BUNDLE_DIR,
+                 max_parallel_renders: int = REMOTION_MAX_PARALLEL_RENDERS,
+                 concurrency: int = REMOTION_CONCURRENCY):
+        self.bundle_dir = bundle_dir
+        self.concurrency = concurrency
+        self.max_parallel_renders = max_parallel_renders
+        self._bundle_lock = threading.Lock()
+        self._bundled = False
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_parallel_renders,
+            thread_name_prefix='remotion-render'
+        )
+        self._pending = 0
+        self._pending_lock = threading.Lock()
+
+    @property
+    def serve_url(self) -> str:
+        """Serve URL passed to `remotion render` (the bundle directory)"""
+        return self.bundle_dir
+
+    @property
+    def pending_renders(self) -> int:
+        """Renders queued or running on this renderer"""
+        with self._pending_lock:
+            return self._pending
+
+    def ensure_bundle(self, force: bool = False) -> str:
+        """Bundle the Remotion project once and return the serve URL"""
+        with self._bundle_lock:
+            index_html = os.path.join(self.bundle_dir, 'index.html')
+            if self._bundled and not force and os.path.exists(index_html):
+                return self.serve_url
+
+            if force or not os.path.exists(index_html):
+                cmd = _remotion_cli() + [
+                    'bundle',
+                    REMOTION_ENTRY_POINT,
+                    f'--out-dir={self.bundle_dir}',
+                ]
+                logger.info(f"Bundling Remotion project into {self.bundle_dir}...")
+                result = subprocess.run(
+                    cmd,
+                    cwd=REMOTION_DIR,
+                    capture_output=True,
+                    text=True,
+                    timeout=REMOTION_RENDER_TIMEOUT
+                )
+                if result.returncode != 0 or not os.path.exists(index_html):
+                    raise RemotionRenderError(f"Remotion bundle failed: {result.stderr or result.stdout}")
+                logger.info("Remotion bundle ready")
+            else:
+                logger.info(f"Reusing existing Remotion bundle at {self.bundle_dir}")
+
+            self._bundled = True
+            return self.serve_url
+
+    def warm_up(self) -> threading.Thread:
+        """Build the bundle in the background so the first render doesn't pay for it"""
+        def _bundle():
+            try:
+                self.ensure_bundle()
+            except Exception as e:
+                logger.error(f"Remotion bundle warm-up failed: {e}")
+
+        thread = threading.Thread(target=_bundle, daemon=True)
+        thread.start()
+        return thread
+
+    def render(self,
+               job_id: str,
+               images: List[str],
+               property_details: Dict[str, str],
+               settings: Optional[Dict[str, any]] = None,
+               output_path: Optional[str] = None,
+               watermark: Optional[Dict[str, any]] = None) -> str:
+        """
+        Render a tour synchronously and return the path of the MP4
+
+        Args:
+            job_id: Unique job identifier
+            images: Image URLs (or paths relative to the bundle's public dir)
+            property_details: Props in the camelCase shape RealEstateTour expects
+            settings: Optional timing settings
+            output_path: Where to place the finished video
+            watermark: Optional watermark configuration
+        """
+        if not images:
+            raise RemotionRenderError("No images provided")
+
+        serve_url = self.ensure_bundle()
+
+        props = {
+            'images': images,
+            'propertyDetails': property_details,
+            'settings': settings or {
+                'durationPerImage': 8,
+                'effectSpeed': 'medium',
+                'transitionDuration': 1.5
+            }
+        }
+        if watermark:
+            props['watermark'] = watermark
+
+        if output_path is None:
+            output_path = os.path.join(REMOTION_DIR, 'out', f'tour_{job_id}.mp4')
+        os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+
+        # Each render gets its own working directory so parallel renders never
+        # share props files, temp frames or the process cwd
+        work_dir = tempfile.mkdtemp(prefix=f'remotion_{job_id}_')
+        try:
+            props_path = os.path.join(work_dir, 'props.json')
+            with open(props_path, 'w', encoding='utf-8') as f:
+                json.dump(props, f)
+
+            work_output = os.path.join(work_dir, 'out.mp4')
+            cmd = _remotion_cli() + [
+                'render',
+                serve_url,
+                REMOTION_COMPOSITION,
+                work_output,
+                f'--props={props_path}',
+                f'--concurrency={self.concurrency}',
+                '--codec=h264',
+                '--image-format=jpeg',
+                '--overwrite',
+                '--log=info'
+            ]
+
+            logger.info(f"Starting local Remotion render for job {job_id} "
+                        f"({len(images)} images, concurrency={self.concurrency})")
+            result = subprocess.run(
+                cmd,
+                cwd=work_dir,
+                capture_output=True,
+                text=True,
+                timeout=REMOTION_RENDER_TIMEOUT
+            )
+
+            if result.returncode != 0 or not os.path.exists(work_output):
+                raise RemotionRenderError(f"Remotion render failed: {result.stderr or result.stdout}")
+
+            shutil.move(work_output, output_path)
+            logger.info(f"Local Remotion render complete for job {job_id}: {output_path}")
+            return output_path
+        except subprocess.TimeoutExpired as e:
+            raise RemotionRenderError(f"Remotion render timed out after {REMOTION_RENDER_TIMEOUT}s") from e
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    def submit(self, job_id: str, images: List[str], property_details: Dict[str, str],
+               settings: Optional[Dict[str, any]] = None,
+               output_path: Optional[str] = None,
+               watermark: Optional[Dict[str, any]] = None) -> Future:
+        """Queue a render on the bounded pool and return its Future"""
+        with self._pending_lock:
+            self._pending += 1
+
+        def _run():
+            try:
+                return self.render(job_id, images, property_details, settings, output_path, watermark)
+            finally:
+                with self._pending_lock:
+                    self._pending -= 1
+
+        return self._executor.submit(_run)
+
+
+_local_renderer = None
+_local_renderer_lock = threading.Lock()
+
+
+def get_local_renderer() -> RemotionLocalRenderer:
+    """Get or create the process-wide local renderer"""
+    global _local_renderer
+    with _local_renderer_lock:
+        if _local_renderer is None:
+            _local_renderer = RemotionLocalRenderer()
+        return _local_renderer
+
 class RemotionVideoGenerator:
     """Generate videos using Remotion with custom Ken Burns effects"""
     
-    def __init__(self):
-        self.remotion_dir = os.path.join(os.path.dirname(__file__), 'remotion-tours')
+    def __init__(self, renderer: Optional[RemotionLocalRenderer] = None):
+        self.remotion_dir = REMOTION_DIR
         self.output_dir = os.path.join(self.remotion_dir, 'out')
+        self.renderer = renderer or get_local_renderer()
         
         # Ensure output directory exists
         os.makedirs(self.output_dir, exist_ok=True)
@@ -52,8 +278,16 @@ class RemotionVideoGenerator:
                 'transitionDuration': 1.5
             }
         
-        # Prepare image URLs (copy to public directory)
-        public_dir = os.path.join(self.remotion_dir, 'public', 'images', job_id or 'temp')
+        try:
+            serve_url = self.renderer.ensure_bundle()
+        except Exception as e:
+            logger.error(f"Error preparing Remotion bundle: {e}")
+            return None
+        
+        # Local files are served from the bundle's public dir, which the
+        # bundle exposes under /public
+        job_folder = job_id or 'temp'
+        public_dir = os.path.join(serve_url, 'public', 'images', job_folder)
         os.makedirs(public_dir, exist_ok=True)
         
         image_urls = []
@@ -64,83 +298,52 @@ class RemotionVideoGenerator:
                 dest_path = os.path.join(public_dir, filename)
                 shutil.copy2(img_path, dest_path)
                 
-                # Create relative URL for Remotion
-                image_urls.append(f"/images/{job_id or 'temp'}/{filename}")
+                image_urls.append(f"/public/images/{job_folder}/{filename}")
                 logger.info(f"Copied image {i+1}/{len(image_paths)}")
             except Exception as e:
                 logger.error(f"Error copying image {img_path}: {e}")
         
         if not image_urls:
             logger.error("No images were successfully prepared")
+            shutil.rmtree(public_dir, ignore_errors=True)
             return None
         
         # Prepare props for Remotion
-        props = {
-            'images': image_urls,
-            'propertyDetails': {
-                'address': property_details.get('address', 'Beautiful Property'),
-                'city': property_details.get('city', 'Your City, State'),
-                'details': property_details.get('details1', 'Call for viewing'),
-                'status': property_details.get('details2', 'Just Listed'),
-                'agentName': property_details.get('agent_name', 'Your Agent'),
-                'agentEmail': property_details.get('agent_email', 'agent@realestate.com'),
-                'agentPhone': property_details.get('agent_phone', '(555) 123-4567'),
-                'brandName': property_details.get('brand_name', 'Premium Real Estate')
-            },
-            'settings': settings
+        remotion_details = {
+            'address': property_details.get('address', 'Beautiful Property'),
+            'city': property_details.get('city', 'Your City, State'),
+            'details': property_details.get('details1', 'Call for viewing'),
+            'status': property_details.get('details2', 'Just Listed'),
+            'agentName': property_details.get('agent_name', 'Your Agent'),
+            'agentEmail': property_details.get('agent_email', 'agent@realestate.com'),
+            'agentPhone': property_details.get('agent_phone', '(555) 123-4567'),
+            'brandName': property_details.get('brand_name', 'Premium Real Estate')
         }
         
         # Output filename
         output_filename = f"tour_{job_id or 'output'}.mp4"
         output_path = os.path.join(self.output_dir, output_filename)
         
-        # Build Remotion render command
-        cmd = [
-            'npx',
-            'remotion',
-            'render',
-            'RealEstateTour',
-            output_path,
-            f'--props={json.dumps(props)}',
-            '--log=verbose'
-        ]
-        
         logger.info(f"Starting Remotion render for {len(image_urls)} images...")
         logger.info(f"Settings: duration={settings['durationPerImage']}s, speed={settings['effectSpeed']}")
         
         try:
-            # Change to Remotion directory
-            original_dir = os.getcwd()
-            os.chdir(self.remotion_dir)
-            
-            # Run Remotion render
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                shell=True  # Required for Windows
+            future = self.renderer.submit(
+                job_folder,
+                image_urls,
+                remotion_details,
+                settings=settings,
+                output_path=output_path
             )
-            
-            # Change back to original directory
-            os.chdir(original_dir)
-            
-            if result.returncode == 0 and os.path.exists(output_path):
-                logger.info(f"Video generated successfully: {output_path}")
-                return output_path
-            else:
-                logger.error(f"Remotion render failed: {result.stderr}")
-                return None
-                
+            video_path = future.result()
+            logger.info(f"Video generated successfully: {video_path}")
+            return video_path
         except Exception as e:
             logger.error(f"Error running Remotion: {e}")
-            os.chdir(original_dir)  # Ensure we change back
             return None
         finally:
             # Clean up temporary images
-            try:
-                shutil.rmtree(public_dir)
-            except:
-                pass
+            shutil.rmtree(public_dir, ignore_errors=True)
     
     def get_available_effects(self) -> Dict[str, str]:
         """Get available Ken Burns effects"""
@@ -0,0 +1,241 @@
+"""
+Render scheduler that spills jobs between GitHub Actions and local engines
+Routes each job using the GitHub queue depth, observed GitHub pickup latency
+and local CPU headroom, and re-routes stalled GitHub runs to a local engine
+instead of letting them time out
+"""
+import os
+import time
+import logging
+import threading
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+BACKEND_GITHUB = 'github'
+BACKEND_LOCAL = 'local'
+
+# Allow jobs to run on this host when GitHub Actions is slow or unavailable
+RENDER_SPILLOVER_ENABLED = os.environ.get('RENDER_SPILLOVER', 'true').lower() == 'true'
+# Seconds a dispatched GitHub run may sit unpicked before the job is re-routed
+RENDER_PICKUP_DEADLINE = float(os.environ.get('RENDER_PICKUP_DEADLINE', '180'))
+# Pickup latency above which new jobs prefer the local engine
+RENDER_TARGET_PICKUP_LATENCY = float(os.environ.get('RENDER_TARGET_PICKUP_LATENCY', '60'))
+# GitHub runs we keep in flight before spilling new jobs to the local engine
+RENDER_GITHUB_MAX_INFLIGHT = int(os.environ.get('RENDER_GITHUB_MAX_INFLIGHT', '4'))
+# Local renders allowed at once (queued + running)
+RENDER_LOCAL_MAX_INFLIGHT = int(os.environ.get('RENDER_LOCAL_MAX_INFLIGHT', '1'))
+# Fraction of CPU that must be idle before taking a job locally
+RENDER_LOCAL_MIN_CPU_HEADROOM = float(os.environ.get('RENDER_LOCAL_MIN_CPU_HEADROOM', '0.35'))
+
+# Weight of the newest sample in the pickup latency moving average
+PICKUP_LATENCY_SMOOTHING = 0.3
+
+
+def cpu_headroom() -> float:
+    """Idle CPU fraction on this host (0.0 - 1.0)"""
+    try:
+        import psutil
+        return max(0.0, 1.0 - psutil.cpu_percent(interval=0.1) / 100.0)
+    except ImportError:
+        pass
+    try:
+        load, _, _ = os.getloadavg()
+        return max(0.0, 1.0 - load / (os.cpu_count() or 1))
+    except (AttributeError, OSError):
+        return 1.0
+
+
+@dataclass
+class RoutingDecision:
+    """Which backend a job should render on and why"""
+    backend: str
+    reason: str
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class RenderScheduler:
+    def __init__(self, github_actions=None, local_remotion=None):
+        self.github_actions = github_actions
+        self.local_remotion = local_remotion
+
+        self._lock = threading.Lock()
+        self._github_inflight: Dict[str, float] = {}
+        self._local_inflight = 0
+        self._local_slots = threading.BoundedSemaphore(max(1, RENDER_LOCAL_MAX_INFLIGHT))
+        self.pickup_latency: Optional[float] = None
+
+    # ------------------------------------------------------------------
+    # Capacity signals
+    # ------------------------------------------------------------------
+
+    @property
+    def github_available(self) -> bool:
+        return self.github_actions is not None and getattr(self.github_actions, 'is_valid', True)
+
+    @property
+    def local_available(self) -> bool:
+        if not RENDER_SPILLOVER_ENABLED:
+            return False
+        if self.local_remotion is not None:
+            return True
+        from ffmpeg_ken_burns import FFMPEG_BINARY
+        return bool(FFMPEG_BINARY)
+
+    def queue_depths(self) -> Dict[str, int]:
+        with self._lock:
+            return {BACKEND_GITHUB: len(self._github_inflight), BACKEND_LOCAL: self._local_inflight}
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Scheduler state for health checks"""
+        return {
+            'spillover_enabled': RENDER_SPILLOVER_ENABLED,
+            'github_available': self.github_available,
+            'local_available': self.local_available,
+            'local_engine': 'remotion' if self.local_remotion is not None else 'ffmpeg',
+            'queue_depth': self.queue_depths(),
+            'github_pickup_latency': round(self.pickup_latency, 1) if self.pickup_latency is not None else None,
+        }
+
+    # ------------------------------------------------------------------
+    # Routing
+    # ------------------------------------------------------------------
+
+    def choose_backend(self) -> RoutingDecision:
+        """
+        Pick a backend for a new job
+
+        A local decision reserves a local slot under the lock, so concurrent
+        uploads cannot both pass the in-flight limit; hand it to
+        render_local(reserved=True) or give it back with release_local().
+        """
+        headroom = cpu_headroom() if self.github_available and self.local_available else None
+        with self._lock:
+            decision = self._route(headroom)
+            if decision.backend == BACKEND_LOCAL:
+                self._local_inflight += 1
+        return decision
+
+    def _route(self, headroom: Optional[float]) -> RoutingDecision:
+        # Caller holds self._lock
+        if not self.github_available:
+            if not self.local_available:
+                return RoutingDecision(BACKEND_GITHUB, 'no local engine available')
+            if self._local_inflight >= RENDER_LOCAL_MAX_INFLIGHT:
+                return RoutingDecision(BACKEND_GITHUB, f'local queue full ({self._local_inflight}), GitHub Actions unavailable')
+            return RoutingDecision(BACKEND_LOCAL, 'GitHub Actions unavailable')
+
+        if not self.local_available:
+            return RoutingDecision(BACKEND_GITHUB, 'local spillover disabled')
+
+        if self._local_inflight >= RENDER_LOCAL_MAX_INFLIGHT:
+            return RoutingDecision(BACKEND_GITHUB, f'local queue full ({self._local_inflight})')
+
+        if headroom < RENDER_LOCAL_MIN_CPU_HEADROOM:
+            return RoutingDecision(BACKEND_GITHUB, f'local CPU headroom {headroom:.0%}')
+
+        github_depth = len(self._github_inflight)
+        if github_depth >= RENDER_GITHUB_MAX_INFLIGHT:
+            return RoutingDecision(BACKEND_LOCAL, f'GitHub queue depth {github_depth}')
+
+        if self.pickup_latency is not None and self.pickup_latency > RENDER_TARGET_PICKUP_LATENCY:
+            return RoutingDecision(BACKEND_LOCAL, f'GitHub pickup latency {self.pickup_latency:.0f}s')
+
+        return RoutingDecision(BACKEND_GITHUB, 'default')
+
+    def should_reroute(self, dispatched_at: float, picked_up: bool, now: Optional[float] = None) -> bool:
+        """True when a GitHub run has stalled past the pickup deadline"""
+        if picked_up or not self.local_available:
+            return False
+        now = now if now is not None else time.time()
+        return now - dispatched_at > RENDER_PICKUP_DEADLINE
+
+    # ------------------------------------------------------------------
+    # Bookkeeping
+    # ------------------------------------------------------------------
+
+    def github_dispatched(self, job_id: str) -> None:
+        with self._lock:
+            self._github_inflight[job_id] = time.time()
+
+    def github_finished(self, job_id: str) -> None:
+        with self._lock:
+            self._github_inflight.pop(job_id, None)
+
+    def release_local(self) -> None:
+        """Give back a slot reserved by choose_backend that will not be rendered"""
+        with self._lock:
+            self._local_inflight -= 1
+
+    def record_pickup_latency(self, seconds: float) -> None:
+        """Feed the time between dispatch and the run starting"""
+        with self._lock:
+            if self.pickup_latency is None:
+                self.pickup_latency = seconds
+            else:
+                self.pickup_latency = (
+                    PICKUP_LATENCY_SMOOTHING * seconds
+                    + (1 - PICKUP_LATENCY_SMOOTHING) * self.pickup_latency
+                )
+        logger.info(f"GitHub pickup latency {seconds:.0f}s (average {self.pickup_latency:.0f}s)")
+
+    # ------------------------------------------------------------------
+    # Local rendering
+    # ------------------------------------------------------------------
+
+    def render_local(self, job_id: str, output_path: str,
+                     image_paths: List[str],
+                     render_request: Optional[Dict[str, Any]] = None,
+                     plan=None, reserved: bool = False) -> str:
+        """
+        Render a job on this host and return the video path
+
+        Uses the local Remotion renderer when the job has storage URLs for it,
+        otherwise (or if Remotion fails) the FFmpeg Ken Burns engine with the
+        engine and quality of the capacity model's plan, if given. Pass
+        reserved=True when choose_backend already counted this job.
+        """
+        if not reserved:
+            with self._lock:
+                self._local_inflight += 1
+        try:
+            with self._local_slots:
+                if self.local_remotion is not None and render_request and render_request.get('images'):
+                    try:
+                        future = self.local_remotion.submit(
+                            job_id,
+                            render_request['images'],
+                            render_request.get('property_details', {}),
+                            settings=render_request.get('settings'),
+                            output_path=output_path
+                        )
+                        return future.result()
+                    except Exception as e:
+                        logger.warning(f"Local Remotion render failed for job {job_id}, using FFmpeg engine: {e}")
+
+                if not image_paths:
+                    raise ValueError("No local images available for rendering")
+
+                from ffmpeg_ken_burns import create_ken_burns_video
+                if plan is not None:
+                    return create_ken_burns_video(image_paths, output_path, job_id,
+                                                  quality=plan.quality, engine=plan.engine)
+                return create_ken_burns_video(image_paths, output_path, job_id)
+        finally:
+            self.release_local()
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_render_scheduler(github_actions=None, local_remotion=None) -> RenderScheduler:
+    """Get or create the process-wide scheduler"""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = RenderScheduler(github_actions, local_remotion)
+        return _scheduler
@@ -1,5 +1,5 @@
 """
-Simple video generator using imageio-ffmpeg
+Simple slideshow video generator
 Fallback for when complex FFmpeg commands fail
 """
 
@@ -7,70 +7,27 @@ import os
 import logging
 from PIL import Image
 import numpy as np
+from video_encoder import FFmpegFrameSink
 
 logger = logging.getLogger(__name__)
 
-try:
-    import imageio
-    import imageio_ffmpeg as ffmpeg
-    IMAGEIO_AVAILABLE = True
-    logger.info("imageio available for video generation")
-except ImportError:
-    IMAGEIO_AVAILABLE = False
-    logger.warning("imageio not available")
-
 def create_simple_video(image_paths, output_path, job_id):
     """
-    Create a simple video from images using imageio
+    Create a simple video from images
     This is a fallback when FFmpeg commands fail
     """
     
-    if not IMAGEIO_AVAILABLE:
-        raise Exception("imageio not available for video generation")
-    
+    writer = None
     try:
         # Video parameters
         fps = 2  # 2 fps for slower transitions
         video_width = 1920
         video_height = 1080
         
-        # Create writer with multiple codec fallbacks
-        writer = None
-        codec_configs = [
-            {
-                'codec': 'libx264',
-                'quality': 8,
-                'pixelformat': 'yuv420p',
-                'ffmpeg_params': ['-crf', '23', '-preset', 'fast']
-            },
-            {
-                'codec': 'mpeg4',
-                'quality': 8,
-                'pixelformat': 'yuv420p',
-                'ffmpeg_params': ['-q:v', '5']
-            },
-            {
-                'codec': 'mjpeg',
-                'quality': 9,
-                'ffmpeg_params': ['-q:v', '2']
-            }
-        ]
-        
-        for config in codec_configs:
-            try:
-                writer = imageio.get_writer(
-                    output_path, 
-                    fps=fps,
-                    **config
-                )
-                logger.info(f"Created video writer with codec: {config['codec']}")
-                break
-            except Exception as e:
-                logger.warning(f"Failed to create writer with codec {config['codec']}: {e}")
-                continue
-        
-        if writer is None:
-            raise ValueError("Could not create video writer with any available codec")
+        writer = FFmpegFrameSink(
+            output_path, video_width, video_height, fps,
+            preset='fast', crf=23, pixel_format='rgb24'
+        )
         
         for img_path in image_paths:
             try:
@@ -116,7 +73,7 @@ def create_simple_video(image_paths, output_path, job_id):
                     frames_per_image = fps * 3  # 3 seconds per image
                     for _ in range(frames_per_image):
                         try:
-                            writer.append_data(frame_array)
+                            writer.write(frame_array)
                         except Exception as e:
                             logger.error(f"Error writing frame: {e}")
                     
@@ -126,27 +83,17 @@ def create_simple_video(image_paths, output_path, job_id):
                 logger.error(f"Error processing image {img_path}: {e}")
                 continue
         
-        # Close writer
-        try:
-            writer.close()
-        except Exception as e:
-            logger.error(f"Error closing video writer: {e}")
+        # Finish the encode; raises if ffmpeg failed
+        writer.close()
         
-        # Verify output
-        if os.path.exists(output_path):
-            file_size = os.path.getsize(output_path)
-            if file_size > 0:
-                logger.info(f"Simple video created: {output_path} (size: {file_size / 1024 / 1024:.2f} MB)")
-                return output_path
-            else:
-                logger.error(f"Output file is empty: {output_path}")
-                raise ValueError("Generated video file is empty")
-        else:
-            logger.error(f"Output file not found: {output_path}")
-            raise ValueError("Failed to create video file")
+        file_size = os.path.getsize(output_path)
+        logger.info(f"Simple video created: {output_path} (size: {file_size / 1024 / 1024:.2f} MB)")
+        return output_path
         
     except Exception as e:
         logger.error(f"Error creating simple video: {e}")
         import traceback
         logger.error(traceback.format_exc())
+        if writer is not None:
+            writer.abort()
         raise
\ No newline at end of file
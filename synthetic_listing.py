@@ -0,0 +1,73 @@
+"""
+Deterministic synthetic listing photos for the capacity model and the render benchmarks
+Each photo is a room-like scene (walls, floor, window, furniture blocks and
+fine texture) drawn from a seeded generator, so every run and every machine
+benchmarks the same pixels
+"""
+import os
+from typing import List, Tuple
+
+import numpy as np
+from PIL import Image
+
+# Common sources: phone (4:3), DSLR (3:2), MLS-resized and already-16:9 photos
+RESOLUTIONS = {
+    'phone': (4032, 3024),
+    'dslr': (3000, 2000),
+    'mls': (2048, 1536),
+    'hd': (1920, 1080),
+}
+
+
+def synthetic_photo(size: Tuple[int, int], seed: int) -> np.ndarray:
+    """One RGB room photo of (width, height)"""
+    width, height = size
+    rng = np.random.RandomState(seed)
+    yy, xx = np.mgrid[:height, :width].astype(np.float32)
+
+    wall = rng.uniform(150, 235, 3).astype(np.float32)
+    floor = rng.uniform(60, 160, 3).astype(np.float32)
+    horizon = int(height * rng.uniform(0.55, 0.7))
+
+    image = np.empty((height, width, 3), dtype=np.float32)
+    # Wall with a soft light falloff, floor with a perspective gradient
+    light = 1.0 - 0.25 * np.abs(xx / width - rng.uniform(0.3, 0.7))
+    image[:horizon] = wall * light[:horizon, :, None]
+    depth = (yy[horizon:] - horizon) / max(height - horizon, 1)
+    image[horizon:] = floor * (0.7 + 0.3 * depth[:, :, None])
+
+    # Window: bright rectangle with mullions
+    wx, wy = int(width * rng.uniform(0.1, 0.5)), int(height * rng.uniform(0.1, 0.25))
+    ww, wh = int(width * 0.3), int(height * 0.3)
+    image[wy:wy + wh, wx:wx + ww] = rng.uniform(220, 255, 3)
+    image[wy:wy + wh, wx + ww // 2 - 4:wx + ww // 2 + 4] = 90
+    image[wy + wh // 2 - 4:wy + wh // 2 + 4, wx:wx + ww] = 90
+
+    # Furniture blocks standing on the floor
+    for _ in range(rng.randint(3, 7)):
+        fw, fh = int(width * rng.uniform(0.08, 0.25)), int(height * rng.uniform(0.1, 0.3))
+        fx = rng.randint(0, max(width - fw, 1))
+        fy = min(horizon + int(height * rng.uniform(0.0, 0.15)), height - 1) - fh
+        image[max(fy, 0):fy + fh, fx:fx + fw] = rng.uniform(20, 200, 3)
+
+    # Fine texture and sensor noise, which is what stresses scaling and x264
+    image += 12 * np.sin(xx * 0.9 + yy * 0.35)[:, :, None]
+    image += rng.normal(0, 4, image.shape)
+    return np.clip(image, 0, 255).astype(np.uint8)
+
+
+def generate_listing(directory: str, resolution: str = 'phone', count: int = 6,
+                     seed: int = 1234) -> List[str]:
+    """Write `count` JPEG photos at a RESOLUTIONS entry and return their paths"""
+    size = RESOLUTIONS[resolution]
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for i in range(count):
+        path = os.path.join(directory, f'{resolution}_{i:02d}.jpg')
+        if not os.path.exists(path):
+            Image.fromarray(synthetic_photo(size, seed + i)).save(path, 'JPEG', quality=90)
+        paths.append(path)
+    return paths
+
+
+__all__ = ['RESOLUTIONS', 'synthetic_photo', 'generate_listing']
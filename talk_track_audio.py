@@ -0,0 +1,56 @@
+"""
+Talk-track assembly in a single ffmpeg process
+Every narration segment is resampled, padded with silence and trimmed to its
+slide length, concatenated and split inside one filter graph, which encodes
+the AAC track used for muxing (copied, never re-encoded) and the MP3 offered
+for download from the same decode.
+"""
+import logging
+import subprocess
+from pathlib import Path
+from typing import List, Sequence
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 48000
+AUDIO_BITRATE = '192k'
+
+
+def talk_track_filter(segment_count: int, slide_seconds: float) -> str:
+    """filter_complex that fits each input to slide_seconds and emits [mp3] and [aac]"""
+    chains = [
+        f"[{i}:a]aresample={SAMPLE_RATE},aformat=sample_fmts=fltp:channel_layouts=stereo,"
+        f"apad=whole_dur={slide_seconds:.3f},atrim=end={slide_seconds:.3f},asetpts=N/SR/TB[s{i}]"
+        for i in range(segment_count)
+    ]
+    labels = ''.join(f'[s{i}]' for i in range(segment_count))
+    chains.append(f'{labels}concat=n={segment_count}:v=0:a=1,asplit=2[mp3][aac]')
+    return ';'.join(chains)
+
+
+def talk_track_command(segments: Sequence[Path], slide_seconds: float, mp3_path: Path,
+                       aac_path: Path, ffmpeg_binary: str = 'ffmpeg') -> List[str]:
+    cmd = [ffmpeg_binary, '-y', '-hide_banner', '-loglevel', 'error']
+    for segment in segments:
+        cmd += ['-i', str(segment)]
+    cmd += [
+        '-filter_complex', talk_track_filter(len(segments), slide_seconds),
+        '-map', '[mp3]', '-c:a', 'libmp3lame', '-b:a', AUDIO_BITRATE, str(mp3_path),
+        '-map', '[aac]', '-c:a', 'aac', '-b:a', AUDIO_BITRATE, '-movflags', '+faststart', str(aac_path),
+    ]
+    return cmd
+
+
+def build_talk_track(segments: Sequence[Path], slide_seconds: float, mp3_path: Path,
+                     aac_path: Path, ffmpeg_binary: str = 'ffmpeg') -> None:
+    """Write the padded, concatenated narration as MP3 (download) and AAC (muxing)"""
+    if not segments:
+        raise ValueError('No narration segments to assemble')
+    cmd = talk_track_command(segments, slide_seconds, mp3_path, aac_path, ffmpeg_binary)
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr or result.stdout or 'Talk track assembly failed')
+    logger.info(f"Assembled {len(segments)} narration segments into {mp3_path.name} and {aac_path.name}")
+
+
+__all__ = ['talk_track_filter', 'talk_track_command', 'build_talk_track']
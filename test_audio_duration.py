@@ -0,0 +1,111 @@
+"""
+Tests for audio_duration: synthetic MP3 frames and WAV files with known lengths
+Run with: python -m pytest test_audio_duration.py
+"""
+import struct
+import wave
+
+import pytest
+
+from audio_duration import mp3_duration, read_duration, wav_duration
+
+# MPEG-1 Layer III, 128 kbps, 44.1 kHz, no padding, stereo: 417-byte frames of 1152 samples
+MPEG1_HEADER = 0xFFFB9000
+MPEG1_FRAME_BYTES = 417
+MPEG1_SECONDS_PER_FRAME = 1152 / 44100
+
+# MPEG-2 Layer III, 64 kbps, 24 kHz, no padding, mono: 192-byte frames of 576 samples
+MPEG2_MONO_HEADER = 0xFFF384C0
+MPEG2_FRAME_BYTES = 192
+MPEG2_SECONDS_PER_FRAME = 576 / 24000
+
+
+def frame(header, length):
+    return struct.pack('>I', header) + b'\0' * (length - 4)
+
+
+def id3v2_tag(body_size):
+    size = bytes((body_size >> shift) & 0x7F for shift in (21, 14, 7, 0))
+    return b'ID3\x03\x00\x00' + size + b'x' * body_size
+
+
+def with_info_header(first_frame, side_info, tag, frames):
+    data = bytearray(first_frame)
+    offset = 4 + side_info
+    data[offset:offset + 12] = tag + struct.pack('>II', 1, frames)
+    return bytes(data)
+
+
+def test_cbr_frames_are_counted():
+    data = frame(MPEG1_HEADER, MPEG1_FRAME_BYTES) * 100
+    assert mp3_duration(data) == pytest.approx(100 * MPEG1_SECONDS_PER_FRAME)
+
+
+def test_id3v2_tag_is_skipped():
+    data = id3v2_tag(300) + frame(MPEG1_HEADER, MPEG1_FRAME_BYTES) * 40
+    assert mp3_duration(data) == pytest.approx(40 * MPEG1_SECONDS_PER_FRAME)
+
+
+def test_id3v1_tag_is_ignored():
+    data = frame(MPEG1_HEADER, MPEG1_FRAME_BYTES) * 25 + b'TAG' + b'\0' * 125
+    assert mp3_duration(data) == pytest.approx(25 * MPEG1_SECONDS_PER_FRAME)
+
+
+@pytest.mark.parametrize('tag', [b'Info', b'Xing'])
+def test_xing_info_frame_count_wins(tag):
+    first = with_info_header(frame(MPEG1_HEADER, MPEG1_FRAME_BYTES), 32, tag, 250)
+    data = first + frame(MPEG1_HEADER, MPEG1_FRAME_BYTES) * 10
+    assert mp3_duration(data) == pytest.approx(250 * MPEG1_SECONDS_PER_FRAME)
+
+
+def test_vbri_frame_count():
+    first = bytearray(frame(MPEG1_HEADER, MPEG1_FRAME_BYTES))
+    first[36:54] = b'VBRI' + struct.pack('>HHHII', 1, 0, 75, 0, 180)
+    data = bytes(first) + frame(MPEG1_HEADER, MPEG1_FRAME_BYTES) * 10
+    assert mp3_duration(data) == pytest.approx(180 * MPEG1_SECONDS_PER_FRAME)
+
+
+def test_mpeg2_mono_frames_are_counted():
+    data = frame(MPEG2_MONO_HEADER, MPEG2_FRAME_BYTES) * 60
+    assert mp3_duration(data) == pytest.approx(60 * MPEG2_SECONDS_PER_FRAME)
+
+
+def test_mpeg2_mono_info_header_uses_short_side_info():
+    first = with_info_header(frame(MPEG2_MONO_HEADER, MPEG2_FRAME_BYTES), 9, b'Info', 500)
+    data = first + frame(MPEG2_MONO_HEADER, MPEG2_FRAME_BYTES) * 5
+    assert mp3_duration(data) == pytest.approx(500 * MPEG2_SECONDS_PER_FRAME)
+
+
+def test_garbage_is_not_mp3():
+    assert mp3_duration(b'\x00\x01\x02' * 1000) is None
+
+
+def test_wav_written_by_wave_module(tmp_path):
+    path = tmp_path / 'narration.wav'
+    with wave.open(str(path), 'wb') as handle:
+        handle.setnchannels(1)
+        handle.setsampwidth(2)
+        handle.setframerate(24000)
+        handle.writeframes(b'\0\0' * 24000 * 3)
+    assert read_duration(str(path)) == pytest.approx(3.0)
+
+
+def test_streamed_wav_with_unset_data_size():
+    pcm = b'\0\0' * 2 * 48000 * 2  # 2 seconds of 48 kHz stereo
+    fmt = struct.pack('<HHIIHH', 1, 2, 48000, 48000 * 4, 4, 16)
+    data = (b'RIFF' + struct.pack('<I', 0xFFFFFFFF) + b'WAVE'
+            + b'fmt ' + struct.pack('<I', len(fmt)) + fmt
+            + b'data' + struct.pack('<I', 0xFFFFFFFF) + pcm)
+    assert wav_duration(data) == pytest.approx(2.0)
+
+
+def test_read_duration_dispatches_on_content(tmp_path):
+    path = tmp_path / 'segment.bin'
+    path.write_bytes(frame(MPEG1_HEADER, MPEG1_FRAME_BYTES) * 10)
+    assert read_duration(str(path)) == pytest.approx(10 * MPEG1_SECONDS_PER_FRAME)
+
+
+def test_unknown_format_returns_none(tmp_path):
+    path = tmp_path / 'segment.ogg'
+    path.write_bytes(b'OggS' + b'\0' * 100)
+    assert read_duration(str(path)) is None
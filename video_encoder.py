@@ -0,0 +1,227 @@
+"""
+Shared H.264 encoder sink for the frame-based tour engines
+Raw frames are streamed over a pipe into a single ffmpeg libx264 process, so
+the engines produce a faststart yuv420p MP4 directly - no OpenCV codec
+probing and no second transcode pass
+"""
+import os
+import logging
+import subprocess
+import tempfile
+from typing import List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Override the per-engine x264 settings for every local render
+VIDEO_ENCODER_PRESET = os.environ.get('VIDEO_ENCODER_PRESET', '')
+VIDEO_ENCODER_CRF = os.environ.get('VIDEO_ENCODER_CRF', '')
+# Send frames as I420 instead of packed RGB (half the bytes over the pipe)
+VIDEO_ENCODER_PIPE_YUV = os.environ.get('VIDEO_ENCODER_PIPE_YUV', 'false').lower() == 'true'
+# Seconds to wait for ffmpeg to flush once all frames are written
+VIDEO_ENCODER_CLOSE_TIMEOUT = float(os.environ.get('VIDEO_ENCODER_CLOSE_TIMEOUT', '300'))
+
+# Packed pixel formats the engines hand us, with the matching I420 conversion
+_YUV_CONVERSIONS = {
+    'bgr24': 'COLOR_BGR2YUV_I420',
+    'rgb24': 'COLOR_RGB2YUV_I420',
+}
+
+
+class VideoEncoderError(Exception):
+    """ffmpeg could not be started or did not produce a video"""
+
+
+class FFmpegFrameSink:
+    """
+    Write frames into one ffmpeg libx264 encode
+
+    Drop-in for cv2.VideoWriter (write/isOpened/release). The pipe is
+    unbuffered, so write() blocks while ffmpeg is busy and the frame
+    producer can never run more than a pipe buffer ahead of the encoder.
+    """
+
+    def __init__(self, output_path: str, width: int, height: int, fps: float,
+                 preset: str = 'medium', crf: int = 23,
+                 pixel_format: str = 'bgr24',
+                 pipe_yuv: Optional[bool] = None,
+                 extra_args: Optional[List[str]] = None,
+                 ffmpeg_binary: Optional[str] = None):
+        if pixel_format not in _YUV_CONVERSIONS:
+            raise ValueError(f"Unsupported pixel format: {pixel_format}")
+
+        if ffmpeg_binary is None:
+            from ffmpeg_ken_burns import FFMPEG_BINARY
+            ffmpeg_binary = FFMPEG_BINARY
+        if not ffmpeg_binary:
+            raise VideoEncoderError("FFmpeg not available")
+
+        self.output_path = output_path
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.pixel_format = pixel_format
+        self.preset = VIDEO_ENCODER_PRESET or preset
+        self.crf = int(VIDEO_ENCODER_CRF) if VIDEO_ENCODER_CRF else crf
+        self.frames_written = 0
+
+        # I420 needs even dimensions
+        use_yuv = VIDEO_ENCODER_PIPE_YUV if pipe_yuv is None else pipe_yuv
+        self.pipe_yuv = use_yuv and width % 2 == 0 and height % 2 == 0
+        self._yuv_code = None
+        self._yuv_buffer = None
+        if self.pipe_yuv:
+            import cv2
+            self._cv2 = cv2
+            self._yuv_code = getattr(cv2, _YUV_CONVERSIONS[pixel_format])
+            self._yuv_buffer = np.empty((height * 3 // 2, width), dtype=np.uint8)
+
+        cmd = [
+            ffmpeg_binary,
+            '-hide_banner',
+            '-loglevel', 'error',
+            '-f', 'rawvideo',
+            '-pix_fmt', 'yuv420p' if self.pipe_yuv else pixel_format,
+            '-s', f'{width}x{height}',
+            '-r', str(fps),
+            '-i', 'pipe:0',
+            '-an',
+            '-c:v', 'libx264',
+            '-preset', self.preset,
+            '-crf', str(self.crf),
+            '-pix_fmt', 'yuv420p',
+            *(extra_args or []),
+            '-movflags', '+faststart',
+            '-y',
+            output_path
+        ]
+
+        # stderr goes to a file so a chatty ffmpeg can't fill a pipe and stall us
+        self._stderr = tempfile.TemporaryFile()
+        try:
+            self.process = subprocess.Popen(
+                cmd,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.DEVNULL,
+                stderr=self._stderr,
+                bufsize=0
+            )
+        except OSError as e:
+            self._stderr.close()
+            raise VideoEncoderError(f"Could not start ffmpeg: {e}")
+
+        self._closed = False
+        self._failed = False
+        logger.info(
+            f"Encoding {width}x{height}@{fps} to {output_path} "
+            f"(libx264 preset={self.preset} crf={self.crf}, pipe={'yuv420p' if self.pipe_yuv else pixel_format})"
+        )
+
+    def isOpened(self) -> bool:
+        return not self._closed and not self._failed and self.process.poll() is None
+
+    def write(self, frame: np.ndarray) -> bool:
+        """Send one frame; blocks until the pipe has room"""
+        if not self.isOpened():
+            return False
+
+        if frame.shape[:2] != (self.height, self.width) or frame.ndim != 3:
+            logger.error(f"Frame shape {frame.shape} does not match {self.height}x{self.width}x3")
+            return False
+        if frame.dtype != np.uint8:
+            frame = frame.astype(np.uint8)
+
+        if self.pipe_yuv:
+            frame = self._cv2.cvtColor(frame, self._yuv_code, dst=self._yuv_buffer)
+        elif not frame.flags['C_CONTIGUOUS']:
+            frame = np.ascontiguousarray(frame)
+
+        try:
+            self._write_all(frame.data)
+        except (BrokenPipeError, OSError) as e:
+            self._failed = True
+            logger.error(f"ffmpeg stopped accepting frames after {self.frames_written}: {e} {self._read_stderr()}")
+            return False
+
+        self.frames_written += 1
+        return True
+
+    def _write_all(self, data) -> None:
+        """Write the whole buffer; the unbuffered pipe may take only part of it per call"""
+        view = memoryview(data).cast('B')
+        while view:
+            written = self.process.stdin.write(view)
+            if written is None:
+                raise BlockingIOError("ffmpeg pipe is non-blocking")
+            view = view[written:]
+
+    def close(self) -> str:
+        """Finish the encode and return the output path; raises if it failed"""
+        if self._closed:
+            return self.output_path
+        self._closed = True
+
+        try:
+            self.process.stdin.close()
+        except (BrokenPipeError, OSError):
+            self._failed = True
+
+        try:
+            returncode = self.process.wait(timeout=VIDEO_ENCODER_CLOSE_TIMEOUT)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+            self._stderr.close()
+            raise VideoEncoderError(f"ffmpeg did not finish within {VIDEO_ENCODER_CLOSE_TIMEOUT:.0f}s")
+
+        stderr = self._read_stderr()
+        self._stderr.close()
+
+        if returncode != 0 or self._failed:
+            raise VideoEncoderError(f"ffmpeg exited with code {returncode}: {stderr}")
+        if not os.path.exists(self.output_path) or os.path.getsize(self.output_path) == 0:
+            raise VideoEncoderError(f"ffmpeg produced no output at {self.output_path}")
+
+        logger.info(f"Encoded {self.frames_written} frames to {self.output_path}")
+        return self.output_path
+
+    def release(self) -> None:
+        """cv2.VideoWriter-style close that logs instead of raising"""
+        try:
+            self.close()
+        except VideoEncoderError as e:
+            logger.error(f"Video encode failed: {e}")
+
+    def abort(self) -> None:
+        """Stop the encode and remove the partial output"""
+        if not self._closed:
+            self._closed = True
+            self.process.kill()
+            self.process.wait()
+            self._stderr.close()
+        try:
+            if os.path.exists(self.output_path):
+                os.remove(self.output_path)
+        except OSError:
+            pass
+
+    def _read_stderr(self) -> str:
+        try:
+            self._stderr.seek(0)
+            return self._stderr.read().decode('utf-8', errors='replace').strip()
+        except (OSError, ValueError):
+            return ''
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.abort()
+        else:
+            self.close()
+        return False
+
+
+__all__ = ['FFmpegFrameSink', 'VideoEncoderError']
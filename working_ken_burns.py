@@ -27,7 +27,9 @@ except ImportError as e:
     logger.warning(f"Creatomate integration not available: {e}")
     CREATOMATE_AVAILABLE = False
 
-from openai_tts import synthesize_speech, OpenAITTSError
+from talk_track_audio import build_talk_track
+from audio_duration import read_duration as read_audio_duration
+from openai_tts import synthesize_many, OpenAITTSError
 from ai_script_generator import generate_room_scripts as ai_generate_room_scripts
 
 virtual_tour_bp = Blueprint('virtual_tour', __name__, url_prefix='/api/virtual-tour')
@@ -544,6 +546,11 @@ def _run_subprocess(cmd: List[str]) -> subprocess.CompletedProcess:
     return result
 
 def _probe_audio_duration(audio_path: Path) -> float:
+    # MP3 and WAV are read from their headers; ffprobe only for other formats
+    duration = read_audio_duration(str(audio_path))
+    if duration is not None:
+        return duration
+
     cmd = [FFPROBE_BINARY, '-v', 'error', '-show_entries', 'format=duration', '-of', 'default=noprint_wrappers=1:nokey=1', str(audio_path)]
     try:
         result = _run_subprocess(cmd)
@@ -559,36 +566,12 @@ def _probe_audio_duration(audio_path: Path) -> float:
         total_seconds = (int(hours) * 3600) + (int(minutes) * 60) + float(seconds)
         return float(total_seconds)
 
-def _prepare_talk_segment(segment_path: Path, idx: int) -> Path:
+def _validate_talk_segment(segment_path: Path, idx: int) -> Path:
     target = SLIDE_DURATION_SECONDS
     duration = _probe_audio_duration(segment_path)
     if duration > target + 0.5:
         raise ValueError(f'Scene {idx} narration is too long ({duration:.1f}s). Shorten it to fit {target} seconds.')
-
-    padded_path = segment_path.with_suffix('.wav')
-    cmd = [FFMPEG_BINARY, '-y', '-i', str(segment_path), '-ar', '48000', '-ac', '2']
-    if duration < target:
-        pad_seconds = target - duration
-        cmd += ['-af', f'apad=pad_dur={pad_seconds:.2f}', '-t', f'{target:.2f}']
-    else:
-        cmd += ['-t', f'{target:.2f}']
-    cmd.append(str(padded_path))
-    _run_subprocess(cmd)
-    return padded_path
-
-def _concat_audio_segments(segments: List[Path], output_path: Path) -> None:
-    concat_file = output_path.with_suffix('.txt')
-    with concat_file.open('w', encoding='utf-8') as handle:
-        for segment in segments:
-            escaped = str(segment).replace("'", "'\''")
-            handle.write(f"file '{escaped}'\n")
-
-    cmd = [FFMPEG_BINARY, '-y', '-f', 'concat', '-safe', '0', '-i', str(concat_file), '-c', 'pcm_s16le', '-ar', '48000', '-ac', '2', str(output_path)]
-    _run_subprocess(cmd)
-
-def _convert_audio_to_mp3(source: Path, output: Path) -> None:
-    cmd = [FFMPEG_BINARY, '-y', '-i', str(source), '-c:a', 'libmp3lame', '-b:a', '192k', str(output)]
-    _run_subprocess(cmd)
+    return segment_path
 
 def _merge_audio_with_video(job_id: str, job_dir: Path, audio_path: Path) -> Path:
     video_path = job_dir / f'virtual_tour_{job_id}.mp4'
@@ -607,8 +590,7 @@ def _merge_audio_with_video(job_id: str, job_dir: Path, audio_path: Path) -> Pat
         '-map', '0:v:0',
         '-map', '1:a:0',
         '-c:v', 'copy',
-        '-c:a', 'aac',
-        '-b:a', '192k',
+        '-c:a', 'copy',
         '-shortest',
         str(temp_output)
     ]
@@ -626,24 +608,30 @@ def _generate_talk_track_async(job_id: str, scripts: List[str]) -> None:
     job.setdefault('talk_track', {})
     job['talk_track'].update({'status': 'in_progress', 'progress': 10, 'message': 'Generating narration segments'})
 
-    segments: List[Path] = []
+    segments: List[Optional[Path]] = [None] * len(scripts)
+
+    def on_scene_ready(index: int, audio_bytes: bytes) -> None:
+        # Check each scene's length while the remaining ones are still being synthesized
+        idx = index + 1
+        segment_path = job_dir / f'talk_segment_{idx:03d}.mp3'
+        segment_path.write_bytes(audio_bytes)
+        segments[index] = _validate_talk_segment(segment_path, idx)
+        done = sum(1 for segment in segments if segment is not None)
+        job['talk_track'].update({
+            'progress': 10 + int(done / max(len(scripts), 1) * 40),
+            'message': f'Generated narration for {done} of {len(scripts)} scenes',
+        })
+
     try:
-        for idx, line in enumerate(scripts, start=1):
-            audio_bytes = synthesize_speech(line)
-            segment_path = job_dir / f'talk_segment_{idx:03d}.mp3'
-            segment_path.write_bytes(audio_bytes)
-            padded = _prepare_talk_segment(segment_path, idx)
-            segments.append(padded)
-            job['talk_track']['progress'] = 10 + int(idx / max(len(scripts), 1) * 40)
+        synthesize_many(scripts, on_complete=on_scene_ready)
 
         job['talk_track'].update({'progress': 60, 'message': 'Combining narration'})
-        talk_track_wav = job_dir / f'talk_track_{job_id}.wav'
-        _concat_audio_segments(segments, talk_track_wav)
         talk_track_mp3 = job_dir / f'talk_track_{job_id}.mp3'
-        _convert_audio_to_mp3(talk_track_wav, talk_track_mp3)
+        talk_track_aac = job_dir / f'talk_track_{job_id}.m4a'
+        build_talk_track(segments, SLIDE_DURATION_SECONDS, talk_track_mp3, talk_track_aac, FFMPEG_BINARY)
 
         job['talk_track'].update({'progress': 80, 'message': 'Merging audio with video'})
-        final_video = _merge_audio_with_video(job_id, job_dir, talk_track_mp3)
+        final_video = _merge_audio_with_video(job_id, job_dir, talk_track_aac)
 
         job['files_generated']['talk_track_audio'] = talk_track_mp3.name
         job['files_generated']['silent_video'] = f'virtual_tour_{job_id}_silent.mp4'
@@ -22,8 +22,12 @@ logger = logging.getLogger(__name__)
 # Using storage backend (Bunny.net)
 from upload_to_storage import upload_files_to_storage, upload_video_to_storage, get_video_url_storage
 from ai_script_generator import generate_room_scripts as ai_generate_room_scripts
-from openai_tts import synthesize_speech, OpenAITTSError
+from talk_track_audio import build_talk_track
+from audio_duration import read_duration as read_audio_duration
+from openai_tts import synthesize_many, get_tts_cache, OpenAITTSError
 from github_actions_integration import GitHubActionsIntegration
+from render_scheduler import get_render_scheduler, BACKEND_GITHUB, BACKEND_LOCAL
+from capacity_model import CAPACITY_PLANNING_ENABLED, get_capacity_model
 from PIL import Image
 import io
 from storage_adapter import test_storage_initialization
@@ -47,6 +51,9 @@ TEMP_DIR = os.environ.get('TEMP_DIR', tempfile.gettempdir())
 if not os.path.exists(TEMP_DIR):
     os.makedirs(TEMP_DIR, exist_ok=True)
 
+# Render a quick 480p proxy locally from the uploaded photos while the full render runs
+PREVIEW_RENDER = os.environ.get('PREVIEW_RENDER', 'true').lower() == 'true'
+
 # In-memory job tracking with detailed status
 active_jobs = {}
 
@@ -178,6 +185,11 @@ if isinstance(FFPROBE_BINARY, str) and not (Path(FFPROBE_BINARY).exists() or shu
         FFPROBE_BINARY = 'ffprobe'
 SLIDE_DURATION_SECONDS = int(os.environ.get('SLIDE_DURATION_SECONDS', '8'))
 
+# CDN-hosted renders kept locally (keyed by URL and ETag) for repeated narration merges
+REMOTE_VIDEO_CACHE_ENABLED = os.environ.get('REMOTE_VIDEO_CACHE', 'true').lower() == 'true'
+REMOTE_VIDEO_CACHE_MAX_MB = int(os.environ.get('REMOTE_VIDEO_CACHE_MAX_MB', '2048'))
+REMOTE_VIDEO_CACHE_TTL = float(os.environ.get('REMOTE_VIDEO_CACHE_TTL', str(7 * 24 * 3600)))
+
 
 ROOM_LABELS = {
     'front': 'Front',
@@ -221,6 +233,11 @@ def _build_job_payload(job_id: str) -> Optional[Dict[str, Any]]:
         'talk_track': job.get('talk_track', {}),
         'github_job_id': job.get('github_job_id'),
         'github_actions_failed': job.get('github_actions_failed', False),
+        'render_backend': job.get('render_backend'),
+        'render_routing': job.get('render_routing'),
+        'render_plan': job.get('render_plan'),
+        # The proxy is only offered until the final video lands
+        'preview': None if job.get('video_available') else job.get('preview'),
         'imagekit_video': job.get('imagekit_video', False),
         'bunnynet_video': job.get('bunnynet_video', False),
         'error': job.get('error'),
@@ -306,6 +323,11 @@ def _run_subprocess(cmd: List[str]) -> subprocess.CompletedProcess:
     return result
 
 def _probe_audio_duration(audio_path: Path) -> float:
+    # MP3 and WAV are read from their headers; ffprobe only for other formats
+    duration = read_audio_duration(str(audio_path))
+    if duration is not None:
+        return duration
+
     cmd = [FFPROBE_BINARY or 'ffprobe', '-v', 'error', '-show_entries', 'format=duration', '-of', 'default=noprint_wrappers=1:nokey=1', str(audio_path)]
     try:
         result = _run_subprocess(cmd)
@@ -321,55 +343,85 @@ def _probe_audio_duration(audio_path: Path) -> float:
         total_seconds = (int(hours) * 3600) + (int(minutes) * 60) + float(seconds)
         return float(total_seconds)
 
-def _prepare_talk_segment(segment_path: Path, idx: int) -> Path:
+def _validate_talk_segment(segment_path: Path, idx: int) -> Path:
     target = SLIDE_DURATION_SECONDS
     duration = _probe_audio_duration(segment_path)
     if duration > target + 0.5:
         raise ValueError(f'Scene {idx} narration is too long ({duration:.1f}s). Shorten it to fit {target} seconds.')
+    return segment_path
 
-    padded_path = segment_path.with_suffix('.wav')
-    cmd = [FFMPEG_BINARY, '-y', '-i', str(segment_path), '-ar', '48000', '-ac', '2']
-    if duration < target:
-        pad_seconds = target - duration
-        cmd += ['-af', f'apad=pad_dur={pad_seconds:.2f}', '-t', f'{target:.2f}']
-    else:
-        cmd += ['-t', f'{target:.2f}']
-    cmd.append(str(padded_path))
-    _run_subprocess(cmd)
-    return padded_path
-
-def _concat_audio_segments(segments: List[Path], output_path: Path) -> None:
-    concat_file = output_path.with_suffix('.txt')
-    with concat_file.open('w', encoding='utf-8') as handle:
-        for segment in segments:
-            escaped = str(segment).replace("'", "'\\''")
-            handle.write(f"file '{escaped}'\n")
-
-    cmd = [FFMPEG_BINARY, '-y', '-f', 'concat', '-safe', '0', '-i', str(concat_file), '-c', 'pcm_s16le', '-ar', '48000', '-ac', '2', str(output_path)]
-    _run_subprocess(cmd)
+def _get_remote_video_cache():
+    if not REMOTE_VIDEO_CACHE_ENABLED:
+        return None
+    from disk_cache import get_cache
+    return get_cache('remote_videos', REMOTE_VIDEO_CACHE_MAX_MB * 1024 * 1024,
+                     ttl=REMOTE_VIDEO_CACHE_TTL, suffix='.mp4')
 
-def _convert_audio_to_mp3(source: Path, output: Path) -> None:
-    cmd = [FFMPEG_BINARY, '-y', '-i', str(source), '-c:a', 'libmp3lame', '-b:a', '192k', str(output)]
-    _run_subprocess(cmd)
+def _remote_video_validator(video_url: str) -> Optional[str]:
+    """ETag (or Last-Modified and size) identifying the current CDN copy"""
+    try:
+        response = requests.head(video_url, allow_redirects=True, timeout=15)
+        response.raise_for_status()
+    except Exception as exc:
+        logger.debug('HEAD failed for %s: %s', video_url, exc)
+        return None
+    headers = response.headers
+    if headers.get('ETag'):
+        return headers['ETag']
+    if headers.get('Last-Modified') and headers.get('Content-Length'):
+        return f"{headers['Last-Modified']}|{headers['Content-Length']}"
+    return None
+
+def _link_cached_video(cached_path: str, target: Path) -> bool:
+    """Pin a cache entry into the job dir so eviction cannot delete it under ffmpeg"""
+    try:
+        if target.exists():
+            target.unlink()
+        try:
+            os.link(cached_path, target)
+        except OSError:
+            shutil.copy(cached_path, target)
+        return True
+    except OSError as exc:
+        logger.info('Cached remote video unavailable (%s); reading it over HTTP', exc)
+        return False
+
+def _resolve_remote_video(job: Dict[str, Any], job_id: str, job_dir: Path) -> Optional[str]:
+    """
+    Local path or URL of the CDN-hosted render for the narration merge
 
-def _download_remote_video(job: Dict[str, Any], job_id: str, job_dir: Path) -> Optional[Path]:
+    Cached copies are reused while the CDN reports the same ETag and are
+    hard-linked into the job dir before use; without a cache or a validator
+    ffmpeg reads the URL directly (the merge copies the video stream, so
+    nothing is written besides the output).
+    """
     files_generated = job.get('files_generated', {})
     video_url = files_generated.get('bunnynet_url') or files_generated.get('imagekit_url') or files_generated.get('cloud_video_url')
     if not video_url:
         return None
 
-    target_path = job_dir / f'remote_video_{job_id}.mp4'
-    try:
-        response = requests.get(video_url, stream=True, timeout=60)
-        response.raise_for_status()
-        with target_path.open('wb') as handle:
-            for chunk in response.iter_content(chunk_size=65536):
-                if chunk:
-                    handle.write(chunk)
-        return target_path
-    except Exception as exc:
-        logger.warning(f'Unable to download remote video for merge: {exc}')
-        return None
+    cache = _get_remote_video_cache()
+    validator = _remote_video_validator(video_url) if cache is not None else None
+    if cache is None or validator is None:
+        logger.info('Merging narration for job %s straight from %s', job_id, video_url)
+        return video_url
+
+    from disk_cache import cache_key
+    key = cache_key('remote_video', video_url, validator)
+    target = job_dir / f'remote_video_{job_id}.mp4'
+    cached = cache.get_path(key)
+    if cached:
+        logger.info('Using cached remote video for job %s', job_id)
+    else:
+        try:
+            with requests.get(video_url, stream=True, timeout=60) as response:
+                response.raise_for_status()
+                cached = cache.put_stream(key, response.iter_content(chunk_size=1024 * 1024))
+        except Exception as exc:
+            logger.warning(f'Unable to cache remote video for merge, reading it over HTTP: {exc}')
+            return video_url
+
+    return str(target) if _link_cached_video(cached, target) else video_url
 
 def _merge_audio_with_video(job_id: str, job_dir: Path, audio_path: Path) -> Optional[Path]:
     job = active_jobs.get(job_id, {})
@@ -386,7 +438,7 @@ def _merge_audio_with_video(job_id: str, job_dir: Path, audio_path: Path) -> Opt
         if not job.get('video_available'):
             logger.info('Video not yet available for job %s; skipping merge step.', job_id)
             return None
-        video_source = _download_remote_video(job, job_id, job_dir)
+        video_source = _resolve_remote_video(job, job_id, job_dir)
         if not video_source:
             logger.info('Remote video could not be obtained for job %s; skipping merge.', job_id)
             return None
@@ -399,8 +451,7 @@ def _merge_audio_with_video(job_id: str, job_dir: Path, audio_path: Path) -> Opt
         '-map', '0:v:0',
         '-map', '1:a:0',
         '-c:v', 'copy',
-        '-c:a', 'aac',
-        '-b:a', '192k',
+        '-c:a', 'copy',
         '-shortest',
         str(output_path)
     ]
@@ -417,21 +468,27 @@ def _generate_talk_track_async(job_id: str, scripts: List[str]) -> None:
     job.setdefault('talk_track', {})
     job['talk_track'].update({'status': 'in_progress', 'progress': 10, 'message': 'Generating narration segments'})
 
-    segments: List[Path] = []
+    segments: List[Optional[Path]] = [None] * len(scripts)
+
+    def on_scene_ready(index: int, audio_bytes: bytes) -> None:
+        # Check each scene's length while the remaining ones are still being synthesized
+        idx = index + 1
+        segment_path = job_dir / f'talk_segment_{idx:03d}.mp3'
+        segment_path.write_bytes(audio_bytes)
+        segments[index] = _validate_talk_segment(segment_path, idx)
+        done = sum(1 for segment in segments if segment is not None)
+        job['talk_track'].update({
+            'progress': 10 + int(done / max(len(scripts), 1) * 35),
+            'message': f'Generated narration for {done} of {len(scripts)} scenes',
+        })
+
     try:
-        for idx, line in enumerate(scripts, start=1):
-            audio_bytes = synthesize_speech(line)
-            segment_path = job_dir / f'talk_segment_{idx:03d}.mp3'
-            segment_path.write_bytes(audio_bytes)
-            padded = _prepare_talk_segment(segment_path, idx)
-            segments.append(padded)
-            job['talk_track']['progress'] = 10 + int(idx / max(len(scripts), 1) * 35)
+        synthesize_many(scripts, on_complete=on_scene_ready)
 
         job['talk_track'].update({'progress': 55, 'message': 'Combining narration segments'})
-        talk_track_wav = job_dir / f'talk_track_{job_id}.wav'
-        _concat_audio_segments(segments, talk_track_wav)
         talk_track_mp3 = job_dir / f'talk_track_{job_id}.mp3'
-        _convert_audio_to_mp3(talk_track_wav, talk_track_mp3)
+        talk_track_aac = job_dir / f'talk_track_{job_id}.m4a'
+        build_talk_track(segments, SLIDE_DURATION_SECONDS, talk_track_mp3, talk_track_aac, FFMPEG_BINARY)
 
         files_generated = job.setdefault('files_generated', {})
         files_generated['talk_track_audio'] = str(talk_track_mp3)
@@ -439,7 +496,7 @@ def _generate_talk_track_async(job_id: str, scripts: List[str]) -> None:
         job['talk_track'].update({'progress': 75, 'message': 'Attempting to merge narration with video'})
         merged_video = None
         try:
-            merged_video = _merge_audio_with_video(job_id, job_dir, talk_track_mp3)
+            merged_video = _merge_audio_with_video(job_id, job_dir, talk_track_aac)
         except Exception as merge_exc:
             logger.warning('Talk track merge failed for job %s: %s', job_id, merge_exc)
 
@@ -484,6 +541,8 @@ def start_github_actions_polling(job_id, github_job_id):
         attempt = 0
         github_actions_complete = False
         video_url = None
+        dispatched_at = active_jobs[job_id].get('render_dispatched_at', time.time())
+        picked_up = False
         
         while attempt < max_attempts:
             attempt += 1
@@ -504,6 +563,10 @@ def start_github_actions_polling(job_id, github_job_id):
                         workflow_status, error_details = github_actions.get_workflow_status(github_job_id)
                         logger.info(f"GitHub Actions status for {github_job_id}: {workflow_status}")
                         
+                        if not picked_up and workflow_status in ('in_progress', 'completed', 'failed'):
+                            picked_up = True
+                            render_scheduler.record_pickup_latency(time.time() - dispatched_at)
+                        
                         if workflow_status == 'completed':
                             github_actions_complete = True
                             logger.info(f"GitHub Actions completed for job {github_job_id}")
@@ -524,10 +587,19 @@ def start_github_actions_polling(job_id, github_job_id):
                             active_jobs[job_id]['progress'] = 100
                             active_jobs[job_id]['error_details'] = error_details
                             active_jobs[job_id]['github_actions_failed'] = True
+                            render_scheduler.github_finished(github_job_id)
                             return
                     except Exception as e:
                         logger.warning(f"Error checking GitHub Actions status: {e}")
                 
+                # Re-route runs GitHub hasn't started in time instead of waiting for the timeout
+                if render_scheduler.should_reroute(dispatched_at, picked_up):
+                    waited = time.time() - dispatched_at
+                    github_actions.cancel_workflow_run(github_job_id)
+                    render_scheduler.github_finished(github_job_id)
+                    _start_local_render(job_id, f'GitHub Actions did not start within {waited:.0f}s')
+                    return
+                
                 # If GitHub Actions is complete, check if video exists
                 if github_actions_complete and video_url:
                     response = requests.head(video_url, timeout=5)
@@ -550,6 +622,7 @@ def start_github_actions_polling(job_id, github_job_id):
                     if 'files_generated' not in active_jobs[job_id]:
                         active_jobs[job_id]['files_generated'] = {}
                     active_jobs[job_id]['files_generated']['imagekit_url'] = video_url
+                    render_scheduler.github_finished(github_job_id)
                     
                     logger.info(f"Job {job_id} completed successfully with ImageKit URL: {video_url}")
                     return
@@ -566,6 +639,15 @@ def start_github_actions_polling(job_id, github_job_id):
             # Wait before next attempt
             time.sleep(10)
         
+        render_scheduler.github_finished(github_job_id)
+        
+        # Stalled run - render locally rather than failing the job
+        if render_scheduler.local_available:
+            logger.warning(f"Video polling timeout for job {job_id}; re-routing to local render")
+            github_actions.cancel_workflow_run(github_job_id)
+            _start_local_render(job_id, 'GitHub Actions render timed out')
+            return
+        
         # Timeout - video generation took too long
         logger.error(f"Video polling timeout for job {job_id} after {max_attempts} attempts")
         active_jobs[job_id]['status'] = 'error'
@@ -588,6 +670,138 @@ if all([os.environ.get('GITHUB_TOKEN'), os.environ.get('GITHUB_OWNER'), os.envir
     except Exception as e:
         logger.error(f"Failed to initialize GitHub Actions: {e}")
 
+# Initialize the local Remotion renderer if enabled; the bundle is built once
+# in the background and reused by every local render
+local_remotion = None
+if os.environ.get('USE_LOCAL_REMOTION', 'false').lower() == 'true':
+    try:
+        from remotion_integration import get_local_renderer
+        local_remotion = get_local_renderer()
+        local_remotion.warm_up()
+        logger.info("Local Remotion renderer initialized (bundle warming up)")
+    except Exception as e:
+        logger.error(f"Failed to initialize local Remotion renderer: {e}")
+
+# Routes jobs between GitHub Actions and the local engines; GitHub only counts
+# as available when the workflow is enabled
+render_scheduler = get_render_scheduler(
+    github_actions if os.environ.get('USE_GITHUB_ACTIONS', 'false').lower() == 'true' else None,
+    local_remotion
+)
+
+# Measure local render speed once per host (workers share the saved result) so
+# local jobs can be planned against a deadline
+capacity_model = get_capacity_model()
+if CAPACITY_PLANNING_ENABLED and render_scheduler.local_available:
+    capacity_model.start_benchmark()
+
+
+def _start_local_render(job_id: str, reason: str, reserved: bool = False) -> None:
+    """
+    Render a job on this host in the background and publish it like a GitHub render
+
+    reserved=True hands over the local slot choose_backend reserved for the job.
+    """
+    job = active_jobs.get(job_id)
+    if not job:
+        if reserved:
+            render_scheduler.release_local()
+        return
+
+    job['render_backend'] = BACKEND_LOCAL
+    job['render_routing'] = {'backend': BACKEND_LOCAL, 'reason': reason}
+    job['status'] = 'processing'
+    job['current_step'] = f'Rendering locally ({reason})'
+    logger.info(f"Job {job_id} routed to local render: {reason}")
+
+    # Remotion renders at its own settings; the Ken Burns engines follow the plan
+    render_request = job.get('render_request') or {}
+    plan = None
+    if CAPACITY_PLANNING_ENABLED and (local_remotion is None or not render_request.get('images')):
+        try:
+            plan = capacity_model.plan(len(job.get('saved_files', [])), job.get('render_deadline'))
+            job['render_plan'] = plan.to_dict()
+        except Exception as e:
+            logger.warning(f"Could not plan local render for job {job_id}: {e}")
+
+    def run_local_render():
+        render_start = time.time()
+        job_dir = Path(STORAGE_DIR) / job_id
+        job_dir.mkdir(parents=True, exist_ok=True)
+        output_path = str(job_dir / f'virtual_tour_{job_id}.mp4')
+        try:
+            video_path = render_scheduler.render_local(
+                job_id,
+                output_path,
+                job.get('saved_files', []),
+                job.get('render_request'),
+                plan=plan,
+                reserved=reserved
+            )
+            if plan is not None:
+                render_seconds = time.time() - render_start
+                capacity_model.record_render(plan, render_seconds)
+                job['render_plan']['actual_seconds'] = round(render_seconds, 1)
+
+            files_generated = job.setdefault('files_generated', {})
+            files_generated['local_video'] = video_path
+            job['progress'] = 95
+            job['current_step'] = 'Uploading rendered video'
+
+            video_url = upload_video_to_storage(video_path, f"{job_id}.mp4", "tours/videos/")
+            if video_url:
+                files_generated['bunnynet_url'] = video_url
+                job['bunnynet_video'] = True
+
+            job['video_available'] = True
+            job['status'] = 'completed'
+            job['progress'] = 100
+            job['current_step'] = 'Video ready!'
+            logger.info(f"Local render for job {job_id} finished in {time.time() - render_start:.1f}s")
+        except Exception as e:
+            logger.error(f"Local render failed for job {job_id}: {e}", exc_info=True)
+            job['status'] = 'error'
+            job['progress'] = 100
+            job['current_step'] = f'Local render failed: {e}'
+            job['error'] = str(e)
+
+    threading.Thread(target=run_local_render, daemon=True).start()
+
+def _start_preview_render(job_id: str) -> None:
+    """Render the job's 480p proxy from its saved uploads in the background"""
+    job = active_jobs.get(job_id)
+    if not job or not job.get('saved_files'):
+        return
+
+    preview = {'status': 'processing', 'url': None}
+    job['preview'] = preview
+
+    def run_preview_render():
+        render_start = time.time()
+        output_path = str(Path(STORAGE_DIR) / job_id / f'preview_{job_id}.mp4')
+        try:
+            from ffmpeg_ken_burns import create_ken_burns_video
+            create_ken_burns_video(job['saved_files'], output_path, job_id, quality='preview')
+            preview['local_path'] = output_path
+            preview['render_seconds'] = round(time.time() - render_start, 1)
+
+            if job.get('video_available'):
+                logger.info(f"Final video for job {job_id} landed first; preview not published")
+                return
+
+            preview['url'] = (
+                upload_video_to_storage(output_path, f"{job_id}.mp4", "tours/previews/")
+                or f"{virtual_tour_bp.url_prefix}/download/{job_id}/preview"
+            )
+            preview['status'] = 'ready'
+            logger.info(f"Preview for job {job_id} ready in {preview['render_seconds']}s")
+        except Exception as e:
+            logger.warning(f"Preview render failed for job {job_id}: {e}")
+            preview['status'] = 'failed'
+            preview['error'] = str(e)
+
+    threading.Thread(target=run_preview_render, daemon=True).start()
+
 def cleanup_old_files():
     """Clean up files older than 24 hours"""
     try:
@@ -731,6 +945,9 @@ def env_check():
 @virtual_tour_bp.route('/health', methods=['GET'])
 def health_check():
     """Check system health - GitHub Actions, storage backend, and storage"""
+    tts_cache = get_tts_cache()
+    remote_video_cache = _get_remote_video_cache()
+
     # Check storage backend status
     from storage_adapter import get_storage
     try:
@@ -746,6 +963,10 @@ def health_check():
         'storage_writable': False,
         'storage_path': STORAGE_DIR,
         'github_actions_available': github_actions is not None,
+        'render_scheduler': render_scheduler.snapshot(),
+        'capacity_model': capacity_model.snapshot(),
+        'tts_cache': tts_cache.stats() if tts_cache is not None else None,
+        'remote_video_cache': remote_video_cache.stats() if remote_video_cache is not None else None,
         'storage_configured': storage_configured,
         'storage_backend': backend_name,
         'primary_storage': backend_name.upper() if storage_configured else 'NOT_CONFIGURED'
@@ -779,6 +1000,8 @@ def upload_images():
     """Handle image upload and create virtual tour with improved error recovery"""
     job_id = str(uuid.uuid4())
     start_time = time.time()
+    # Set while this request holds a local slot reserved by choose_backend
+    local_slot_reserved = False
     
     # Initialize error recovery
     MAX_RETRIES = 3
@@ -828,14 +1051,14 @@ def upload_images():
             active_jobs[job_id]['error'] = error_message
             return jsonify({'error': error_message, 'job_id': job_id}), 503
 
-        if os.environ.get('USE_GITHUB_ACTIONS', 'false').lower() != 'true':
+        if os.environ.get('USE_GITHUB_ACTIONS', 'false').lower() != 'true' and not render_scheduler.local_available:
             error_message = 'GitHub Actions workflow disabled. Set USE_GITHUB_ACTIONS=true to enable rendering.'
             active_jobs[job_id]['status'] = 'error'
             active_jobs[job_id]['current_step'] = error_message
             active_jobs[job_id]['error'] = error_message
             return jsonify({'error': error_message, 'job_id': job_id}), 503
 
-        if github_actions is None or not getattr(github_actions, 'is_valid', True):
+        if (github_actions is None or not getattr(github_actions, 'is_valid', True)) and not render_scheduler.local_available:
             error_message = 'GitHub Actions credentials missing or invalid. Check GITHUB_TOKEN, GITHUB_OWNER, and GITHUB_REPO.'
             active_jobs[job_id]['status'] = 'error'
             active_jobs[job_id]['current_step'] = error_message
@@ -1032,6 +1255,11 @@ def upload_images():
             # Update job progress with compression info
             active_jobs[job_id]['images_processed'] = len(saved_files)
             active_jobs[job_id]['saved_files'] = saved_files  # Store for potential fallback
+            # Parsed like the PREVIEW_RENDER flag, so "false" (string or JSON) turns it off
+            preview_setting = settings.get('preview')
+            render_preview = PREVIEW_RENDER if preview_setting is None else str(preview_setting).lower() == 'true'
+            if saved_files and render_preview:
+                _start_preview_render(job_id)
             active_jobs[job_id]['files_generated']['image_count'] = len(saved_files)
             active_jobs[job_id]['files_generated']['room_assignments'] = active_jobs[job_id]['room_assignments']
             assignments_path = Path(job_dir) / f'room_assignments_{job_id}.json'
@@ -1063,11 +1291,18 @@ def upload_images():
         use_github_actions = os.environ.get('USE_GITHUB_ACTIONS', 'false').lower() == 'true' and github_actions
         logger.info(f"GitHub Actions enabled: {use_github_actions} (env: {os.environ.get('USE_GITHUB_ACTIONS')}, integration: {github_actions is not None})")
         
+        # Decide where this job renders before uploading anything
+        routing = render_scheduler.choose_backend()
+        active_jobs[job_id]['render_routing'] = routing.to_dict()
+        render_locally = routing.backend == BACKEND_LOCAL
+        local_slot_reserved = render_locally
+        logger.info(f"Render routing for job {job_id}: {routing.backend} ({routing.reason})")
+        
         # Prepare image URLs for GitHub Actions
         github_image_urls = image_urls or []
         
         # If we have uploaded files but no URLs, upload them to Cloudinary first
-        if use_github_actions and 'saved_files' in locals() and saved_files and not image_urls:
+        if (use_github_actions or render_locally) and 'saved_files' in locals() and saved_files and not image_urls:
             try:
                 active_jobs[job_id]['current_step'] = 'Uploading images to storage for GitHub Actions'
                 active_jobs[job_id]['progress'] = 40
@@ -1123,7 +1358,7 @@ def upload_images():
         elif not github_image_urls:
             logger.error("GitHub Actions enabled but no images uploaded to storage; aborting job")
         
-        if use_github_actions and not github_image_urls:
+        if use_github_actions and not github_image_urls and not render_locally:
             error_msg = 'Failed to upload images to storage for GitHub Actions. Verify Bunny.net credentials.'
             active_jobs[job_id]['status'] = 'error'
             active_jobs[job_id]['current_step'] = error_msg
@@ -1132,55 +1367,64 @@ def upload_images():
             active_jobs[job_id]['github_actions_failed'] = True
             return jsonify({'error': error_msg, 'job_id': job_id}), 502
 
-        if use_github_actions and github_image_urls:
+        # Build details string from property fields if available
+        details_parts = []
+        property_price = request.form.get('property_price', '').strip()
+        property_beds = request.form.get('property_beds', '').strip()
+        property_baths = request.form.get('property_baths', '').strip()
+        property_sqft = request.form.get('property_sqft', '').strip()
+        
+        if property_price:
+            details_parts.append(property_price)
+        if property_beds:
+            details_parts.append(f"{property_beds} Beds")
+        if property_baths:
+            details_parts.append(f"{property_baths} Baths")
+        if property_sqft:
+            details_parts.append(property_sqft)
+        
+        # Use composed details or fallback to details1
+        property_details_string = ' | '.join(details_parts) if details_parts else details1
+        
+        # Seconds a local render of this job may take (capacity model default otherwise)
+        active_jobs[job_id]['render_deadline'] = settings.get('renderDeadline')
+        
+        # Render inputs shared by the GitHub and local backends
+        active_jobs[job_id]['render_request'] = {
+            'images': github_image_urls,
+            'property_details': {
+                'address': address,
+                'city': city,
+                'details': property_details_string,  # Remotion expects 'details' not 'details1'
+                'status': details2,  # Status is from details2
+                'agentName': agent_name,  # Remotion expects camelCase
+                'agentEmail': agent_email,
+                'agentPhone': agent_phone,
+                'brandName': brand_name
+            },
+            'settings': {
+                'durationPerImage': duration_per_image,
+                'effectSpeed': effect_speed,
+                'transitionDuration': transition_duration
+            }
+        }
+        
+        if use_github_actions and github_image_urls and not render_locally:
             github_actions_attempted = True
             try:
                 active_jobs[job_id]['current_step'] = 'Triggering GitHub Actions for high-quality rendering'
                 active_jobs[job_id]['progress'] = 60
                 
-                logger.info(f"Triggering GitHub Actions with {len(github_image_urls)} images")
-                
-                # Build details string from property fields if available
-                details_parts = []
-                property_price = request.form.get('property_price', '').strip()
-                property_beds = request.form.get('property_beds', '').strip()
-                property_baths = request.form.get('property_baths', '').strip()
-                property_sqft = request.form.get('property_sqft', '').strip()
-                
-                if property_price:
-                    details_parts.append(property_price)
-                if property_beds:
-                    details_parts.append(f"{property_beds} Beds")
-                if property_baths:
-                    details_parts.append(f"{property_baths} Baths")
-                if property_sqft:
-                    details_parts.append(property_sqft)
-                
-                # Use composed details or fallback to details1
-                property_details_string = ' | '.join(details_parts) if details_parts else details1
-                
                 logger.info(f"Triggering GitHub Actions for job {job_id} with {len(github_image_urls)} images")
                 
                 # Prepare watermark configuration if available
                 watermark_config = None  # Watermark embedding disabled
 
+                render_request = active_jobs[job_id]['render_request']
                 github_result = github_actions.trigger_video_render(
-                        images=github_image_urls,
-                        property_details={
-                            'address': address,
-                            'city': city,
-                            'details': property_details_string,  # Remotion expects 'details' not 'details1'
-                            'status': details2,  # Status is from details2
-                            'agentName': agent_name,  # Remotion expects camelCase
-                            'agentEmail': agent_email,
-                            'agentPhone': agent_phone,
-                            'brandName': brand_name
-                        },
-                        settings={
-                            'durationPerImage': duration_per_image,
-                            'effectSpeed': effect_speed,
-                            'transitionDuration': transition_duration
-                        },
+                        images=render_request['images'],
+                        property_details=render_request['property_details'],
+                        settings=render_request['settings'],
                         watermark=watermark_config
                 )
                 
@@ -1188,6 +1432,9 @@ def upload_images():
                 
                 if github_result.get('success'):
                     active_jobs[job_id]['github_job_id'] = github_result['job_id']
+                    active_jobs[job_id]['render_backend'] = BACKEND_GITHUB
+                    active_jobs[job_id]['render_dispatched_at'] = time.time()
+                    render_scheduler.github_dispatched(github_result['job_id'])
                     active_jobs[job_id]['current_step'] = 'Starting Remotion rendering'
                     active_jobs[job_id]['progress'] = 70
                     logger.info(f"GitHub Actions job started successfully: {github_result['job_id']}")
@@ -1251,6 +1498,15 @@ def upload_images():
             # Start background polling for GitHub Actions and ImageKit video
             github_job_id = active_jobs[job_id]['github_job_id']
             start_github_actions_polling(job_id, github_job_id)
+        elif (render_locally or github_actions_attempted) and render_scheduler.local_available and (
+                active_jobs[job_id].get('saved_files') or (local_remotion is not None and github_image_urls)):
+            # Routed locally up front, or GitHub dispatch failed - render on this host
+            # (Remotion renders from the storage URLs, the FFmpeg engines from saved files)
+            active_jobs[job_id]['progress'] = 75
+            active_jobs[job_id]['processing_time'] = f"{processing_time:.2f} seconds"
+            reason = routing.reason if render_locally else 'GitHub Actions dispatch failed'
+            _start_local_render(job_id, reason, reserved=local_slot_reserved)
+            local_slot_reserved = False
         else:
             # GitHub Actions was not triggered successfully
             logger.error(f"GitHub Actions not triggered for job {job_id}")
@@ -1259,6 +1515,8 @@ def upload_images():
             
             if active_jobs[job_id].get('github_actions_failed'):
                 active_jobs[job_id]['current_step'] = 'GitHub Actions failed - check configuration'
+            elif not use_github_actions and not render_locally and render_scheduler.local_available:
+                active_jobs[job_id]['current_step'] = f'Local renderer busy ({routing.reason}) - try again shortly'
             elif not use_github_actions:
                 active_jobs[job_id]['current_step'] = 'GitHub Actions not enabled'
             elif not github_image_urls:
@@ -1292,6 +1550,9 @@ def upload_images():
             'error': str(e),
             'job_id': job_id
         }), 500
+    finally:
+        if local_slot_reserved:
+            render_scheduler.release_local()
 
 @virtual_tour_bp.route('/download/<job_id>', methods=['GET'])
 def download_video(job_id):
@@ -1485,7 +1746,8 @@ def download_file(job_id, file_type):
             'video': f'virtual_tour_{job_id}.mp4',
             'virtual_tour': f'virtual_tour_{job_id}.mp4',
             'description': f'property_description_{job_id}.txt',
-            'script': f'voiceover_script_{job_id}.txt'
+            'script': f'voiceover_script_{job_id}.txt',
+            'preview': f'preview_{job_id}.mp4'
         }
         
         if file_type not in file_mapping: